@@ -1 +1,24 @@
-from blackjack.blackjack import Blackjack
+from importlib import import_module
+
+__all__ = ["Blackjack", "BatchBlackjack", "BlackjackEnv", "VectorBlackjackEnv"]
+
+# Module of each export. They are imported on first access, so running a submodule as a script
+# (e.g. python -m blackjack.strategy) does not import that submodule through the package beforehand.
+_EXPORTS = {
+    "Blackjack": "blackjack.blackjack",
+    "BatchBlackjack": "blackjack.batch",
+    "BlackjackEnv": "blackjack.env",
+    "VectorBlackjackEnv": "blackjack.env",
+}
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -2,26 +2,185 @@
 Main Blackjack module. Defines the CLI for running the game.
 """
 import argparse
-from datetime import datetime
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
+import numpy as np
 from tqdm import tqdm
 
-from blackjack import Blackjack
+from blackjack import Blackjack, BatchBlackjack, profiling
+from blackjack.core import Rules
+from blackjack.history import HandRecorder
+from blackjack.profiling import Profiler
+from blackjack.stats import HandStats
 
+# Samples played between precision checks on the batch engine, when stopping early
+CHECK_EVERY = 10_000
 
-def sample(game: Blackjack, n_games: int = 1, sample_size: int = 100):
-    """Runs performance testing for a given game"""
+
+def sample(game: Blackjack, n_games: int = 1, sample_size: int = 100, target_ci: float | None = None):
+    """Runs performance testing for a given game
+
+    :param target_ci: Stop early once the 95% confidence interval of the EV per hand is this narrow
+    """
     setattr(game, "_verbose", False)
 
-    total_wins = 0
     start = datetime.now()
-    for __ in tqdm(range(sample_size)):
-        score = game.play(rounds=n_games)
-        if score > 0:
-            total_wins += 1
+    stats = HandStats()
+    total_wins, played = _count_wins(game, n_games, tqdm(range(sample_size)), stats, target_ci)
+    end = datetime.now()
+
+    _report(n_games, played, total_wins, end - start, stats)
+
+
+def sample_batch(
+    player: str,
+    dealer: str,
+    n_games: int = 1,
+    sample_size: int = 100,
+    tables: int = 100_000,
+    seed: int | None = None,
+    options: dict | None = None,
+    target_ci: float | None = None,
+):
+    """Runs performance testing on the batch engine, playing up to `tables` samples at once
+
+    :param options: Extra game settings passed to BatchBlackjack (e.g. rules)
+    :param target_ci: Stop early once the 95% confidence interval of the EV per hand is this narrow
+    """
+    start = datetime.now()
+    with tqdm(total=sample_size) as progress:
+        total_wins, played, stats = _count_batch_wins(
+            player,
+            dealer,
+            n_games,
+            sample_size,
+            tables=tables,
+            seed=seed,
+            progress=progress,
+            options=options,
+            target_ci=target_ci,
+        )
+    end = datetime.now()
+
+    _report(n_games, played, total_wins, end - start, stats)
+
+
+def sample_parallel(
+    player: str,
+    dealer: str,
+    n_games: int = 1,
+    sample_size: int = 100,
+    *,
+    engine: str = "loop",
+    workers: int = 2,
+    seed: int | None = None,
+    options: dict | None = None,
+    target_ci: float | None = None,
+):
+    """Runs performance testing across a pool of worker processes.
+
+    The sample is split into one shard per worker. Each shard gets its own RNG stream spawned from `seed`,
+    so a run can be replayed exactly with the same seed and number of workers.
+
+    :param options: Extra game settings passed to Blackjack/BatchBlackjack (e.g. rules)
+    :param target_ci: Stop early once the 95% confidence interval of the EV per hand is this narrow.
+                      Each shard stops at target_ci * sqrt(workers), so the merged interval meets the target.
+    """
+    seeds = np.random.SeedSequence(seed)
+    sizes = [sample_size // workers + (i < sample_size % workers) for i in range(workers)]
+    shard_ci = target_ci * math.sqrt(workers) if target_ci else None
+
+    start = datetime.now()
+    total_wins, played, stats = 0, 0, HandStats()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        shards = [
+            pool.submit(_sample_shard, player, dealer, engine, n_games, size, shard_seed, options or {}, shard_ci)
+            for size, shard_seed in zip(sizes, seeds.spawn(workers))
+        ]
+        for shard in tqdm(as_completed(shards), total=workers):
+            wins, n, shard_stats = shard.result()
+            total_wins += wins
+            played += n
+            stats.merge(shard_stats)
     end = datetime.now()
+
+    _report(n_games, played, total_wins, end - start, stats)
+    print("Workers: ", workers)
+    print("Seed: ", seeds.entropy)
+
+
+def _sample_shard(
+    player: str,
+    dealer: str,
+    engine: str,
+    n_games: int,
+    sample_size: int,
+    seed: np.random.SeedSequence,
+    options: dict,
+    target_ci: float | None = None,
+) -> tuple[int, int, HandStats]:
+    """Count the wins in one shard of a sample. Runs in a worker process."""
+    if engine == "batch":
+        return _count_batch_wins(
+            player, dealer, n_games, sample_size, seed=seed, options=options, target_ci=target_ci
+        )
+
+    game = Blackjack(player=player, dealer=dealer, verbose=False, seed=seed, **options)
+    stats = HandStats()
+    return (*_count_wins(game, n_games, range(sample_size), stats, target_ci), stats)
+
+
+def _count_wins(
+    game: Blackjack, n_games: int, samples, stats: HandStats, target_ci: float | None = None
+) -> tuple[int, int]:
+    """Play the samples, returning the number of samples won & played"""
+    wins = played = 0
+    for __ in samples:
+        wins += game.play(rounds=n_games, stats=stats) > 0
+        played += 1
+        if target_ci and stats.ci() <= target_ci:
+            break
+    return wins, played
+
+
+def _count_batch_wins(
+    player: str,
+    dealer: str,
+    n_games: int,
+    sample_size: int,
+    *,
+    tables: int = 100_000,
+    seed: int | np.random.SeedSequence | None = None,
+    progress: tqdm | None = None,
+    options: dict | None = None,
+    target_ci: float | None = None,
+) -> tuple[int, int, HandStats]:
+    """Play the samples on the batch engine, returning the number of samples won & played and their stats"""
+    total_wins = 0
+    remaining = sample_size
+    stats = HandStats()
+    seeds = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    if target_ci:
+        tables = min(tables, CHECK_EVERY)
+    while remaining > 0 and not (target_ci and stats.ci() <= target_ci):
+        game = BatchBlackjack(
+            player=player,
+            dealer=dealer,
+            tables=min(tables, remaining),
+            seed=seeds.spawn(1)[0],
+            **(options or {}),
+        )
+        total_wins += int((game.play(rounds=n_games, stats=stats) > 0).sum())
+        remaining -= game.tables
+        if progress is not None:
+            progress.update(game.tables)
+    return total_wins, sample_size - remaining, stats
+
+
+def _report(n_games: int, sample_size: int, total_wins: int, elapsed: timedelta, stats: HandStats):
     win_rate = total_wins / sample_size
-    # win_rate = sum([win / sample_size for win in wins]) / 10
 
     print("-" * 50)
     print("Sample Distribution:")
@@ -29,7 +188,8 @@ def sample(game: Blackjack, n_games: int = 1, sample_size: int = 100):
     print("Number of Games per Sample: ", n_games)
     print("Total Games won: ", total_wins)
     print(f"Win Rate: {win_rate: .2%}")
-    print("Time elapsed (seconds): ", (end - start).seconds)
+    print(stats)
+    print(f"Time elapsed (seconds): {elapsed.total_seconds():.3f}")
 
 
 def _parse():
@@ -82,17 +242,155 @@ def _parse():
         nargs="?",
         dest='hands',
     )
+    parser.add_argument(
+        '--engine',
+        choices=["loop", "batch"],
+        help="Simulation engine used when testing. batch = play many games at once (not for user/q agents)",
+        default="loop",
+        type=str,
+        dest='engine',
+    )
+    Rules.add_arguments(parser)
+    parser.add_argument(
+        '--table',
+        help=(
+            "Pretrained table file for the player, memory-mapped instead of training: a Q-table for q "
+            "(see python -m blackjack.training) or a strategy table for basic (see python -m blackjack.strategy)."
+        ),
+        default=None,
+        type=str,
+        dest='table',
+    )
+    parser.add_argument(
+        '--train-rounds',
+        help="Number of hands to train trainable agents (q) for.",
+        default=10_000,
+        type=int,
+        dest='train_rounds',
+    )
+    parser.add_argument(
+        '--train-tables',
+        help="Train on this many tables in lockstep with batched updates. 0 = train one hand at a time.",
+        default=0,
+        type=int,
+        dest='train_tables',
+    )
+    parser.add_argument(
+        '--target-ci',
+        help="Stop testing once the 95%% confidence interval of the EV per hand is this narrow (e.g. 0.01).",
+        default=None,
+        type=float,
+        dest='target_ci',
+    )
+    parser.add_argument(
+        '--workers',
+        help="Number of worker processes to split the sample across (mode=test).",
+        default=1,
+        type=int,
+        dest='workers',
+    )
+    parser.add_argument(
+        '--record',
+        help="Append every hand played to this binary hand history file (loop engine, single process only).",
+        default=None,
+        type=str,
+        dest='record',
+    )
+    parser.add_argument(
+        '--profile',
+        help="Print how long each phase of the game took (loop engine, single process only).",
+        action='store_true',
+        dest='profile',
+    )
+    parser.add_argument(
+        '--cprofile',
+        help="Run under cProfile and dump the stats to this file (for pstats, snakeviz, flameprof, ...).",
+        default=None,
+        type=str,
+        dest='cprofile',
+    )
+    parser.add_argument(
+        '--no-compile',
+        help="Call deterministic agents for every decision instead of compiling them to action tables (loop engine).",
+        action='store_false',
+        dest='compiled',
+    )
+    parser.add_argument(
+        '--seed',
+        help="Seed for the random number generators, to replay a run exactly. Random if not given.",
+        default=None,
+        type=int,
+        dest='seed',
+    )
 
-    return vars(parser.parse_args())
+    args = vars(parser.parse_args())
+    try:
+        Rules.from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if args['mode'] == 'test' and (args['workers'] > 1 or args['engine'] == 'batch'):
+        if args['profile']:
+            parser.error("--profile only works with the loop engine in a single process")
+        if args['record']:
+            parser.error("--record only works with the loop engine in a single process")
+    return args
 
 
-if __name__ == "__main__":
-    args = _parse()
-    game = Blackjack(
-            player=args.get('player'),
-            dealer=args.get('dealer'),
+def _main(args: dict):
+    rules = Rules.from_args(args)
+    options = {"rules": rules, "table": args['table']}
+    if args['engine'] == 'loop':  # Only the loop engine trains agents
+        options.update(
+            train_rounds=args['train_rounds'], train_tables=args['train_tables'], compiled=args['compiled']
         )
 
+    if args['mode'] == 'test' and args['workers'] > 1:
+        sample_parallel(
+            args.get('player'),
+            args.get('dealer'),
+            n_games=max(args.get('hands'), 1),
+            sample_size=args.get('sample_size', 1_000),
+            engine=args['engine'],
+            workers=args['workers'],
+            seed=args['seed'],
+            options=options,
+            target_ci=args['target_ci'],
+        )
+    elif args['mode'] == 'test' and args['engine'] == 'batch':
+        sample_batch(
+            args.get('player'),
+            args.get('dealer'),
+            n_games=max(args.get('hands'), 1),
+            sample_size=args.get('sample_size', 1_000),
+            seed=args['seed'],
+            options=options,
+            target_ci=args['target_ci'],
+        )
+    else:
+        profiler = Profiler() if args['profile'] else None
+        recorder = HandRecorder(args['record']) if args['record'] else None
+        try:
+            _play(args, options, profiler, recorder)
+        finally:
+            if recorder is not None:
+                # Hands played before an interruption (e.g. of endless mode) are kept
+                recorder.close()
+                print(f"Recorded {recorder.hands} hands to {args['record']}")
+        if profiler is not None:
+            print(profiler.report())
+
+
+def _play(args: dict, options: dict, profiler: Profiler | None, recorder: HandRecorder | None):
+    """Play or test a single game in this process"""
+    game = Blackjack(
+        player=args.get('player'),
+        dealer=args.get('dealer'),
+        seed=args['seed'],
+        profiler=profiler,
+        recorder=recorder,
+        **options,
+    )
+
     if args['mode'] == 'run':
         hands = args.get('hands')
         if hands < 0:
@@ -105,6 +403,14 @@ if __name__ == "__main__":
             game,
             n_games=max(args.get('hands'), 1),
             sample_size=args.get('sample_size', 1_000),
+            target_ci=args['target_ci'],
         )
     else:  # Fallback on endless mode with default settings
         game.play(endless=True)
+
+if __name__ == "__main__":
+    args = _parse()
+    if args['cprofile']:
+        profiling.profile(lambda: _main(args), args['cprofile'])
+    else:
+        _main(args)
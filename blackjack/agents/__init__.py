@@ -4,6 +4,9 @@ __all__ = [
     "UserAgent",
     "RandomAgent",
     "SingleActionAgent",
+    "StrategyAgent",
+    "CardCounterAgent",
+    "AsyncAgent",
 ]
 
 from blackjack.agents.agent import Agent
@@ -11,3 +14,6 @@ from blackjack.agents.random_agent import RandomAgent
 from blackjack.agents.single_action_agent import SingleActionAgent
 from blackjack.agents.user_agent import UserAgent
 from blackjack.agents.dealer import Dealer
+from blackjack.agents.strategy_agent import StrategyAgent
+from blackjack.agents.card_counter_agent import CardCounterAgent
+from blackjack.agents.async_agent import AsyncAgent
@@ -1,6 +1,13 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import Hashable, Sequence
+
+import numpy as np
 
-from blackjack.core import GameState
+from blackjack.core import Action, GameState, Rules
+from blackjack.core.rules import DEFAULT_RULES
+from blackjack.policy import Policy
 
 
 class Agent(ABC):
@@ -13,23 +20,68 @@ class Agent(ABC):
                                  (Allows Agents to be used as either the Player or Dealer)
     """
 
-    def __init__(self, is_player: bool, trainable: bool = False, *args, **kwargs):
+    def __init__(
+        self,
+        is_player: bool,
+        trainable: bool = False,
+        *args,
+        rng: np.random.Generator | None = None,
+        rules: Rules = DEFAULT_RULES,
+        **kwargs,
+    ):
         """
         :param is_player: Required. True for the "Player", False for the "dealer".
         See Agent docstring for more details.
+        :param rng: Random number generator for any random choices. Seeded from the OS if not given.
+        :param rules: The game's rules, which decide the legal actions of the agent's vectorized policy
         """
         self._is_player = is_player
         self._trainable = trainable
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._rules = rules
+
+    @property
+    def is_player(self) -> bool:
+        return self._is_player
+
+    @property
+    def rules(self) -> Rules:
+        return self._rules
 
     @property
     def trainable(self) -> bool:
         """True/False if this agent can be trained"""
         return self._trainable
 
+    @property
+    def deterministic(self) -> bool:
+        """True if `pick_action` is a fixed function of the agent's hand total & softness, the dealer's upcard and
+        whether it is the first decision. Such agents are compiled to action tables (see blackjack.compiler)."""
+        return False
+
+    @property
+    def compile_key(self) -> Hashable | None:
+        """Key of this agent's decisions: agents with equal keys pick the same actions in every state, so they
+        share one compiled table (see blackjack.compiler). None if the agent has no such key."""
+        return None
+
     @abstractmethod
     def pick_action(self, game_state: GameState, *args, **kwargs):
         pass
 
+    def pick_actions(self, game_states: Sequence[GameState]) -> list[Action]:
+        """Pick an action for several hands at once (e.g. every seat this agent plays at a Table).
+        Agents which can decide in a batch more cheaply than one hand at a time override this."""
+        return [self.pick_action(game_state) for game_state in game_states]
+
+    def observe_round(self, game_state: GameState):
+        """Called with the final, fully revealed game state at the end of every round"""
+        return None
+
+    def policy(self) -> Policy | None:
+        """A vectorized equivalent of `pick_action` for the batch engine, or None if there isn't one."""
+        return None
+
     def train(self, game):
         if self._trainable:
             raise NotImplementedError("Agent is trainable but has no train method.")
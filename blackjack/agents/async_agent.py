@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+
+from blackjack.agents import Agent
+from blackjack.core import Action, GameState
+
+
+class AsyncAgent(Agent):
+    """
+    An agent which decides asynchronously (e.g. a remote player, see blackjack.server).
+    Subclasses implement `pick_action` as a coroutine, so waiting for a decision never blocks the event loop
+    other tables are playing on. Async agents can only play in an AsyncBlackjack game.
+    """
+
+    @abstractmethod
+    async def pick_action(self, game_state: GameState, *args, **kwargs) -> Action:
+        pass
+
+    async def observe_round(self, game_state: GameState):
+        """Called with the final, fully revealed game state at the end of every round"""
+        return None
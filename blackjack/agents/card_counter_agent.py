@@ -1,42 +1,150 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+
+from blackjack import probability, strategy
 from blackjack.agents import Agent
-from blackjack.core import Action, Card, GameState, CardValue
+from blackjack.core import Action, GameState, Rules, card_codes
+
+# Hi-Lo count of each card code: +1 for 2-6, 0 for 7-9, -1 for 10-value cards and Aces
+HI_LO = tuple(1 if value <= 6 else -1 if value >= 10 else 0 for value in card_codes.VALUES)
+# Hi-Lo count of each value of a shoe composition (see probability.shoe_composition)
+_COMPOSITION_HI_LO = tuple(1 if value <= 6 else -1 if value >= 10 else 0 for value in probability.VALUES)
+# True counts are clamped to [-MAX_COUNT, MAX_COUNT], with one deviation table per integer count
+MAX_COUNT = 5
+
+# Values removed from a shoe to raise/lower its count, in order (10-value cards are 4x as common as Aces)
+_LOW = (2, 3, 4, 5, 6)
+_HIGH = (10, 11, 10, 10, 10)
+
+
+def count_composition(decks: int, true_count: int) -> tuple[int, ...]:
+    """A typical composition of a shoe of N decks at a given Hi-Lo true count (see probability.shoe_composition)
+
+    Removes true_count low cards per deck (or high cards for a negative count), spread evenly across values.
+    """
+    composition = probability.shoe_composition(decks)
+    removed = _LOW if true_count > 0 else _HIGH
+    for i in range(abs(true_count) * decks):
+        composition = probability.remove(composition, removed[i % len(removed)])
+    return composition
+
+
+@lru_cache(maxsize=16)
+def deviation_tables(rules: Rules) -> tuple[np.ndarray, ...]:
+    """Strategy tables (see strategy.solve) for every true count, indexed by true count + MAX_COUNT.
+    Cached per rules, which give the number of decks in the shoe."""
+    return tuple(
+        strategy.solve(count_composition(rules.decks, count), rules=rules)
+        for count in range(-MAX_COUNT, MAX_COUNT + 1)
+    )
 
 
 class CardCounterAgent(Agent):
     """
-    Agent which keeps track of all seen cards to make a
-    probabilistic guess about possible successive hands.
+    Agent which keeps a Hi-Lo count of all seen cards, and plays the strategy table for the current true count.
+
+    The running count is updated once per visible card, and reset whenever the shoe is reshuffled. A shoe can be
+    reshuffled mid-round, with cards of the old shoe still in view, so for the rest of that round the count is taken
+    from the shoe's counts of unseen cards (see GameState.remaining), or only cards coming into view are counted if
+    the game doesn't show them. The deviation tables are solved once up front, so every decision is a table lookup.
     """
 
-    def __init__(self, is_player: bool, *args, num_decks: int = 1, **kwargs):
-        super(CardCounterAgent, self).__init__(is_player)
-        self._seen: set[Card] = set()
-        self._total_cards = 52 * num_decks
-        self._remaining = {value.name: 4 * num_decks for value in CardValue}
+    def __init__(self, is_player: bool, *args, decks: int = 1, rules: Rules | None = None, **kwargs):
+        """
+        :param decks: Number of decks in the shoe, if no rules are given
+        :param rules: The game's rules. Defaults to the standard rules with the given number of decks.
+        """
+        rules = rules if rules is not None else Rules(decks=decks)
+        super(CardCounterAgent, self).__init__(is_player, *args, rules=rules, **kwargs)
+        self._total_cards = card_codes.DECK_SIZE * rules.decks
+        self._full = probability.shoe_composition(rules.decks)
+        self._tables = deviation_tables(rules)
 
-    def _num_unseen(self) -> int:
-        """Count the number of cards still unseen"""
-        return self._total_cards - len(self._seen)
+        self._shuffles = 0
+        self._running = 0
+        self._seen = 0
+        # Cards already counted this round
+        self._player_seen = 0
+        self._dealer_seen = 0
+        self._hole_seen = False
+        # Whether the count is taken from the shoe's counts until the round ends (see CardCounterAgent._observe)
+        self._from_shoe = False
+
+    @property
+    def running_count(self) -> int:
+        return self._running
+
+    @property
+    def true_count(self) -> float:
+        """Running count per deck left in the shoe"""
+        decks_left = max(self._total_cards - self._seen, 1) / card_codes.DECK_SIZE
+        return self._running / decks_left
+
+    def _reset(self, shuffles: int):
+        self._shuffles = shuffles
+        self._running = 0
+        self._seen = 0
+
+    def _count(self, codes: bytes):
+        for code in codes:
+            self._running += HI_LO[code]
+        self._seen += len(codes)
+
+    def _count_shoe(self, remaining: memoryview):
+        """Count every card missing from the shoe"""
+        self._running = 0
+        for hi_lo, full, left in zip(_COMPOSITION_HI_LO, self._full, remaining):
+            self._running += hi_lo * (full - left)
+        self._seen = self._total_cards - sum(remaining)
+
+    def _observe(self, game_state: GameState):
+        """Count the cards which have come into view since the last observation"""
+        hand = game_state.hand.codes
+        dealer = game_state.dealer.codes
+        if game_state.shuffles != self._shuffles:
+            self._reset(game_state.shuffles)
+            self._from_shoe = game_state.remaining is not None
+            if not self._from_shoe and self._player_seen:
+                # Reshuffled since the last observation this round: the cards in view, and the face-down card dealt
+                # with them, may be from the old shoe
+                self._player_seen = len(hand)
+                self._dealer_seen = len(dealer) - (not game_state.hide_dealer)
+                self._hole_seen = True
+        if self._from_shoe:
+            self._count_shoe(game_state.remaining)
+            return
+
+        self._count(hand[self._player_seen:])
+        self._player_seen = len(hand)
+
+        # The visible dealer hand starts with the face-down card once it is revealed
+        if not game_state.hide_dealer:
+            if not self._hole_seen:
+                self._count(dealer[:1])
+                self._hole_seen = True
+            dealer = dealer[1:]
+        self._count(dealer[self._dealer_seen:])
+        self._dealer_seen = len(dealer)
 
     def pick_action(self, game_state: GameState, *args, **kwargs) -> Action:
-        actions = game_state.actions(self._is_player)
-        max_action: Action = ...
-
-        # Keep track of what cards have been seen so far
-        if len(game_state.dealer) == len(game_state.hand) == 2:  # First action this round
-            for card in [*game_state.dealer, *game_state.hand]:
-                self._seen.add(card)
-                self._remaining[card.value] = self._remaining[card.value] - 1
-        else:
-            for card in game_state.hand[2:]:
-                self._seen.add(card)
-                self._remaining[card.value] = self._remaining[card.value] - 1
-
-        for action in actions:
-            continue
-
-        return max_action
-
-    def _expected(self, game_state, action) -> float:
-        # TODO -- Compute probability of a hand with value <= 21
-        pass
\ No newline at end of file
+        self._observe(game_state)
+        count = min(max(round(self.true_count), -MAX_COUNT), MAX_COUNT)
+        table = self._tables[count + MAX_COUNT]
+
+        hand = game_state.agent_hand(self._is_player)
+        upcard = card_codes.VALUES[game_state.upcard.code]
+        action = Action.from_code(table[hand.value, int(hand.soft), upcard, int(len(hand) == 2)])
+
+        if game_state.legal_mask(self._is_player) & action.bit:
+            return action
+        return Action.STAND
+
+    def observe_round(self, game_state: GameState):
+        self._observe(game_state)
+        self._player_seen = 0
+        self._dealer_seen = 0
+        self._hole_seen = False
+        self._from_shoe = False
@@ -1,6 +1,9 @@
-from blackjack import utils
+from typing import Hashable
+
 from blackjack.agents import Agent
-from blackjack.core import Action, GameState
+from blackjack.core import Action, GameState, Rules
+from blackjack.core.rules import DEFAULT_RULES
+from blackjack.policy import TablePolicy
 
 
 class Dealer(Agent):
@@ -9,7 +12,8 @@ class Dealer(Agent):
     If the total is 17 or more, it must stand. If the total is 16 or under, they must take a card.
     The dealer must continue to take cards until the total is 17 or more, at which point the dealer must stand.
     If the dealer has an ace, and counting it as 11 would bring the total to 17 or more (but not over 21),
-    the dealer must count the ace as 11 and stand. The dealer's decisions, then, are automatic on all plays,
+    the dealer must count the ace as 11 and stand (unless the rules say the dealer hits a soft 17, see
+    Rules.hit_soft_17). The dealer's decisions, then, are automatic on all plays,
     whereas the player always has the option of taking one or more cards.
 
     Dealer Algorithm
@@ -30,14 +34,37 @@ class Dealer(Agent):
             return "Stand"
     """
 
+    def __init__(self, is_player: bool, *args, rules: Rules = DEFAULT_RULES, **kwargs):
+        """
+        :param rules: The game's rules. The dealer hits soft 17s if Rules.hit_soft_17 is set.
+        """
+        super(Dealer, self).__init__(is_player, *args, rules=rules, **kwargs)
+        self._hit_soft_17 = rules.hit_soft_17
+
+    @property
+    def deterministic(self) -> bool:
+        return True
+
+    @property
+    def compile_key(self) -> Hashable:
+        return type(self), self._is_player, self._hit_soft_17
+
+    def _stands(self, total: int, soft: bool) -> bool:
+        return total > 17 or total == 17 and not (soft and self._hit_soft_17)
+
     def pick_action(self, game_state: GameState, *args, **kwargs) -> Action:
         """Selects an action using casino rules."""
         act: Action = ...
         hand = game_state.agent_hand(self._is_player)
 
-        if utils.hand_value(hand) >= 17:
+        if self._stands(hand.value, hand.soft):
             act = Action.STAND
         else:
             act = Action.HIT
 
         return act
+
+    def policy(self) -> TablePolicy:
+        return TablePolicy.from_function(
+            lambda total, soft, upcard, first: Action.STAND if self._stands(total, soft) else Action.HIT
+        )
@@ -1,28 +1,96 @@
-import random
+from __future__ import annotations
+
+from os import PathLike
+from typing import Hashable, Sequence
+
+import numpy as np
 
-from blackjack import utils
 from blackjack.agents import Agent
-from blackjack.core import GameState, Action
+from blackjack.core import GameState, Action, card_codes
+from blackjack.policy import STATES, QPolicy, load_table, save_table, state_index
+
+# Legal action codes for each legal action bitmask (see GameState.legal_mask)
+_LEGAL_CODES = {
+    mask: np.array([action.code for action in Action if action.bit & mask], dtype=np.intp)
+    for mask in range(1 << len(Action))
+}
 
 
 class QLearningAgent(Agent):
+    """
+    Q-learning agent. Q-values are stored in a dense array indexed by
+    [state index (see policy.state_index), action code], so updates and greedy picks are array lookups.
+
+    A pretrained Q-table (see QLearningAgent.save) can be given instead of training. It is memory-mapped
+    read-only, and the agent plays greedily from it unless an epsilon is given.
+    """
+
+    # Shape & dtype of Q-tables
+    SHAPE = (STATES, len(Action))
+    DTYPE = np.float32
+
     def __init__(
         self,
         is_player: bool,
         *args,
-        alpha: float = 1.0,
-        epsilon: float = 0.05,
+        alpha: float = 0.1,
+        epsilon: float | None = None,
         gamma: float = 0.8,
         num_training: int = 10,
+        table: np.ndarray | str | PathLike | None = None,
         **kwargs
     ):
-        super().__init__(is_player, trainable=True, *args, **kwargs)
+        """
+        :param alpha: Learning rate
+        :param epsilon: Exploration rate. Defaults to 0.05, or 0 with a pretrained table.
+        :param table: Pretrained Q-table, or the path of a Q-table file. The agent is not trained if given.
+        """
+        super().__init__(is_player, trainable=table is None, *args, **kwargs)
         self._alpha = alpha
-        self._epsilon = epsilon
+        self._epsilon = epsilon if epsilon is not None else 0.05 if table is None else 0.0
         self._gamma = gamma
         self._num_training = num_training
 
-        self._states = dict()  # Dict of {(hand_value, action): reward)
+        if table is None:
+            table = np.zeros(self.SHAPE, dtype=self.DTYPE)
+        elif not isinstance(table, np.ndarray):
+            table = load_table(table, self.SHAPE, self.DTYPE)
+        self._q = table
+
+    @property
+    def alpha(self) -> float:
+        return self._alpha
+
+    @property
+    def epsilon(self) -> float:
+        return self._epsilon
+
+    @property
+    def deterministic(self) -> bool:
+        """Greedy agents are, as long as they aren't being trained"""
+        return self._epsilon == 0
+
+    @property
+    def compile_key(self) -> Hashable | None:
+        """The Q-values decide the actions of a greedy agent only"""
+        return (type(self), self._is_player, self._q.tobytes()) if self.deterministic else None
+
+    @property
+    def gamma(self) -> float:
+        return self._gamma
+
+    @property
+    def q_values(self) -> np.ndarray:
+        """Q-values indexed by [state index (see policy.state_index), action code]"""
+        return self._q
+
+    def save(self, path: str | PathLike):
+        """Save the Q-table to disk"""
+        save_table(path, self._q)
+
+    def _state(self, game_state: GameState) -> int:
+        hand = game_state.agent_hand(self._is_player)
+        return state_index(hand.value, int(hand.soft), card_codes.VALUES[game_state.upcard.code])
 
     def observe_transition(
         self,
@@ -30,30 +98,34 @@ class QLearningAgent(Agent):
         action: Action,
         next_state: GameState,
         delta_reward: float,
+        done: bool = False,
     ):
-        legal_actions = state.actions(self._is_player)
-        hand_value = utils.hand_value(state.hand)
-        max_next_action = max([self._states.get((hand_value, a), float('-inf')) for a in legal_actions])
-        val_current = self._states.get((hand_value, action), 0)
+        """Q-learning update. No future value is bootstrapped once the hand is over (done)."""
+        target = delta_reward
+        if not done:
+            codes = _LEGAL_CODES[next_state.legal_mask(self._is_player)]
+            target += self._gamma * self._q[self._state(next_state), codes].max()
 
-        self._states[(hand_value, action)] = val_current + self._alpha*(delta_reward + self._gamma*max_next_action - val_current)
+        q = self._q[self._state(state)]
+        q[action.code] += self._alpha * (target - q[action.code])
 
     def pick_action(self, game_state: GameState, *args, **kwargs):
-        max_action_val = float('-inf')
-        max_action = None
-        state = utils.hand_value(game_state.hand)
-        actions = game_state.actions(self._is_player)
-        if random.random() < self._epsilon:
-            return random.choice(actions)
-        else:
-            for action in actions:
-                qval = self._states.get((state, action))
-                if qval is None:
-                    self._states[(state, action)] = 0
-                else:
-                    max_action, max_action_val = max([(max_action, max_action_val), (action, qval)], key=lambda t: t[1])
-
-            # No action got chosen for some reason
-            if max_action is None:
-                max_action = random.choice(actions)
-            return max_action
\ No newline at end of file
+        mask = game_state.legal_mask(self._is_player)
+        codes = _LEGAL_CODES[mask]
+        if self._rng.random() < self._epsilon:
+            return Action.from_code(codes[int(self._rng.random() * len(codes))])
+        return Action.from_code(codes[self._q[self._state(game_state), codes].argmax()])
+
+    def pick_actions(self, game_states: Sequence[GameState]) -> list[Action]:
+        """Epsilon-greedy picks for several hands with one vectorized Q-table lookup"""
+        n = len(game_states)
+        hands = [game_state.agent_hand(self._is_player) for game_state in game_states]
+        total = np.fromiter((hand.value for hand in hands), dtype=np.intp, count=n)
+        soft = np.fromiter((hand.soft for hand in hands), dtype=np.intp, count=n)
+        upcard = np.fromiter((card_codes.VALUES[state.upcard.code] for state in game_states), dtype=np.intp, count=n)
+        first = np.fromiter((len(hand) == 2 for hand in hands), dtype=bool, count=n)
+        codes = self.policy()(total, soft, upcard, first, self._is_player, self._rng)
+        return [Action.from_code(code) for code in codes.tolist()]
+
+    def policy(self) -> QPolicy:
+        return QPolicy(self._q, self._epsilon, self._rules)
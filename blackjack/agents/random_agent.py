@@ -1,7 +1,6 @@
-import random
-
 from blackjack.agents import Agent
 from blackjack.core import GameState
+from blackjack.policy import RandomPolicy
 
 
 class RandomAgent(Agent):
@@ -11,4 +10,7 @@ class RandomAgent(Agent):
 
     def pick_action(self, game_state: GameState, *args, **kwargs):
         actions = game_state.actions(is_player=self._is_player)
-        return random.choice(actions)
+        return actions[int(self._rng.random() * len(actions))]
+
+    def policy(self) -> RandomPolicy:
+        return RandomPolicy(self._rules)
@@ -1,5 +1,8 @@
+from typing import Hashable
+
 from blackjack.agents import Agent
 from blackjack.core import GameState, Action
+from blackjack.policy import TablePolicy
 
 
 class SingleActionAgent(Agent):
@@ -8,13 +11,37 @@ class SingleActionAgent(Agent):
     """
 
     def __init__(self, is_player: bool, action: Action, *args, **kwargs):
-        super(SingleActionAgent, self).__init__(is_player)
+        super(SingleActionAgent, self).__init__(is_player, *args, **kwargs)
         self._action = action
 
+    @property
+    def action(self) -> Action:
+        """The action this agent always tries to pick"""
+        return self._action
+
+    @property
+    def deterministic(self) -> bool:
+        return True
+
+    @property
+    def compile_key(self) -> Hashable:
+        return type(self), self._is_player, self._action
+
     def pick_action(self, game_state: GameState, *args, **kwargs):
         """Returns SingleActionAgent.action if allowed, otherwise Stands"""
-        legal_actions = game_state.actions(self._is_player)
-
-        if self._action in legal_actions:
+        if game_state.legal_mask(self._is_player) & self._action.bit:
             return self._action
         return Action.STAND
+
+    def policy(self) -> TablePolicy:
+        def pick(total, soft, upcard, first):
+            match self._action:
+                case Action.HIT | Action.STAND:
+                    return self._action
+                case Action.DOUBLE_DOWN if first and self._rules.can_double(total, soft):
+                    return self._action
+                case Action.SURRENDER if self._is_player and self._rules.surrender:
+                    return self._action
+            return Action.STAND
+
+        return TablePolicy.from_function(pick)
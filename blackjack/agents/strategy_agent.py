@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from os import PathLike
+from typing import Hashable
+
+import numpy as np
+
+from blackjack import strategy
+from blackjack.agents import Agent
+from blackjack.core import Action, GameState, Rules, card_codes
+from blackjack.core.rules import DEFAULT_RULES
+from blackjack.policy import TablePolicy, legal_actions
+
+
+class StrategyAgent(Agent):
+    """
+    An agent which plays from a strategy table (see blackjack.strategy). Every decision is a single table lookup.
+
+    Uses the EV-maximizing table for an infinite shoe and the game's rules, unless another table (or table file)
+    is given.
+    Illegal actions from the table fall back to Stand.
+    """
+
+    def __init__(
+        self,
+        is_player: bool,
+        *args,
+        table: np.ndarray | str | PathLike | None = None,
+        rules: Rules = DEFAULT_RULES,
+        **kwargs,
+    ):
+        """
+        :param table: Strategy table, or table file (see strategy.save)
+        :param rules: The game's rules, which the default table is solved for
+        """
+        super(StrategyAgent, self).__init__(is_player, *args, rules=rules, **kwargs)
+        if table is None:
+            table = strategy.solve(rules=rules)
+        elif not isinstance(table, np.ndarray):
+            table = strategy.load(table)
+        self._policy = TablePolicy(table)
+        self._table = self._policy.table
+        # The vectorized policy stands wherever the table's action isn't legal, as pick_action does
+        legal = np.take_along_axis(legal_actions(rules)[int(is_player)], self._table[..., None], axis=-1)[..., 0]
+        if not legal.all():
+            self._policy = TablePolicy(np.where(legal, self._table, Action.STAND.code))
+
+    @property
+    def deterministic(self) -> bool:
+        return True
+
+    @property
+    def compile_key(self) -> Hashable:
+        return type(self), self._is_player, self._table.tobytes()
+
+    def pick_action(self, game_state: GameState, *args, **kwargs) -> Action:
+        hand = game_state.agent_hand(self._is_player)
+        upcard = card_codes.VALUES[game_state.upcard.code]
+        action = Action.from_code(self._table[hand.value, int(hand.soft), upcard, int(len(hand) == 2)])
+
+        if game_state.legal_mask(self._is_player) & action.bit:
+            return action
+        return Action.STAND
+
+    def policy(self) -> TablePolicy:
+        return self._policy
@@ -0,0 +1,286 @@
+"""
+Batch simulation engine. Plays thousands of independent blackjack tables at once on integer card arrays.
+"""
+from __future__ import annotations
+
+from os import PathLike
+
+import numpy as np
+
+from blackjack import utils
+from blackjack.agents import Agent
+from blackjack.blackjack import Blackjack
+from blackjack.core import Action, Rules, card_codes
+from blackjack.core.rules import SURRENDER_SCORE
+from blackjack.policy import Policy, DOUBLE_DOWN, HIT, SPLIT, SURRENDER, legal_actions, state_index
+from blackjack.stats import HandStats
+
+# A single 52 card deck of card codes (see blackjack.core.card_codes)
+DECK = np.arange(card_codes.DECK_SIZE, dtype=np.uint8)
+VALUES = np.frombuffer(card_codes.VALUES, dtype=np.uint8)
+HARD_VALUES = np.frombuffer(card_codes.HARD_VALUES, dtype=np.uint8)
+ALL = slice(None)
+
+
+class _Hands:
+    """Hard totals, Ace flags and card counts for one hand per table"""
+
+    def __init__(self, tables: int):
+        self.hard = np.zeros(tables, dtype=np.int16)
+        self.aces = np.zeros(tables, dtype=bool)
+        self.cards = np.zeros(tables, dtype=np.int8)
+
+    def add(self, lanes: np.ndarray | slice, codes: np.ndarray):
+        cards = HARD_VALUES[codes]
+        self.hard[lanes] += cards
+        self.aces[lanes] |= cards == 1
+        self.cards[lanes] += 1
+
+    def reset(self, lanes: np.ndarray | slice = ALL):
+        """Empty the hands at the given tables"""
+        self.hard[lanes] = 0
+        self.aces[lanes] = False
+        self.cards[lanes] = 0
+
+    def totals(self, lanes: np.ndarray | slice = ALL) -> tuple[np.ndarray, np.ndarray]:
+        """Hand values (see utils.hand_value) and softness of the given tables"""
+        hard = self.hard[lanes]
+        soft = self.aces[lanes] & (hard <= utils.BLACKJACK - 10)
+        return hard + 10 * soft, soft
+
+
+class BatchBlackjack:
+    """
+    Plays many independent tables of blackjack in lockstep.
+
+    Each table deals card codes from its own shoe, reshuffled at the cut card like `Blackjack`'s,
+    and is scored exactly like `Blackjack._score_hands`.
+    Agents must provide a vectorized policy (see `Agent.policy`), and trainable agents a pretrained table.
+    Policies must pick legal actions under the tables' rules (see policy.legal_actions), or ValueError is raised.
+    """
+
+    def __init__(
+        self,
+        *,
+        player: str | Agent | Policy = "casino",
+        dealer: str | Agent | Policy = "casino",
+        tables: int = 10_000,
+        decks: int = 1,
+        penetration: float = 1.0,
+        rules: Rules | None = None,
+        seed: int | np.random.SeedSequence | np.random.Generator | None = None,
+        table: str | PathLike | None = None,
+    ):
+        """
+        :param player: Agent type (see Blackjack.agent_types), agent or policy for the player
+        :param dealer: Agent type (see Blackjack.agent_types), agent or policy for the dealer
+        :param tables: Number of tables played at once
+        :param decks: Number of decks in each table's shoe, if no rules are given
+        :param penetration: Fraction of each shoe dealt before it is reshuffled (between rounds), if no rules are given
+        :param rules: The tables' rules (see Rules). Defaults to the standard rules with the given decks & penetration.
+        :param seed: Seed (or generator) for the shuffles and random policies
+        :param table: Pretrained table file for the player, if given by agent type (see Blackjack)
+        """
+        self._rng = np.random.default_rng(seed)
+        self._tables = tables
+        self._rules = rules = rules if rules is not None else Rules(decks=decks, penetration=penetration)
+        self._player = self._policy(
+            player, is_player=True, decks=rules.decks, rules=rules, **({"table": table} if table is not None else {})
+        )
+        self._dealer = self._policy(dealer, is_player=False, decks=rules.decks, rules=rules)
+        self._legal_actions = legal_actions(rules).reshape(2, -1, len(Action))
+        self._score = np.zeros(tables)
+
+        self._shoe_size = len(DECK) * rules.decks
+        self._cut = max(1, int(self._shoe_size * rules.penetration))
+        self._decks = self._shuffled(np.tile(DECK, (tables, rules.decks)))
+        self._pos = np.zeros(tables, dtype=np.intp)
+        self._lanes = np.arange(tables)
+
+    @staticmethod
+    def _policy(agent: str | Agent | Policy, is_player: bool, **kwargs) -> Policy:
+        if isinstance(agent, Policy):
+            return agent
+        if isinstance(agent, str):
+            agent = Blackjack.create_agent(agent, is_player=is_player, **kwargs)
+
+        if agent.trainable:
+            # The batch engine doesn't train agents, an untrained one would play its initial (all zero) table
+            raise ValueError(f"{type(agent).__name__} is untrained, give it a pretrained table")
+        policy = agent.policy()
+        if policy is None:
+            raise ValueError(f"{type(agent).__name__} has no vectorized policy")
+        return policy
+
+    @property
+    def tables(self) -> int:
+        """Number of tables played at once"""
+        return self._tables
+
+    @property
+    def score(self) -> np.ndarray:
+        """Per-table score of the most recently completed game"""
+        return self._score
+
+    @property
+    def rules(self) -> Rules:
+        return self._rules
+
+    def play(self, rounds: int = 10, stats: HandStats | None = None) -> np.ndarray:
+        """Play N hands of blackjack at every table.
+
+        :param rounds: Fixed # of rounds to play
+        :param stats: Accumulator to record every hand in
+        :return: each table's final score
+        """
+        self._score = np.zeros(self._tables)
+        for _ in range(rounds):
+            self._score += self._next_round(stats)
+        return self._score
+
+    def _draw(self, lanes: np.ndarray | slice) -> np.ndarray:
+        """Deal the next card at each of the given tables, reshuffling any deck that runs out"""
+        rows = self._lanes[lanes]
+        pos = self._pos[rows]
+        cards = self._decks.ravel().take(rows * self._shoe_size + pos)
+        pos += 1
+        self._pos[rows] = pos
+
+        empty = rows[pos == self._shoe_size]
+        if len(empty):
+            self._reshuffle(empty)
+        return cards
+
+    def _reshuffle(self, rows: np.ndarray):
+        self._decks[rows] = self._shuffled(self._decks[rows])
+        self._pos[rows] = 0
+
+    def _shuffled(self, decks: np.ndarray) -> np.ndarray:
+        """Independently shuffle each row of decks"""
+        order = self._rng.random(decks.shape).argsort(axis=1)
+        return np.take_along_axis(decks, order, axis=1)
+
+    def _turn(
+        self,
+        hands: _Hands,
+        policy: Policy,
+        is_player: bool,
+        lanes: np.ndarray,
+        upcard: np.ndarray,
+        multiplier: np.ndarray,
+        surrender: np.ndarray,
+    ):
+        """Let one seat act at every given table until it stands or reaches 21"""
+        while len(lanes):
+            total, soft = hands.totals(lanes)
+            first = hands.cards[lanes] == 2
+            actions = policy(total, soft, upcard[lanes], first, is_player, self._rng)
+            if (actions == SPLIT).any():
+                raise ValueError("Invalid action: ", Action.SPLIT)
+            if not self._rules.full_actions:
+                # Policies built for these rules only pick legal actions, others may not
+                legal = self._legal(is_player, total, soft, upcard[lanes], first, actions)
+                if not legal.all():
+                    raise ValueError("Invalid action: ", Action.from_code(int(actions[~legal][0])))
+            self._decided(is_player, lanes, total, soft, upcard[lanes], first, actions)
+
+            surrender[lanes[actions == SURRENDER]] = True
+            multiplier[lanes[actions == DOUBLE_DOWN]] = 2
+
+            lanes = lanes[(actions == HIT) | (actions == DOUBLE_DOWN)]
+            hands.add(lanes, self._draw(lanes))
+            lanes = lanes[hands.totals(lanes)[0] < utils.BLACKJACK]
+
+    def _legal(
+        self,
+        is_player: bool,
+        total: np.ndarray,
+        soft: np.ndarray,
+        upcard: np.ndarray,
+        first: np.ndarray,
+        actions: np.ndarray,
+    ) -> np.ndarray:
+        """True for the actions the rules allow (see policy.legal_actions)"""
+        return self._legal_actions[int(is_player), state_index(total, soft, upcard) * 2 + first, actions]
+
+    def _decided(
+        self,
+        is_player: bool,
+        lanes: np.ndarray,
+        total: np.ndarray,
+        soft: np.ndarray,
+        upcard: np.ndarray,
+        first: np.ndarray,
+        actions: np.ndarray,
+    ):
+        """Called with every batch of decisions, before they are played. Does nothing by default."""
+
+    def _deal(self, dealer: _Hands, player: _Hands, lanes: np.ndarray | slice = ALL) -> np.ndarray:
+        """Start a round at the given tables, returning the value of each dealer's upcard"""
+        # Reshuffle the shoes which reached the cut card
+        rows = self._lanes[lanes]
+        cut = rows[self._pos[rows] >= self._cut]
+        if len(cut):
+            self._reshuffle(cut)
+
+        # Deal 2 cards to dealer & player, alternating. The dealer's second card is face up.
+        dealer.add(lanes, self._draw(lanes))
+        player.add(lanes, self._draw(lanes))
+        upcard = self._draw(lanes)
+        dealer.add(lanes, upcard)
+        player.add(lanes, self._draw(lanes))
+        return VALUES[upcard]
+
+    def _next_round(self, stats: HandStats | None = None) -> np.ndarray:
+        """Play one round at every table, returning the per-table scores"""
+        dealer, player = _Hands(self._tables), _Hands(self._tables)
+        multiplier = np.ones(self._tables)
+        surrender = np.zeros(self._tables, dtype=bool)
+
+        upcard = self._deal(dealer, player)
+
+        player_sum = player.totals()[0]
+        self._turn(
+            player, self._player, True,
+            np.flatnonzero(player_sum < utils.BLACKJACK), upcard, multiplier, surrender,
+        )
+
+        # If player did not "Bust", then the dealer plays
+        player_sum = player.totals()[0]
+        dealer_sum = dealer.totals()[0]
+        self._turn(
+            dealer, self._dealer, False,
+            np.flatnonzero((player_sum <= utils.BLACKJACK) & (dealer_sum < utils.BLACKJACK)),
+            upcard, multiplier, surrender,
+        )
+        dealer_sum = dealer.totals()[0]
+
+        score = self._score_hands(player, player_sum, dealer_sum, multiplier, surrender)
+        if stats is not None:
+            stats.add_batch(score, (player.cards == 2) & (player_sum == utils.BLACKJACK), surrender)
+        return score
+
+    def _score_hands(
+        self,
+        player: _Hands,
+        player_sum: np.ndarray,
+        dealer_sum: np.ndarray,
+        multiplier: np.ndarray,
+        surrender: np.ndarray,
+    ) -> np.ndarray:
+        """Vectorized Blackjack._score_hands"""
+        player_bust = player_sum > utils.BLACKJACK
+        dealer_bust = dealer_sum > utils.BLACKJACK
+        neither = ~player_bust & ~dealer_bust
+        blackjack = (player.cards == 2) & (player_sum == utils.BLACKJACK)
+
+        score = np.zeros(len(player_sum))
+        score[neither & (player_sum < dealer_sum)] = -1
+        score[neither & (player_sum > dealer_sum)] = 1
+        score[neither & (player_sum > dealer_sum) & blackjack] = self._rules.blackjack_payout
+        score[player_bust & ~dealer_bust] = -1
+        score[~player_bust & dealer_bust] = 1
+
+        score *= multiplier
+        score[surrender] = SURRENDER_SCORE
+        return score
@@ -0,0 +1,194 @@
+"""
+Benchmarks of the engine's hot paths.
+
+Each benchmark reports the best throughput (operations per second) over several repeats. Results are saved as
+JSON, and can be compared against a stored baseline to flag regressions:
+
+    python -m blackjack.benchmark run -o baseline.json
+    ... change the code ...
+    python -m blackjack.benchmark compare baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime, timezone
+from os import PathLike
+from typing import Callable
+
+import numpy as np
+
+from blackjack import BatchBlackjack, Blackjack, training, utils
+from blackjack.agents import Dealer
+from blackjack.agents.qlearning_agent import QLearningAgent
+from blackjack.core import Card, CardValue, Shoe, StandardDeck, Suit
+
+SEED = 0
+# Throughput drops larger than this are flagged by `compare`
+THRESHOLD = 0.10
+
+
+def _hand_value() -> tuple[Callable, int]:
+    hand = [Card(CardValue.ACE, Suit.SPADES), Card(CardValue.SIX, Suit.HEARTS), Card(CardValue.NINE, Suit.CLUBS)]
+    return lambda: utils.hand_value(hand), 1
+
+
+def _deck_shuffle() -> tuple[Callable, int]:
+    deck = StandardDeck(rng=np.random.default_rng(SEED))
+    return deck.shuffle, 1
+
+
+def _shoe_draw() -> tuple[Callable, int]:
+    shoe = Shoe(decks=6, rng=np.random.default_rng(SEED))
+    draw = shoe.draw
+
+    def run():
+        for _ in range(100):
+            draw()
+
+    return run, 100
+
+
+def _game(player: str = "basic", **kwargs) -> Blackjack:
+    return Blackjack(player=player, dealer="casino", verbose=False, seed=SEED, **kwargs)
+
+
+def _state() -> tuple[Callable, int]:
+    game = _game()
+    game._init_hands()
+    return game.state, 1
+
+
+def _dealer_pick_action() -> tuple[Callable, int]:
+    dealer = Dealer(is_player=False, rng=np.random.default_rng(SEED))
+    state = _state()[0]()
+    return lambda: dealer.pick_action(state), 1
+
+
+def _next_round() -> tuple[Callable, int]:
+    game = _game()
+
+    def run():
+        game._reset_hand()
+        game._next_round()
+
+    return run, 1
+
+
+def _train() -> tuple[Callable, int]:
+    game = _game("q", train_rounds=0)
+    game._train_rounds = 100
+    return lambda: game._train(game.player), 100
+
+
+def _batch_round() -> tuple[Callable, int]:
+    game = BatchBlackjack(player="basic", tables=10_000, seed=SEED)
+    return game._next_round, game.tables
+
+
+def _batch_train() -> tuple[Callable, int]:
+    agent = QLearningAgent(True, rng=np.random.default_rng(SEED))
+    return lambda: training.train(agent, 100_000, tables=10_000, seed=SEED), 100_000
+
+
+# Benchmark name -> setup function, returning (function to time, operations per call)
+BENCHMARKS: dict[str, Callable[[], tuple[Callable, int]]] = {
+    "utils.hand_value": _hand_value,
+    "StandardDeck.shuffle": _deck_shuffle,
+    "Shoe.draw": _shoe_draw,
+    "Blackjack.state": _state,
+    "Dealer.pick_action": _dealer_pick_action,
+    "Blackjack._next_round": _next_round,
+    "Blackjack._train": _train,
+    "BatchBlackjack._next_round": _batch_round,
+    "training.train": _batch_train,
+}
+
+
+def run(names: list[str] | None = None, repeat: int = 5) -> dict:
+    """Run the benchmarks (all of them by default), returning the results as a JSON-compatible dict"""
+    results = {}
+    for name in names or BENCHMARKS:
+        fn, ops = BENCHMARKS[name]()
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=repeat, number=number)) / number
+        results[name] = {"ops_per_sec": ops / best, "ns_per_op": best / ops * 1e9, "number": number, "repeat": repeat}
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list[str]:
+    """Print the change in throughput of each benchmark, returning the names of the ones which regressed"""
+    regressions = []
+    print(f"{'Benchmark':<28} {'Baseline ops/s':>15} {'Current ops/s':>15} {'Change':>8}")
+    for name, result in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        before = baseline["benchmarks"][name]["ops_per_sec"]
+        after = result["ops_per_sec"]
+        change = after / before - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28} {before:>15,.0f} {after:>15,.0f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def save(results: dict, path: str | PathLike):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path: str | PathLike) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.benchmark",
+        description="Benchmark the engine's hot paths, and compare the results against a baseline.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--output", "-o", type=str, default=None, help="File to save the results to (.json)")
+
+    compare_parser = commands.add_parser("compare", help="Compare results against a baseline, flagging regressions")
+    compare_parser.add_argument("baseline", type=str, help="Baseline results (.json)")
+    compare_parser.add_argument(
+        "current", type=str, nargs="?", default=None, help="Results to compare. Runs the benchmarks if not given."
+    )
+    compare_parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD, help="Flag throughput drops larger than this fraction"
+    )
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=None, help="Benchmarks to run")
+        sub.add_argument("--repeat", type=int, default=5, help="Number of timed repeats per benchmark")
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    args = _parse()
+    if args["command"] == "run":
+        results = run(args["only"], args["repeat"])
+        if args["output"]:
+            save(results, args["output"])
+        print(json.dumps(results, indent=2))
+    else:
+        current = load(args["current"]) if args["current"] else run(args["only"], args["repeat"])
+        if compare(load(args["baseline"]), current, args["threshold"]):
+            sys.exit(1)
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 from functools import partial
-from typing import Callable, Iterator
+from os import PathLike
+from typing import Any, Awaitable, Callable, Generator
 
-from blackjack import utils
-from blackjack.agents import Agent, Dealer, RandomAgent, UserAgent, SingleActionAgent
+import numpy as np
+
+from blackjack import compiler, utils
+from blackjack.agents import Agent, Dealer, RandomAgent, UserAgent, SingleActionAgent, StrategyAgent, CardCounterAgent
 from blackjack.agents.qlearning_agent import QLearningAgent
-from blackjack.core import Action, Card, GameState, StandardDeck
+from blackjack.core import Action, GameState, Hand, Rules, Shoe, card_codes
+from blackjack.core.rules import SURRENDER_SCORE
+from blackjack.history import HandRecorder
+from blackjack.profiling import Profiler
+from blackjack.stats import HandStats
 
 
 class Blackjack:
@@ -21,6 +28,8 @@ class Blackjack:
         "hit": partial(SingleActionAgent, action=Action.HIT),
         "stand": partial(SingleActionAgent, action=Action.STAND),
         "q": QLearningAgent,
+        "basic": StrategyAgent,
+        "counter": CardCounterAgent,
     }
     __DEFAULT_PLAYER = "user"
     __DEFAULT_DEALER = "casino"
@@ -35,17 +44,66 @@ class Blackjack:
         """Gets the appropriate agent type"""
         return cls.__AGENTS.get(a, cls.__AGENTS[default])
 
+    @classmethod
+    def agent_type(cls, a: str) -> Callable[..., Agent]:
+        """Gets the agent class (or partial) of a CLI name (see Blackjack.agent_types), e.g. to inspect its settings"""
+        if a not in cls.__AGENTS:
+            raise ValueError(f"Unknown agent {a!r}, expected one of {', '.join(cls.__AGENTS)}")
+        return cls.__AGENTS[a]
+
+    @classmethod
+    def create_agent(cls, a: str, *, is_player: bool, **kwargs) -> Agent:
+        """Creates an agent by its CLI name (see Blackjack.agent_types)"""
+        default = cls.__DEFAULT_PLAYER if is_player else cls.__DEFAULT_DEALER
+        return cls.__agent(a, default=default)(is_player=is_player, **kwargs)
+
     def __init__(
         self,
         *,
-        player: str = None,
-        dealer: str = None,
+        player: str | Agent = None,
+        dealer: str | Agent = None,
         verbose: bool = True,
         train_rounds: int = 10_000,
+        train_tables: int = 0,
+        table: str | PathLike | None = None,
+        decks: int = 1,
+        penetration: float = 1.0,
+        rules: Rules | None = None,
+        seed: int | np.random.SeedSequence | np.random.Generator | None = None,
+        profiler: Profiler | None = None,
+        recorder: HandRecorder | None = None,
+        shoe: Shoe | None = None,
+        compiled: bool = True,
         **kwargs,
     ):
-        # TODO -- Docstring
-        self._deck = self._make_endless_deck(StandardDeck())
+        """
+        :param player: Agent type for the player (see Blackjack.agent_types), or an agent
+        :param dealer: Agent type for the dealer (see Blackjack.agent_types), or an agent
+        :param verbose: Print the game state after every round
+        :param train_rounds: Number of rounds to train the player for, if it is trainable
+        :param train_tables: If set, train on this many tables in lockstep (see blackjack.training)
+                             instead of one table at a time
+        :param table: Pretrained table file for the player (q or basic agents, see QLearningAgent.save and
+                      strategy.save). The table is memory-mapped read-only, and the player is not trained.
+        :param decks: Number of decks in the shoe, if no rules are given
+        :param penetration: Fraction of the shoe dealt before it is reshuffled (between rounds), if no rules are given
+        :param rules: The table's rules (see Rules). Defaults to the standard rules with the given decks & penetration.
+        :param seed: Seed (or generator) for the game's random number generator. The deck and both agents get
+                     independent child streams spawned from it, so a seeded game is fully reproducible.
+        :param profiler: Time each phase of the game (and of training) with this profiler. Off by default.
+        :param recorder: Record every hand played (after training) to a hand history. Off by default.
+        :param shoe: Shoe to deal from instead of a new shuffled one (e.g. recorded cards, see blackjack.replay)
+        :param compiled: Compile deterministic agents to action tables (see blackjack.compiler), so their
+                         decisions are table lookups. Other agents are always called as usual.
+        """
+        self._rng = np.random.default_rng(seed)
+        deck_rng, dealer_rng, player_rng = self._rng.spawn(3)
+
+        self._rules = rules = rules if rules is not None else Rules(decks=decks, penetration=penetration)
+        if shoe is None:
+            shoe = Shoe(decks=rules.decks, penetration=rules.penetration, rng=deck_rng)
+        self._shoe = shoe
+        self._remaining = self._shoe.remaining
         self._score = 0
         self._verbose = verbose
         self._train_rounds = train_rounds
@@ -57,99 +115,156 @@ class Blackjack:
         self._multiplier = 1.0  # Score multiplier for doubling down, surrendering
 
         # Dealer Vars
-        self._dealer = self.__agent(dealer, default=self.__DEFAULT_DEALER)(
-            is_player=False
-        )
-        self._dealer_hand = []
+        if not isinstance(dealer, Agent):
+            dealer = self.__agent(dealer, default=self.__DEFAULT_DEALER)(
+                is_player=False, rng=dealer_rng, decks=rules.decks, rules=rules
+            )
+        self._dealer = dealer
+        self._dealer_hand = Hand()
 
         # Player vars
-        self._player = self.__agent(player, default=self.__DEFAULT_PLAYER)(
-            is_player=True
-        )
-        self._player_hand = []
-        if self._player.trainable:
+        if not isinstance(player, Agent):
+            player = self.__agent(player, default=self.__DEFAULT_PLAYER)(
+                is_player=True,
+                rng=player_rng,
+                decks=rules.decks,
+                rules=rules,
+                **({"table": table} if table is not None else {}),
+            )
+        self._player = player
+        self._player_hand = Hand()
+
+        # Flat action tables of the compiled agents, None for agents which are called (see Blackjack._pick_action)
+        self._player_table = self._dealer_table = None
+        if profiler is not None:
+            profiler.attach(self, self._player, self._dealer)
+
+        if self._player.trainable and train_tables > 0:
+            # Imported here, the training engine is built on BatchBlackjack which imports this module
+            from blackjack import training
+
+            training.train(
+                self._player,
+                self._train_rounds,
+                tables=train_tables,
+                rules=rules,
+                seed=self._rng.spawn(1)[0],
+            )
+        elif self._player.trainable:
             self._train(self._player)
 
-        print(self._player._states)
+        if compiled:
+            self._player_table = self._compile(self._player)
+            self._dealer_table = self._compile(self._dealer)
+        if recorder is not None:
+            recorder.attach(self)
 
+    def _compile(self, agent: Agent) -> np.ndarray | None:
+        policy = compiler.compile_agent(agent, self._rules)
+        return policy.table.ravel() if policy is not None else None
 
+    def _pick_action(self, is_player: bool) -> Action:
+        """The next action of the player or dealer: a table lookup for compiled agents, a pick_action call otherwise"""
+        table = self._player_table if is_player else self._dealer_table
+        if table is None:
+            return (self._player if is_player else self._dealer).pick_action(self.state())
+        hand = self._player_hand if is_player else self._dealer_hand
+        return compiler.action(table, hand, card_codes.VALUES[self._dealer_hand.codes[1]])
 
     def _train(self, player):
+        """Train the player one round at a time. Every decision is rewarded 0, except the last decision of the
+        round which is rewarded the round's score, the same targets as the batched trainer (see blackjack.training)"""
         for _ in range(self._train_rounds):
             self._init_hands()
+            transitions = []
             stand = False
-            while not stand and utils.hand_value(self._player_hand) < utils.BLACKJACK:
+            while not stand and self._player_hand.value < utils.BLACKJACK:
                 state = self.state()
                 action = self._player.pick_action(state)
                 stand = self._act_or_stand(self._player_hand, action)
-                next_state = self.state()
-                self._player.observe_transition(state, action, next_state, 21 - utils.hand_value(self._player_hand))
-
-            stand = False
-            self._hide_dealer = False
-            if utils.hand_value(self._player_hand) <= utils.BLACKJACK:
-                #   Until dealer stands or busts:
-                while not stand and utils.hand_value(self._dealer_hand) < utils.BLACKJACK:
-                    # Let dealer choose legal move
-                    action = self._dealer.pick_action(self.state())
-                    stand = self._act_or_stand(self._dealer_hand, action)
+                transitions.append((state, action, self.state()))
+
+            self._dealer_turn()
+            self._end_round()
+            score = self._score_hands()
+            for k, (state, action, next_state) in enumerate(transitions, start=1):
+                done = k == len(transitions)
+                self._player.observe_transition(state, action, next_state, score if done else 0, done)
             self._reset_hand()
 
 
     def _reset_hand(self):
-        """Reset between rounds"""
+        """Reset between rounds, reshuffling the shoe once the cut card is reached"""
+        if self._shoe.needs_shuffle:
+            self._shoe.shuffle()
         self._hide_dealer = True
         self._multiplier = 1.0
         self._surrender = False
         self._split_hands = False
-        self._dealer_hand = []
-        self._player_hand = []
+        self._dealer_hand = Hand()
+        self._player_hand = Hand()
 
     @property
     def score(self) -> int:
         """Score of the most recently completed/running game"""
         return self._score
 
+    @property
+    def player(self) -> Agent:
+        return self._player
+
+    @property
+    def shoe(self) -> Shoe:
+        return self._shoe
+
+    @property
+    def rules(self) -> Rules:
+        return self._rules
+
     def _init_hands(self) -> None:
         for x in range(4):
             if x % 2 == 0:
-                self._dealer_hand.append(next(self._deck))
+                # The dealer's first card is dealt face down
+                self._dealer_hand.append(self._shoe.draw(face_up=x > 0))
             else:
-                self._player_hand.append(next(self._deck))
-
-    @staticmethod
-    def _make_endless_deck(d: StandardDeck) -> Iterator[Card]:
-        card_idx = 0
-        while True:
-            if card_idx >= len(d):
-                card_idx = 0
-                d.shuffle()
-            yield d[card_idx]
-            card_idx += 1
+                self._player_hand.append(self._shoe.draw())
+
+    def _reveal_dealer(self) -> None:
+        """Turn up the dealer's face-down card"""
+        self._hide_dealer = False
+        self._shoe.reveal(self._dealer_hand[0].code)
+
+    def _end_round(self):
+        """Show both agents the final hands. Returns what the player's observe_round returned (see Blackjack._round)."""
+        state = self.state()
+        observed = self._player.observe_round(state)
+        self._dealer.observe_round(state)
+        return observed
 
     def state(self) -> GameState:
         """Returns an external representation of the current game."""
-        dealer = (
-            ["<HIDDEN>", *self._dealer_hand[1:]]
-            if self._hide_dealer
-            else self._dealer_hand
-        )
-
         return GameState(
-            dealer, self._player_hand, self._score, hide_dealer=self._hide_dealer
+            self._dealer_hand,
+            self._player_hand,
+            self._score,
+            hide_dealer=self._hide_dealer,
+            remaining=self._remaining,
+            shuffles=self._shoe.shuffles,
+            rules=self._rules,
         )
 
-    def play(self, rounds: int = 10, endless: bool = False) -> int:
+    def play(self, rounds: int = 10, endless: bool = False, stats: HandStats | None = None) -> int:
         """Play N hands of blackjack against a dealer.
 
         :param rounds: Fixed # of rounds to play
         :param endless: Run forever
+        :param stats: Accumulator to record every hand in
         :return: player's final score
         """
 
         def runner():
             self._reset_hand()
-            self._score += self._next_round()
+            self._score += self._next_round(stats)
 
             if self._verbose:
                 print(self.state())
@@ -168,19 +283,19 @@ class Blackjack:
         """Score the player/dealer hands
 
         Score (multiply by self._multiplier):
-        +1.5 -- Player gets blackjack (Ace + Face card)
+        +1.5 -- Player gets blackjack (Ace + Face card). Paid at Rules.blackjack_payout.
         +1 -- Player Wins
         +0 -- Push (draw)
         -0.5 -- Player Surrender
         -1 -- Dealer Wins
         """
         if self._surrender:
-            return -0.5
+            return SURRENDER_SCORE
 
-        player_sum = utils.hand_value(self._player_hand)
-        dealer_sum = utils.hand_value(self._dealer_hand)
-        player_bust = player_sum > 21
-        dealer_bust = dealer_sum > 21
+        player_sum = self._player_hand.value
+        dealer_sum = self._dealer_hand.value
+        player_bust = self._player_hand.bust
+        dealer_bust = self._dealer_hand.bust
         score = 0
 
         # Score based on who bust
@@ -196,7 +311,7 @@ class Blackjack:
                     score = -1
                 else:  # Player won the hand
                     # Bonus points for blackjack
-                    score = 1.5 if utils.blackjack_hand(self._player_hand) else 1
+                    score = self._rules.blackjack_payout if self._player_hand.blackjack else 1
             case True, False:  # Only player bust, dealer wins
                 score = -1
             case False, True:  # Only dealer bust, player wins
@@ -206,20 +321,20 @@ class Blackjack:
 
         return score * self._multiplier
 
-    def _act_or_stand(self, hand: list[Card], action: Action) -> bool:
+    def _act_or_stand(self, hand: Hand, action: Action) -> bool:
         """return True if player chose to Stand, False otherwise"""
         match action:
             case Action.STAND:
                 return True
             case Action.HIT:
-                hand.append(next(self._deck))
+                hand.append(self._shoe.draw())
             case Action.SURRENDER:
                 self._surrender = True
                 return True
             case Action.DOUBLE_DOWN:
                 # TODO -- Double score?
                 self._multiplier = 2
-                hand.append(next(self._deck))
+                hand.append(self._shoe.draw())
             case Action.SPLIT:
                 # TODO -- Split hand?
                 self._split_hands = True
@@ -227,26 +342,48 @@ class Blackjack:
                 raise ValueError("Invalid action: ", action)
         return False
 
-    def _next_round(self) -> int:
+    def _dealer_turn(self) -> None:
+        """Reveal the dealer's hand. If player did not "Bust", then the dealer plays."""
+        self._reveal_dealer()
+        stand = False
+        if not self._player_hand.bust:
+            #   Until dealer stands or busts:
+            while not stand and self._dealer_hand.value < utils.BLACKJACK:
+                # Let dealer choose legal move
+                action = self._pick_action(is_player=False)
+                stand = self._act_or_stand(self._dealer_hand, action)
+
+    def _next_round(self, stats: HandStats | None = None) -> int:
+        for step in self._round(stats):  # The round of a synchronous player only yields its score
+            pass
+        return step
+
+    def _round(self, stats: HandStats | None = None) -> Generator[Awaitable | int, Any, None]:
+        """Play one round. Yields the round's score once it is over.
+
+        Before that, player calls which return an awaitable (the calls of an AsyncAgent) are yielded, and their
+        result is expected to be sent back, so they can be awaited in between (see server.AsyncBlackjack).
+        The round of a synchronous player yields nothing but its score.
+        """
         # Start the round by dealing 2 cards to dealer & player, alternating
         self._init_hands()
 
         # Until player stands or busts:
         stand = False
-        while not stand and utils.hand_value(self._player_hand) < utils.BLACKJACK:
+        while not stand and self._player_hand.value < utils.BLACKJACK:
             # Let player choose valid move
-            action = self._player.pick_action(self.state())
+            action = self._pick_action(is_player=True)
+            if not isinstance(action, Action):
+                action = yield action
             stand = self._act_or_stand(self._player_hand, action)
 
-        # If player did not "Bust", then the dealer plays
-        self._hide_dealer = False
-        stand = False
-        if utils.hand_value(self._player_hand) <= utils.BLACKJACK:
-            #   Until dealer stands or busts:
-            while not stand and utils.hand_value(self._dealer_hand) < utils.BLACKJACK:
-                # Let dealer choose legal move
-                action = self._dealer.pick_action(self.state())
-                stand = self._act_or_stand(self._dealer_hand, action)
+        self._dealer_turn()
 
         # score round
-        return self._score_hands()
+        observed = self._end_round()
+        if observed is not None:
+            yield observed
+        score = self._score_hands()
+        if stats is not None:
+            stats.add(score, blackjack=self._player_hand.blackjack, surrender=self._surrender)
+        yield score
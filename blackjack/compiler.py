@@ -0,0 +1,181 @@
+"""
+Policy compiler. Lowers deterministic agents to flat action tables, so the engine can pick their actions with
+one table lookup instead of building a GameState and calling `Agent.pick_action`.
+
+An agent is compiled by probing `pick_action` with representative hands for every reachable decision state
+(hand total, softness, dealer upcard, first decision) and recording its answers in a table (see TablePolicy).
+The table is then verified against the agent: every probed hand, including several different hands for each
+state, must get the same action from the table as from the agent. Only agents which declare themselves
+deterministic (see `Agent.deterministic`) are probed, and agents failing verification aren't compiled.
+Probed states follow the game's rules (see Rules), as the legal actions depend on them.
+
+Run `python -m blackjack.compiler -h` to compile an agent to a table file.
+"""
+from __future__ import annotations
+
+import argparse
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from typing import Iterator
+
+import numpy as np
+
+from blackjack import utils
+from blackjack.agents import Agent
+from blackjack.core import Action, CardValue, GameState, Hand, Rules, Suit, card_codes
+from blackjack.core.rules import DEFAULT_RULES
+from blackjack.policy import STAND, TABLE_SHAPE, TablePolicy, save_table, state_index
+
+# Max # of cards in the probed hands, and of probed hands per decision state
+PROBE_CARDS = 4
+PROBES_PER_STATE = 4
+# Max # of compiled tables cached (see compile_agent)
+COMPILED_CACHE_SIZE = 64
+
+# One card code of each rank, including the 4 ten-valued ranks
+_RANKS = tuple(card_codes.encode(value, Suit.SPADES) for value in CardValue)
+# Face-down card of the probed dealer hands. Never visible in the probed states.
+_HOLE = _RANKS[0]
+# Player hand of the probed dealer states
+_PLAYER = Hand([_HOLE, _HOLE])
+
+
+# Compiled tables (or None for agents failing verification) by (Agent.compile_key, rules), least recently used first
+_compiled: dict[tuple, TablePolicy | None] = {}
+
+
+def _with_upcard(cards: tuple[int, ...], i: int) -> tuple[int, ...]:
+    """The cards, reordered so the i-th card is the second one dealt (the dealer's upcard)"""
+    rest = cards[:i] + cards[i + 1:]
+    return rest[0], cards[i], *rest[1:]
+
+
+@lru_cache(maxsize=16)
+def _probes(is_player: bool, rules: Rules) -> tuple[tuple[int, GameState], ...]:
+    """(flat table index, state) of up to PROBES_PER_STATE representative hands per reachable decision state.
+    States are immutable, so they are built once per rules and shared by every compilation."""
+    return tuple(_representatives(is_player, rules))
+
+
+def _representatives(is_player: bool, rules: Rules) -> Iterator[tuple[int, GameState]]:
+    counts = np.zeros(np.prod(TABLE_SHAPE), dtype=np.intp)
+    for n in range(2, PROBE_CARDS + 1):
+        for cards in combinations_with_replacement(_RANKS, n):
+            hand = Hand(cards)
+            if hand.value >= utils.BLACKJACK:
+                continue
+
+            if is_player:
+                # The player's decisions see the dealer's upcard only
+                states = (GameState(Hand([_HOLE, upcard]), hand, 0, rules=rules) for upcard in _RANKS)
+            else:
+                # The dealer decides on its revealed hand, whose second card is the upcard
+                states = (
+                    GameState(Hand(_with_upcard(cards, i)), _PLAYER, 0, hide_dealer=False, rules=rules)
+                    for i in range(n)
+                )
+
+            for state in states:
+                own = state.agent_hand(is_player)
+                index = state_index(own.value, int(own.soft), card_codes.VALUES[state.upcard.code]) * 2
+                index += len(own) == 2
+                if counts[index] < PROBES_PER_STATE:
+                    counts[index] += 1
+                    yield index, state
+
+
+def probe(agent: Agent, rules: Rules = DEFAULT_RULES) -> TablePolicy:
+    """Record the agent's action for every reachable decision state under the rules. Unreachable states Stand."""
+    table = np.full(np.prod(TABLE_SHAPE), STAND, dtype=np.uint8)
+    seen = np.zeros(len(table), dtype=bool)
+    for index, state in _probes(agent.is_player, rules):
+        if not seen[index]:
+            table[index] = agent.pick_action(state).code
+            seen[index] = True
+    return TablePolicy(table.reshape(TABLE_SHAPE))
+
+
+def verify(agent: Agent, policy: TablePolicy, rules: Rules = DEFAULT_RULES) -> list[tuple[int, int, int, int]]:
+    """Check a table against the agent on every probed hand under the rules.
+
+    :return: the (total, soft, upcard, first) states on which they disagree, or the agent is inconsistent
+    """
+    flat = policy.table.ravel()
+    mismatches = []
+    for index, state in _probes(agent.is_player, rules):
+        if agent.pick_action(state).code != flat[index]:
+            mismatches.append(tuple(int(i) for i in np.unravel_index(index, TABLE_SHAPE)))
+    return sorted(set(mismatches))
+
+
+def compile_agent(agent: Agent, rules: Rules = DEFAULT_RULES) -> TablePolicy | None:
+    """Compile an agent to a table of action codes (see TablePolicy), for games played under the rules.
+    Compiled tables are cached by the agent's decisions (see Agent.compile_key) and the rules, and are read-only.
+
+    :return: the verified table, or None if the agent isn't deterministic (it must then be called as usual)
+    """
+    if not agent.deterministic:
+        return None
+    key = agent.compile_key
+    if key is None:
+        return _compile(agent, rules)
+
+    key = (key, rules)
+    if key in _compiled:
+        _compiled[key] = _compiled.pop(key)  # Most recently used last
+    else:
+        if len(_compiled) >= COMPILED_CACHE_SIZE:
+            del _compiled[next(iter(_compiled))]
+        _compiled[key] = _compile(agent, rules)
+    return _compiled[key]
+
+
+def _compile(agent: Agent, rules: Rules) -> TablePolicy | None:
+    policy = probe(agent, rules)
+    if verify(agent, policy, rules):
+        return None
+    policy.table.flags.writeable = False
+    return policy
+
+
+def action(flat: np.ndarray, hand: Hand, upcard: int) -> Action:
+    """The compiled action for a hand (see TablePolicy.table, flattened) against a dealer upcard value"""
+    return Action.from_code(flat[state_index(hand.value, hand.soft, upcard) * 2 + (len(hand) == 2)])
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.compiler",
+        description="Compile a deterministic agent to a verified table of action codes.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("agent", type=str, help="Agent type to compile (see Blackjack.agent_types)")
+    parser.add_argument("--output", "-o", type=str, required=True, help="File to save the table to (.npy)")
+    parser.add_argument("--dealer", action="store_true", help="Compile the agent as the dealer")
+    parser.add_argument("--table", type=str, default=None, help="Pretrained table file for the agent")
+    parser.add_argument("--decks", type=int, default=1, help="Number of decks in the shoe")
+    Rules.add_arguments(parser, shoe=False)
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    # Imported here, the engine imports this module
+    from blackjack.blackjack import Blackjack
+
+    args = _parse()
+    rules = Rules.from_args(args)
+    agent = Blackjack.create_agent(
+        args["agent"],
+        is_player=not args["dealer"],
+        rules=rules,
+        decks=rules.decks,
+        **({"table": args["table"]} if args["table"] else {}),
+    )
+    if not agent.deterministic:
+        raise SystemExit(f"{type(agent).__name__} isn't deterministic, so it can't be compiled")
+    compiled = probe(agent, rules)
+    mismatches = verify(agent, compiled, rules)
+    if mismatches:
+        raise SystemExit(f"Verification failed on {len(mismatches)} states, e.g. {mismatches[:5]}")
+    save_table(args["output"], compiled.table)
+    print(f"Compiled {type(agent).__name__} to {args['output']}")
@@ -3,14 +3,21 @@ __all__ = [
     "Suit",
     "CardValue",
     "Card",
+    "Hand",
     "StandardDeck",
+    "Shoe",
     "GameState",
+    "Rules",
 ]
 
 from blackjack.core.action import Action
 from blackjack.core.card_value import CardValue
 from blackjack.core.suit import Suit
+from blackjack.core import card_codes  # WARNING -- Imports Suit,CardValue
 
 from blackjack.core.card import Card  # WARNING -- Imports Suit,CardValue
+from blackjack.core.hand import Hand  # WARNING -- Imports Card
 from blackjack.core.standard_deck import StandardDeck  # WARNING -- Imports Card, Suit
-from blackjack.core.gamestate import GameState  # WARNING -- Imports Card
+from blackjack.core.shoe import Shoe  # WARNING -- Imports StandardDeck
+from blackjack.core.rules import Rules
+from blackjack.core.gamestate import GameState  # WARNING -- Imports Card, Rules
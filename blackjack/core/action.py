@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from enum import Enum
 from functools import partialmethod
 
@@ -12,8 +14,27 @@ class Action(Enum):
     SURRENDER = "surrender"
     SPLIT = "split"
 
+    @property
+    def code(self) -> int:
+        """Compact integer code for this action (its position in the enum)"""
+        return _CODES[self]
+
+    @property
+    def bit(self) -> int:
+        """This action's flag within a bitmask of actions (see GameState.legal)"""
+        return 1 << _CODES[self]
+
+    @staticmethod
+    def from_code(code: int) -> Action:
+        """Inverse of Action.code"""
+        return _ACTIONS[code]
+
     def _str(self):
         return self.name
 
     __str__ = partialmethod(_str)
     __repr__ = partialmethod(_str)
+
+
+_ACTIONS = tuple(Action)
+_CODES = {action: code for code, action in enumerate(_ACTIONS)}
@@ -3,21 +3,30 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
 
-from blackjack.core import CardValue, Suit
+from blackjack.core import CardValue, Suit, card_codes
 
 
 @dataclass(frozen=True, order=True, slots=True)
 class Card:
     """
     An immutable representation of a playing card.
+
+    Card.code holds the compact single byte encoding of the card (see blackjack.core.card_codes)
     """
 
     value: CardValue = field(compare=True)
     suit: Suit = field(compare=False)
+    code: int = field(compare=False, repr=False)
 
     def __init__(self, value: CardValue, suit: Suit):
         object.__setattr__(self, "value", value)
         object.__setattr__(self, "suit", suit)
+        object.__setattr__(self, "code", card_codes.encode(value, suit))
+
+    @staticmethod
+    def from_code(code: int) -> Card:
+        """Get the card for a compact card code. Cards are shared, so this never allocates."""
+        return _CARDS[code]
 
     @classmethod
     def full_suit(cls, suit: Suit) -> list[Card]:
@@ -47,3 +56,9 @@ class Card:
             return self.value + other
         else:
             raise TypeError(f"Cannot add types: self={type(self)}, other={type(other)}")
+
+
+# Every possible card, indexed by code
+_CARDS = tuple(
+    Card(card_codes.rank(code), card_codes.suit(code)) for code in range(card_codes.DECK_SIZE)
+)
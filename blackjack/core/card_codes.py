@@ -0,0 +1,42 @@
+"""
+Compact card encoding. Every card fits in a single byte holding its rank and suit:
+
+    code = rank << 2 | suit
+
+where rank is the position of the card's CardValue (Two=0 ... Ace=12) and suit the position of its Suit.
+Hands and decks can then be stored as bytes/bytearray, and card values looked up by indexing a table.
+"""
+from blackjack.core import CardValue, Suit
+
+RANKS = tuple(CardValue)
+SUITS = tuple(Suit)
+DECK_SIZE = len(RANKS) * len(SUITS)
+
+# CardValue members alias each other by value (e.g. TEN == JACK), so ranks are looked up by name
+_RANK_INDEX = {rank.name: i for i, rank in enumerate(RANKS)}
+_SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+ACE = _RANK_INDEX[CardValue.ACE.name]
+
+# Blackjack value of each card code, with Aces high (VALUES) or low (HARD_VALUES)
+VALUES = bytes(int(RANKS[code >> 2]) for code in range(DECK_SIZE))
+HARD_VALUES = bytes(1 if code >> 2 == ACE else VALUES[code] for code in range(DECK_SIZE))
+
+
+def encode(value: CardValue, suit: Suit) -> int:
+    """Encode a card's value and suit as a single byte"""
+    return _RANK_INDEX[value.name] << 2 | _SUIT_INDEX[suit]
+
+
+def rank(code: int) -> CardValue:
+    """The CardValue of an encoded card"""
+    return RANKS[code >> 2]
+
+
+def suit(code: int) -> Suit:
+    """The Suit of an encoded card"""
+    return SUITS[code & 0b11]
+
+
+def is_ace(code: int) -> bool:
+    return code >> 2 == ACE
@@ -2,85 +2,178 @@ from __future__ import annotations
 
 from functools import partialmethod
 
-from blackjack import utils
-from blackjack.core import Action, Card
+from blackjack.core import Action, Card, Hand, Rules, card_codes
+from blackjack.core.hand import HandView
+from blackjack.core.rules import DEFAULT_RULES
+
+
+def _legal(is_player: bool, double: bool, surrender: bool) -> tuple[Action, ...]:
+    # Note -- Players can technically hit at any value
+    legal_actions = [Action.HIT, Action.STAND]
+
+    # -- Double Down: only on first hit, on the hands the rules allow (see Rules.double)
+    # -- Split: If first hit AND hand contains 2 of the same card
+    if double:
+        legal_actions.append(Action.DOUBLE_DOWN)
+
+    # -- Surrender: Players can forfeit for a slightly less negative score, if the rules allow it
+    if is_player and surrender:
+        legal_actions.append(Action.SURRENDER)
+
+    return tuple(legal_actions)
+
+
+# Legal actions, indexed by [is_player][2 * double down allowed + surrender allowed]
+_ACTIONS = tuple(tuple(_legal(bool(p), bool(i & 2), bool(i & 1)) for i in range(4)) for p in range(2))
+_MASKS = tuple(tuple(sum(a.bit for a in acts) for acts in row) for row in _ACTIONS)
+
+# The visible part of a hidden dealer hand, indexed by the code of the face-up card
+_UPCARDS = tuple(Hand([code]).view() for code in range(card_codes.DECK_SIZE))
 
 
 class GameState:
     """
     Immutable representation of the game state.
 
-    The visible dealer hand, player's hand, and current score.
+    The visible dealer hand, player's hand, and current score. Creating a state only snapshots the game's hands
+    as read-only views sharing their card buffers; everything else agents may read (the visible dealer cards,
+    the upcard, the legal actions) is derived from those views when it is first accessed.
     """
 
+    __slots__ = (
+        "_dealer_hand", "_player_hand", "_score", "_hide_dealer", "_hole", "_remaining", "_shuffles", "_rules",
+        "_visible_dealer", "_player_legal",
+    )
+
     def __init__(
         self,
-        dealer_hand: list[Card],
-        player_hand: list[Card],
+        dealer_hand: Hand,
+        player_hand: Hand,
         player_score: int,
         hide_dealer: bool = True,
+        remaining: memoryview | None = None,
+        shuffles: int = 0,
+        rules: Rules = DEFAULT_RULES,
+        hole_card: bool = True,
     ):
         """
         Create a GameState.
 
-        :param dealer_hand: the portion of the dealer's hand currently visible to the player
+        :param dealer_hand: the dealer's cards. Only the face-up cards are visible while hide_dealer is set.
         :param player_hand: the player's cards
         :param player_score: the player's running score
+        :param remaining: read-only counts of the unseen cards of each value in the shoe (see Shoe.remaining)
+        :param shuffles: number of times the shoe has been reshuffled
+        :param rules: the game's rules, which decide the legal actions
+        :param hole_card: False if dealer_hand holds only the dealer's face-up cards, e.g. in a remote player's
+                          state, which is never sent the face-down card
         """
-        self._dealer_hand = dealer_hand
-        self._player_hand = player_hand
+        self._dealer_hand = dealer_hand.view()  # The whole dealer hand, see GameState.dealer for the visible part
+        self._player_hand = player_hand.view()
         self._score = player_score
         self._hide_dealer = hide_dealer
+        self._hole = int(hole_card)  # Index of the upcard in the dealer hand
+        self._remaining = remaining
+        self._shuffles = shuffles
+        self._rules = rules
+        self._visible_dealer = self._player_legal = None  # Derived on first access
 
-    def agent_hand(self, is_player: bool) -> list[Card]:
-        hand = self._player_hand if is_player else self._dealer_hand
-        return hand.copy()
+    def agent_hand(self, is_player: bool) -> HandView:
+        return self._player_hand if is_player else self.dealer
 
     @property
-    def dealer(self) -> list[Card]:
-        """Returns a copy of the dealer's hand"""
-        return self.agent_hand(False)
+    def dealer(self) -> HandView:
+        """Returns a read-only view of the visible part of the dealer's hand"""
+        if self._visible_dealer is not None:
+            return self._visible_dealer
+        dealer = self._dealer_hand
+        if self._hide_dealer and self._hole:
+            dealer = _UPCARDS[dealer.codes[1]] if len(dealer) == 2 else Hand(dealer.codes[1:]).view()
+        self._visible_dealer = dealer
+        return dealer
 
     @property
-    def hand(self) -> list[Card]:
-        """Returns a copy of the player's hand"""
-        return self.agent_hand(True)
+    def hand(self) -> HandView:
+        """Returns a read-only view of the player's hand"""
+        return self._player_hand
 
     @property
     def score(self):
         """Get current score"""
         return self._score
 
-    def actions(self, is_player: bool) -> list[Action]:
-        """List of legal actions for the given agent"""
-        # Note -- Players can technically hit at any value
-        legal_actions = [Action.HIT, Action.STAND]
-        hand = self.agent_hand(is_player)
+    @property
+    def hide_dealer(self) -> bool:
+        """True while the dealer's first card is face down"""
+        return self._hide_dealer
 
-        # -- Double Down: only on first hit
-        # -- Split: If first hit AND hand contains 2 of the same card
-        if len(hand) == 2:
-            legal_actions.append(Action.DOUBLE_DOWN)
-            # if hand[0].value is hand[1].value:
-            #     legal_actions.append(Action.SPLIT)
+    @property
+    def total(self) -> int:
+        """Value of the player's hand"""
+        return self._player_hand.value
 
-        # -- Surrender: Players can forfeit for a slightly less negative score
-        if is_player:
-            legal_actions.append(Action.SURRENDER)
+    @property
+    def soft(self) -> bool:
+        """True if the player's hand counts an Ace as 11"""
+        return self._player_hand.soft
+
+    @property
+    def upcard(self) -> Card | None:
+        """The dealer's face-up card"""
+        return self._dealer_hand[self._hole] if len(self._dealer_hand) > self._hole else None
 
-        return legal_actions
+    @property
+    def remaining(self) -> memoryview | None:
+        """Read-only counts of the unseen cards of each value in the shoe (see probability.shoe_composition)"""
+        return self._remaining
+
+    @property
+    def shuffles(self) -> int:
+        """Number of times the shoe has been reshuffled. Changes whenever the shoe is reshuffled."""
+        return self._shuffles
+
+    @property
+    def rules(self) -> Rules:
+        """The game's rules"""
+        return self._rules
+
+    @property
+    def legal(self) -> int:
+        """Bitmask of the player's legal actions (see Action.bit)"""
+        return _MASKS[True][self._legal_index(True)]
+
+    def legal_mask(self, is_player: bool) -> int:
+        """Bitmask of legal actions for the given agent (see Action.bit)"""
+        return _MASKS[is_player][self._legal_index(is_player)]
+
+    def actions(self, is_player: bool) -> tuple[Action, ...]:
+        """Legal actions for the given agent"""
+        return _ACTIONS[is_player][self._legal_index(is_player)]
+
+    def _legal_index(self, is_player: bool) -> int:
+        """Index of the agent's legal actions (see _ACTIONS). The player's is cached, it is asked for every decision."""
+        if is_player and self._player_legal is not None:
+            return self._player_legal
+        hand = self._player_hand if is_player else self.dealer
+        # Double down is only allowed on the first decision
+        double = len(hand) == 2 and self._rules.can_double(hand.value, hand.soft)
+        index = 2 * double + self._rules.surrender
+        if is_player:
+            self._player_legal = index
+        return index
 
     def _display(self) -> str:
         """String representation of the game"""
+        dealer = ["<HIDDEN>", *self.dealer] if self._hide_dealer else self._dealer_hand
         dealer_score = (
-            "\n" if self._hide_dealer else f" -- {utils.hand_value(self.dealer)}\n"
+            "\n" if self._hide_dealer else f" -- {self._dealer_hand.value}\n"
         )
         return (
             "-" * 20
             + "\n"
-            + f"Dealer Hand: {self.dealer}"
+            + f"Dealer Hand: {dealer}"
             + dealer_score
-            + f"Your Hand: {self.hand} -- {utils.hand_value(self.hand)}\n"
+            + f"Your Hand: {self._player_hand} -- {self._player_hand.value}\n"
             + f"Score: {self.score}\n"
         )
 
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from collections import abc
+from functools import partialmethod
+from typing import Iterable, Iterator
+
+from blackjack.core import Card, card_codes
+
+BLACKJACK = 21
+
+
+class Hand(abc.Sequence):
+    """
+    A hand of cards which keeps its value up to date as cards are added.
+
+    Cards are stored as compact card codes (see blackjack.core.card_codes), and the hard total & number of
+    Aces are updated on every append, so the value, softness, blackjack and bust checks are all O(1).
+    Indexing/iterating a hand returns Cards.
+
+    Hands are append-only, so Hand.view() can share the card buffer instead of copying it, and the same view is
+    returned until the next card is added.
+    """
+
+    __slots__ = ("_codes", "_hard", "_aces", "_view")
+
+    def __init__(self, cards: Iterable[Card | int] = ()):
+        """
+        :param cards: Cards or card codes to start the hand with
+        """
+        self._codes = bytearray()
+        self._hard = 0  # Total with every Ace counted as 1
+        self._aces = 0
+        self._view = None
+        for card in cards:
+            self.append(card)
+
+    def append(self, card: Card | int):
+        """Add a Card (or card code) to the hand"""
+        code = card if isinstance(card, int) else card.code
+        self._codes.append(code)
+        self._view = None
+        self._hard += card_codes.HARD_VALUES[code]
+        if card_codes.is_ace(code):
+            self._aces += 1
+
+    def copy(self) -> Hand:
+        hand = Hand.__new__(Hand)
+        hand._codes = self._codes.copy()
+        hand._hard = self._hard
+        hand._aces = self._aces
+        hand._view = None
+        return hand
+
+    def view(self) -> HandView:
+        """A read-only snapshot of this hand as it is now. Cards added later are not visible in the view."""
+        if self._view is None:
+            self._view = HandView(self)
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __getitem__(self, item: int | slice) -> Card | list[Card]:
+        if isinstance(item, slice):
+            return [Card.from_code(code) for code in self._codes[item]]
+        return Card.from_code(self._codes[item])
+
+    @property
+    def codes(self) -> bytes:
+        """The card codes in this hand"""
+        return bytes(self._codes)
+
+    @property
+    def soft(self) -> bool:
+        """True if an Ace is counted as 11"""
+        return self._aces > 0 and self._hard + 10 <= BLACKJACK
+
+    @property
+    def soft_aces(self) -> int:
+        """Number of Aces counted as 11. Only one Ace can count high without busting."""
+        return 1 if self.soft else 0
+
+    @property
+    def value(self) -> int:
+        """The max value of the hand which does not exceed 21, if possible (see utils.hand_value)"""
+        return self._hard + 10 if self.soft else self._hard
+
+    @property
+    def blackjack(self) -> bool:
+        """True for an Ace and a 10-value card"""
+        return len(self) == 2 and self.value == BLACKJACK
+
+    @property
+    def bust(self) -> bool:
+        return self._hard > BLACKJACK
+
+    def __string(self) -> str:
+        return str(self[:])
+
+    __str__ = partialmethod(__string)
+    __repr__ = partialmethod(__string)
+
+
+class HandView(Hand):
+    """
+    A read-only snapshot of a Hand. Shares the card buffer of the original hand, so creating one never copies
+    the cards.
+    """
+
+    __slots__ = ("_length",)
+
+    def __init__(self, hand: Hand):
+        self._codes = hand._codes
+        self._length = len(hand._codes)
+        self._hard = hand._hard
+        self._aces = hand._aces
+
+    def append(self, card: Card | int):
+        raise TypeError("HandView is read-only")
+
+    def copy(self) -> Hand:
+        return Hand(self._codes[:self._length])
+
+    def view(self) -> HandView:
+        return self
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, item: int | slice) -> Card | list[Card]:
+        if isinstance(item, slice):
+            return [Card.from_code(code) for code in self._codes[:self._length][item]]
+        if not -self._length <= item < self._length:
+            raise IndexError("Hand index out of range")
+        return Card.from_code(self._codes[item % self._length])
+
+    def __iter__(self) -> Iterator[Card]:
+        return map(Card.from_code, self._codes[:self._length])
+
+    @property
+    def codes(self) -> bytes:
+        return bytes(self._codes[:self._length])
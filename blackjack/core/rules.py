@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass, fields
+
+# Score of a surrendered hand
+SURRENDER_SCORE = -0.5
+
+# Hands which can be doubled down on, for each double restriction: (lowest total, highest total, soft hands too)
+DOUBLE_RULES = {
+    "any": (0, 21, True),  # Any two cards
+    "9-11": (9, 11, False),  # Hard 9, 10 or 11 only
+    "10-11": (10, 11, False),  # Hard 10 or 11 only
+    "none": (1, 0, False),  # Never
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Rules:
+    """
+    An immutable, hashable set of table rules.
+
+    Rules are a cache key: everything derived from them (strategy tables, deviation tables, compiled agents, ...)
+    is cached per rules, so games sharing rules share those tables, and games with different rules never mix them.
+
+        Rules(decks=6, penetration=0.75, hit_soft_17=True, blackjack_payout=1.2, double="10-11")
+    """
+
+    decks: int = 1  # Number of decks in the shoe
+    penetration: float = 1.0  # Fraction of the shoe dealt before it is reshuffled (between rounds)
+    hit_soft_17: bool = False  # H17 if True: the dealer hits a soft 17. S17 (stands on all 17s) otherwise.
+    blackjack_payout: float = 1.5  # Score of a winning blackjack: 1.5 for 3:2, 1.2 for 6:5
+    surrender: bool = True  # The player may surrender, for SURRENDER_SCORE
+    double: str = "any"  # Hands the player may double down on, on the first decision only (see DOUBLE_RULES)
+
+    def __post_init__(self):
+        if self.decks < 1:
+            raise ValueError(f"A shoe needs at least one deck, got {self.decks}")
+        if not 0 < self.penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], got {self.penetration}")
+        if self.double not in DOUBLE_RULES:
+            raise ValueError(f"Unknown double restriction {self.double!r}, choose one of: {', '.join(DOUBLE_RULES)}")
+
+    @property
+    def full_actions(self) -> bool:
+        """True if every action is allowed: surrender, and doubling down on any two cards"""
+        return self.surrender and self.double == "any"
+
+    def can_double(self, total: int, soft: bool) -> bool:
+        """True if a two-card hand can be doubled down on"""
+        low, high, soft_too = DOUBLE_RULES[self.double]
+        return low <= total <= high and (soft_too or not soft)
+
+    def to_dict(self) -> dict:
+        """The rules as a plain (e.g. JSON serializable) dict"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, rules: dict) -> Rules:
+        return cls(**rules)
+
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser, *, defaults: Rules | None = None, shoe: bool = True):
+        """Add a command line flag for each rule to a parser (see Rules.from_args)
+
+        :param defaults: Rules the flags default to. The standard rules if None.
+        :param shoe: Add flags for the shoe (--decks, --penetration). CLIs which deal from another shoe leave them out.
+        """
+        defaults = defaults if defaults is not None else cls()
+        group = parser.add_argument_group("table rules")
+        if shoe:
+            group.add_argument("--decks", type=int, default=defaults.decks, help="Number of decks in the shoe")
+            group.add_argument(
+                "--penetration",
+                type=float,
+                default=defaults.penetration,
+                help="Fraction of the shoe dealt before the cut card, after which the shoe is reshuffled",
+            )
+        group.add_argument(
+            "--h17",
+            action="store_true",
+            default=defaults.hit_soft_17,
+            dest="hit_soft_17",
+            help="The dealer hits a soft 17 (H17). The dealer stands on all 17s (S17) otherwise.",
+        )
+        group.add_argument(
+            "--blackjack-payout",
+            type=float,
+            default=defaults.blackjack_payout,
+            help="Score of a winning blackjack, e.g. 1.5 for 3:2 or 1.2 for 6:5",
+        )
+        group.add_argument(
+            "--no-surrender",
+            action="store_false",
+            default=defaults.surrender,
+            dest="surrender",
+            help="The player may not surrender",
+        )
+        group.add_argument(
+            "--double",
+            choices=list(DOUBLE_RULES),
+            default=defaults.double,
+            help="Hands the player may double down on: any two cards, hard 9-11, hard 10-11, or none",
+        )
+
+    @classmethod
+    def from_args(cls, args: dict | argparse.Namespace, **overrides) -> Rules:
+        """The rules given on the command line (see Rules.add_arguments). Rules without a flag keep their default.
+
+        :param overrides: Rules to set instead of their flags, e.g. the decks of a shoe given another way
+        :raises ValueError: for invalid rules (see Rules)
+        """
+        args = args if isinstance(args, dict) else vars(args)
+        rules = {field.name: args[field.name] for field in fields(cls) if field.name in args}
+        return cls(**{**rules, **overrides})
+
+
+DEFAULT_RULES = Rules()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from array import array
+
+import numpy as np
+
+from blackjack.core import StandardDeck, card_codes
+
+# Index of each card code's value in a shoe composition (Twos = 0 ... 10-value cards = 8, Aces = 9)
+_VALUE_INDEX = bytes(card_codes.VALUES[code] - 2 for code in range(card_codes.DECK_SIZE))
+
+
+class Shoe:
+    """
+    A shoe of one or more shuffled decks, dealt up to a cut card.
+
+    Once the cut card is reached, Shoe.needs_shuffle is set so the game can reshuffle between rounds. If the shoe
+    runs out mid-round, it is reshuffled immediately.
+
+    The shoe counts the unseen cards of each value as they are dealt, so the composition of the shoe (as seen by
+    the players) is always available in O(1). Face-down cards are only counted once they are revealed, unless the
+    shoe was reshuffled in between: the reshuffled shoe already holds the card again.
+    """
+
+    def __init__(self, *, decks: int = 1, penetration: float = 1.0, rng: np.random.Generator | None = None):
+        """
+        :param decks: Number of 52 card decks in the shoe
+        :param penetration: Fraction of the shoe dealt before the cut card is reached
+        :param rng: Random number generator used for shuffling. Seeded from the OS if not given.
+        """
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], got {penetration}")
+        self._deck = StandardDeck(decks=decks, rng=rng)
+        self._codes = self._deck.codes
+        self._decks = decks
+        self._penetration = penetration
+        self._size = len(self._codes)
+        self._cut = max(1, int(self._size * penetration))
+
+        self._full = array("i", [0] * (max(_VALUE_INDEX) + 1))
+        for code in self._codes:
+            self._full[_VALUE_INDEX[code]] += 1
+        self._counts = array("i", self._full)
+        self._pos = 0
+        self._shuffles = 0
+        self._face_down = -1  # Shoe.shuffles when the face-down card was dealt, -1 once it is revealed
+
+    @property
+    def decks(self) -> int:
+        return self._decks
+
+    @property
+    def penetration(self) -> float:
+        return self._penetration
+
+    def __len__(self) -> int:
+        """Number of cards left to deal before the shoe runs out"""
+        return self._size - self._pos
+
+    @property
+    def needs_shuffle(self) -> bool:
+        """True once the cut card has been reached"""
+        return self._pos >= self._cut
+
+    @property
+    def shuffles(self) -> int:
+        """Number of times the shoe has been reshuffled"""
+        return self._shuffles
+
+    @property
+    def remaining(self) -> memoryview:
+        """Read-only, live view of the number of unseen cards of each value (see probability.shoe_composition)"""
+        return memoryview(self._counts).toreadonly()
+
+    @property
+    def composition(self) -> tuple[int, ...]:
+        """Snapshot of Shoe.remaining"""
+        return tuple(self._counts)
+
+    def shuffle(self):
+        """Gather all the cards and reshuffle the shoe"""
+        self._deck.shuffle()
+        self._counts[:] = self._full
+        self._pos = 0
+        self._shuffles += 1
+
+    def draw(self, face_up: bool = True) -> int:
+        """Deal the next card code. Face-down cards are not counted until Shoe.reveal is called."""
+        if self._pos >= self._size:
+            self.shuffle()
+        code = self._codes[self._pos]
+        self._pos += 1
+        if face_up:
+            self._counts[_VALUE_INDEX[code]] -= 1
+        else:
+            self._face_down = self._shuffles
+        return code
+
+    def reveal(self, code: int):
+        """Count the face-down card (the last one dealt) once it is turned up"""
+        if self._face_down == self._shuffles:
+            self._counts[_VALUE_INDEX[code]] -= 1
+        self._face_down = -1
@@ -1,7 +1,8 @@
 from collections import abc
 from functools import partialmethod
 from pprint import pformat
-import random
+
+import numpy as np
 
 from blackjack.core import Card, Suit
 
@@ -9,9 +10,16 @@ from blackjack.core import Card, Suit
 class StandardDeck(abc.Sequence):
     """
     Represents a deck of 52 playing cards
+
+    Cards are stored as compact card codes (see blackjack.core.card_codes), one byte per card.
     """
 
-    def __init__(self, *, decks: int = 1, **kwargs):
+    def __init__(self, *, decks: int = 1, rng: np.random.Generator | None = None, **kwargs):
+        """
+        :param decks: Number of 52 card decks to combine
+        :param rng: Random number generator used for shuffling. Seeded from the OS if not given.
+        """
+        self._rng = rng if rng is not None else np.random.default_rng()
         self._cards = self._create_deck(decks)
         self.shuffle()
 
@@ -19,22 +27,29 @@ class StandardDeck(abc.Sequence):
         return len(self._cards)
 
     def __getitem__(self, item: int | slice) -> Card | list[Card]:
-        return self._cards[item]
+        if isinstance(item, slice):
+            return [Card.from_code(code) for code in self._cards[item]]
+        return Card.from_code(self._cards[item])
+
+    @property
+    def codes(self) -> memoryview:
+        """Read-only view of the card codes in this deck, in order"""
+        return memoryview(self._cards).toreadonly()
 
     def __string(self) -> str:
-        return "Deck(" + pformat(self._cards, compact=True, width=100) + ")"
+        return "Deck(" + pformat(self[:], compact=True, width=100) + ")"
     __str__ = partialmethod(__string)
     __repr__ = partialmethod(__string)
 
     @staticmethod
-    def _create_deck(decks: int = 1):
-        deck = []
+    def _create_deck(decks: int = 1) -> bytearray:
+        deck = bytearray()
         # Allow for multiple decks to be combined
         for _ in range(decks):
             for s in Suit:
-                deck.extend(Card.full_suit(s))
+                deck.extend(card.code for card in Card.full_suit(s))
         return deck
 
     def shuffle(self):
         """Randomly shuffle the cards within this deck."""
-        random.shuffle(self._cards)
+        self._rng.shuffle(np.frombuffer(self._cards, dtype=np.uint8))
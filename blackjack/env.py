@@ -0,0 +1,163 @@
+"""
+Gym-style environments. The caller plays the player's seat one decision at a time, against a dealer agent.
+
+Observations describe the player's hand like a policy table index (see blackjack.policy):
+(total, soft, dealer upcard, first decision). Actions are Actions or action codes (see Action.code).
+The reward is the round's score (see Blackjack._score_hands) once the hand is done, and 0 before that.
+
+As in the game, the player can't act on 21: if a hand is dealt 21, the next step finishes it whatever the action.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from blackjack import utils
+from blackjack.batch import ALL, BatchBlackjack, _Hands
+from blackjack.blackjack import Blackjack
+from blackjack.core import Action, card_codes
+from blackjack.policy import DOUBLE_DOWN, HIT, STAND, SURRENDER
+
+# Columns of a VectorBlackjackEnv observation
+TOTAL, SOFT, UPCARD, FIRST = range(4)
+
+
+class BlackjackEnv(Blackjack):
+    """
+    A single table, stepped one player decision at a time.
+
+        env = BlackjackEnv(seed=0)
+        observation, done = env.reset(), False
+        while not done:
+            observation, reward, done = env.step(Action.STAND)
+    """
+
+    def __init__(self, *, dealer: str = None, **kwargs):
+        """
+        :param dealer: Agent type for the dealer (see Blackjack.agent_types)
+        :param kwargs: Game settings (see Blackjack)
+        """
+        super(BlackjackEnv, self).__init__(player="stand", dealer=dealer, verbose=False, **kwargs)
+        self._done = True
+
+    def _observation(self) -> tuple[int, int, int, int]:
+        hand = self._player_hand
+        return hand.value, int(hand.soft), card_codes.VALUES[self._dealer_hand[1].code], int(len(hand) == 2)
+
+    @property
+    def legal(self) -> int:
+        """Bitmask of the player's legal actions (see Action.bit)"""
+        return self.state().legal
+
+    def reset(self) -> tuple[int, int, int, int]:
+        """Deal a new hand, returning the first observation"""
+        self._reset_hand()
+        self._init_hands()
+        self._done = False
+        return self._observation()
+
+    def step(self, action: Action | int) -> tuple[tuple[int, int, int, int], float, bool]:
+        """Play one player action.
+
+        :return: (observation, reward, done)
+        """
+        if self._done:
+            raise RuntimeError("The hand is over, call reset() to deal a new one")
+        if not isinstance(action, Action):
+            action = Action.from_code(int(action))
+
+        stand = self._player_hand.value >= utils.BLACKJACK
+        if not stand:
+            if not self.state().legal & action.bit:
+                raise ValueError("Illegal action: ", action)
+            stand = self._act_or_stand(self._player_hand, action)
+
+        if not stand and self._player_hand.value < utils.BLACKJACK:
+            return self._observation(), 0.0, False
+
+        self._dealer_turn()
+        reward = self._score_hands()
+        self._score += reward
+        self._end_round()
+        self._done = True
+        return self._observation(), reward, True
+
+
+class VectorBlackjackEnv(BatchBlackjack):
+    """
+    N independent tables, stepped in lockstep one player decision at a time.
+
+    Observations are int arrays with one row per table (see TOTAL, SOFT, UPCARD, FIRST).
+    Tables whose hand is done are dealt a new hand straight away, so the observation returned for them is
+    the first one of the next hand.
+    """
+
+    def __init__(self, tables: int = 1_000, *, dealer: str = "casino", **kwargs):
+        """
+        :param tables: Number of tables
+        :param dealer: Agent type (see Blackjack.agent_types), agent or policy for the dealer
+        :param kwargs: Game settings (see BatchBlackjack)
+        """
+        super(VectorBlackjackEnv, self).__init__(player="stand", dealer=dealer, tables=tables, **kwargs)
+        self._dealer_hands = _Hands(tables)
+        self._player_hands = _Hands(tables)
+        self._upcard = np.zeros(tables, dtype=np.uint8)
+        self._multiplier = np.ones(tables)
+        self._surrender = np.zeros(tables, dtype=bool)
+
+    def _new_hands(self, lanes: np.ndarray | slice):
+        self._dealer_hands.reset(lanes)
+        self._player_hands.reset(lanes)
+        self._multiplier[lanes] = 1
+        self._surrender[lanes] = False
+        self._upcard[lanes] = self._deal(self._dealer_hands, self._player_hands, lanes)
+
+    def _observation(self) -> np.ndarray:
+        total, soft = self._player_hands.totals()
+        return np.stack((total, soft, self._upcard, self._player_hands.cards == 2), axis=1).astype(np.int16)
+
+    def reset(self) -> np.ndarray:
+        """Deal a new hand at every table, returning the observations"""
+        self._new_hands(ALL)
+        return self._observation()
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Play one player action code at every table.
+
+        :return: (observations, rewards, done), with one row per table
+        """
+        player = self._player_hands
+        actions = np.asarray(actions, dtype=np.uint8)
+        first = player.cards == 2
+
+        # The player can't act on 21
+        player_sum, soft = player.totals()
+        acting = player_sum < utils.BLACKJACK
+        if not self._legal(True, player_sum, soft, self._upcard, first, actions)[acting].all():
+            raise ValueError("Illegal action: Split, or Surrender or Double Down where the rules don't allow it")
+        actions = np.where(player_sum >= utils.BLACKJACK, STAND, actions)
+
+        self._surrender |= actions == SURRENDER
+        self._multiplier[actions == DOUBLE_DOWN] = 2
+        hit = np.flatnonzero((actions == HIT) | (actions == DOUBLE_DOWN))
+        player.add(hit, self._draw(hit))
+
+        player_sum = player.totals()[0]
+        done = (player_sum >= utils.BLACKJACK) | (actions == STAND) | (actions == SURRENDER)
+
+        # If player did not "Bust", then the dealer plays
+        lanes = np.flatnonzero(done)
+        dealer_sum = self._dealer_hands.totals()[0]
+        self._turn(
+            self._dealer_hands, self._dealer, False,
+            lanes[(player_sum[lanes] <= utils.BLACKJACK) & (dealer_sum[lanes] < utils.BLACKJACK)],
+            self._upcard, self._multiplier, self._surrender,
+        )
+        dealer_sum = self._dealer_hands.totals()[0]
+
+        rewards = np.zeros(self._tables)
+        score = self._score_hands(player, player_sum, dealer_sum, self._multiplier, self._surrender)
+        rewards[lanes] = score[lanes]
+        self._score += rewards
+
+        self._new_hands(lanes)
+        return self._observation(), rewards, done
@@ -0,0 +1,216 @@
+"""
+Binary hand histories. A HandRecorder appends one fixed-width record per hand to a file, and a HandLog
+memory-maps the file, so every field of every hand is available as a NumPy view without parsing anything.
+
+File layout: a 16 byte header (MAGIC, format version, record size), then records of dtype HAND_DTYPE.
+Card codes (see blackjack.core.card_codes) and action codes (see Action.code) are padded with EMPTY.
+
+The draw order of a hand is fully determined by its record: dealer, player, dealer (upcard), player,
+then the player's draws, then the dealer's.
+"""
+from __future__ import annotations
+
+import os
+import struct
+from os import PathLike
+
+import numpy as np
+
+from blackjack.utils import hand_value
+
+MAGIC = b"BJHANDS\x00"
+VERSION = 2
+_HEADER = struct.Struct("<8sII")  # Magic, version, record size
+
+# Max number of cards in a hand, and of actions taken by a seat, in a recorded hand. A hand only takes another card
+# while its hard total is at most 20, so it can't hold more than 20 cards (all Aces) plus the last one, with any
+# number of decks. Every hand a game plays fits in a record.
+MAX_CARDS = 21
+EMPTY = 0xFF
+
+HAND_DTYPE = np.dtype([
+    ("shoe", "<u4"),  # Number of times the shoe had been reshuffled when the hand was dealt
+    ("player_cards", "u1", (MAX_CARDS,)),
+    ("dealer_cards", "u1", (MAX_CARDS,)),
+    ("player_actions", "u1", (MAX_CARDS,)),
+    ("dealer_actions", "u1", (MAX_CARDS,)),
+    ("n_player_cards", "u1"),
+    ("n_dealer_cards", "u1"),
+    ("n_player_actions", "u1"),
+    ("n_dealer_actions", "u1"),
+    ("player_total", "u1"),
+    ("dealer_total", "u1"),
+    ("score", "<f4"),
+    ("multiplier", "u1"),
+    ("surrender", "?"),
+])
+# Packs one record, field by field
+_RECORD = struct.Struct(f"<I{MAX_CARDS}s{MAX_CARDS}s{MAX_CARDS}s{MAX_CARDS}s6BfB?")
+_PADDING = bytes([EMPTY] * MAX_CARDS)
+
+
+class HandRecorder:
+    """
+    Records every hand played by a game (see Blackjack) to a binary file. Records are buffered, and
+    appended to the file when the buffer fills up or the recorder is closed.
+
+        with HandRecorder("hands.bin") as recorder:
+            Blackjack(player="basic", recorder=recorder).play(1_000)
+    """
+
+    def __init__(self, path: str | PathLike, buffer: int = 1 << 14):
+        """
+        :param path: File to append to. Created (with its header) if it doesn't exist.
+        :param buffer: Number of records buffered in memory between writes
+        """
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, VERSION, HAND_DTYPE.itemsize))
+        else:
+            _check_header(path)
+        self._buffer = bytearray(buffer * HAND_DTYPE.itemsize)
+        self._capacity = buffer
+        self._size = 0
+        self._written = 0
+
+        # Hand being recorded
+        self._player_actions = bytearray()
+        self._dealer_actions = bytearray()
+        self._shoe = 0
+
+    @property
+    def hands(self) -> int:
+        """Number of hands recorded so far"""
+        return self._written + self._size
+
+    def attach(self, game):
+        """Record every hand the game plays from now on. Only adds work to recorded games."""
+        init_hands, act_or_stand, score_hands = game._init_hands, game._act_or_stand, game._score_hands
+
+        def _init_hands():
+            self._player_actions.clear()
+            self._dealer_actions.clear()
+            self._shoe = game.shoe.shuffles
+            return init_hands()
+
+        def _act_or_stand(hand, action):
+            (self._player_actions if hand is game._player_hand else self._dealer_actions).append(action.code)
+            return act_or_stand(hand, action)
+
+        def _score_hands():
+            score = score_hands()
+            self.record(
+                game._player_hand.codes,
+                game._dealer_hand.codes,
+                self._player_actions,
+                self._dealer_actions,
+                score=score,
+                multiplier=game._multiplier,
+                surrender=game._surrender,
+                shoe=self._shoe,
+            )
+            return score
+
+        game._init_hands, game._act_or_stand, game._score_hands = _init_hands, _act_or_stand, _score_hands
+
+    def record(
+        self,
+        player_cards: bytes,
+        dealer_cards: bytes,
+        player_actions: bytes,
+        dealer_actions: bytes,
+        *,
+        score: float,
+        multiplier: float = 1,
+        surrender: bool = False,
+        shoe: int = 0,
+    ):
+        """Append one hand"""
+        if max(len(player_cards), len(dealer_cards), len(player_actions), len(dealer_actions)) > MAX_CARDS:
+            raise ValueError(f"Hands of more than {MAX_CARDS} cards or actions can't be recorded")
+        if self._size == self._capacity:
+            self.flush()
+
+        _RECORD.pack_into(
+            self._buffer,
+            self._size * _RECORD.size,
+            shoe,
+            bytes(player_cards) + _PADDING[len(player_cards):],
+            bytes(dealer_cards) + _PADDING[len(dealer_cards):],
+            bytes(player_actions) + _PADDING[len(player_actions):],
+            bytes(dealer_actions) + _PADDING[len(dealer_actions):],
+            len(player_cards),
+            len(dealer_cards),
+            len(player_actions),
+            len(dealer_actions),
+            hand_value(player_cards),
+            hand_value(dealer_cards),
+            score,
+            int(multiplier),
+            surrender,
+        )
+        self._size += 1
+
+    def flush(self):
+        """Append the buffered records to the file"""
+        self._file.write(memoryview(self._buffer)[:self._size * _RECORD.size])
+        self._file.flush()
+        self._written += self._size
+        self._size = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> HandRecorder:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(path: str | PathLike):
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError(f"{path} is not a hand history file")
+    magic, version, size = _HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or size != HAND_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} hand history file")
+
+
+class HandLog:
+    """
+    Read-only, memory-mapped hand history (see HandRecorder). Fields are NumPy views into the file:
+
+        log = HandLog("hands.bin")
+        log["score"].mean(), (log["player_total"] > 21).mean()
+    """
+
+    def __init__(self, path: str | PathLike):
+        _check_header(path)
+        count = (os.path.getsize(path) - _HEADER.size) // HAND_DTYPE.itemsize
+        if count:
+            self._records = np.memmap(path, dtype=HAND_DTYPE, mode="r", offset=_HEADER.size, shape=(count,))
+        else:  # Empty files can't be memory-mapped
+            self._records = np.zeros(0, dtype=HAND_DTYPE)
+
+    @property
+    def records(self) -> np.ndarray:
+        """All the records, as a structured array (see HAND_DTYPE)"""
+        return self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, item: str | int | slice) -> np.ndarray:
+        """A field of every hand (e.g. log["score"]), or the records of some hands"""
+        return self._records[item]
+
+    def draws(self, hand: int) -> bytes:
+        """Card codes of a hand, in the order they were dealt"""
+        record = self._records[hand]
+        player = bytes(record["player_cards"][:record["n_player_cards"]])
+        dealer = bytes(record["dealer_cards"][:record["n_dealer_cards"]])
+        return bytes((dealer[0], player[0], dealer[1], player[1])) + player[2:] + dealer[2:]
@@ -0,0 +1,168 @@
+"""
+Vectorized policies used by the batch engine.
+
+A policy maps arrays describing many hands at once to an array of action codes (see `Action.code`).
+Every hand is described by:
+-- total: the hand value (see utils.hand_value)
+-- soft: True if the hand contains an Ace counted as 11
+-- upcard: value of the dealer's face-up card (2-11)
+-- first: True if this is the first decision of the hand (i.e. the hand has 2 cards)
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from os import PathLike
+from typing import Callable
+
+import numpy as np
+
+from blackjack.core import Action, Rules
+from blackjack.core.rules import DEFAULT_RULES
+
+# Index bounds of policy tables: hand totals 0..31 x soft x dealer upcard 0..11 x first decision
+TOTALS = 32
+UPCARDS = 12
+TABLE_SHAPE = (TOTALS, 2, UPCARDS, 2)
+# Number of dense (total, soft, upcard) states (see state_index)
+STATES = TOTALS * 2 * UPCARDS
+
+HIT = Action.HIT.code
+STAND = Action.STAND.code
+DOUBLE_DOWN = Action.DOUBLE_DOWN.code
+SURRENDER = Action.SURRENDER.code
+SPLIT = Action.SPLIT.code
+
+
+def state_index(total, soft, upcard):
+    """Dense index of a (total, soft, upcard) state in 0..STATES-1. Works on ints and on arrays."""
+    return (total * 2 + soft) * UPCARDS + upcard
+
+
+@lru_cache(maxsize=16)
+def legal_actions(rules: Rules) -> np.ndarray:
+    """The actions the rules allow (see GameState.actions), as a read-only boolean array indexed by
+    [is_player, total, soft, upcard, first decision, action code]. Cached per rules."""
+    legal = np.zeros((2, *TABLE_SHAPE, len(Action)), dtype=bool)
+    legal[..., [HIT, STAND]] = True
+    for total, soft in np.ndindex(TOTALS, 2):
+        legal[:, total, soft, :, 1, DOUBLE_DOWN] = rules.can_double(total, bool(soft))
+    legal[1, ..., SURRENDER] = rules.surrender
+    legal.flags.writeable = False
+    return legal
+
+
+def save_table(path: str | PathLike, table: np.ndarray):
+    """Save a policy table (or Q-table) to disk, as a .npy file"""
+    np.save(path, np.ascontiguousarray(table), allow_pickle=False)
+
+
+def load_table(path: str | PathLike, shape: tuple[int, ...], dtype: type, *, mmap: bool = True) -> np.ndarray:
+    """Load a table saved with save_table.
+
+    :param shape: Expected shape of the table
+    :param dtype: Expected dtype of the table
+    :param mmap: Memory-map the file read-only instead of reading it, so every process loading the same file
+                 shares one copy of the table
+    """
+    table = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    if table.shape != shape or table.dtype != dtype:
+        raise ValueError(f"Table must have shape {shape} and dtype {np.dtype(dtype)}, got {table.shape} {table.dtype}")
+    return table
+
+
+class Policy(ABC):
+    """A vectorized equivalent of `Agent.pick_action`."""
+
+    @abstractmethod
+    def __call__(
+        self,
+        total: np.ndarray,
+        soft: np.ndarray,
+        upcard: np.ndarray,
+        first: np.ndarray,
+        is_player: bool,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """Pick one action code per hand. All arrays have the same length."""
+
+
+class TablePolicy(Policy):
+    """A deterministic policy backed by a lookup table of action codes with shape `TABLE_SHAPE`."""
+
+    def __init__(self, table: np.ndarray):
+        table = np.asarray(table, dtype=np.uint8)
+        if table.shape != TABLE_SHAPE:
+            raise ValueError(f"Policy table must have shape {TABLE_SHAPE}, got {table.shape}")
+        self._table = table
+        self._flat = table.ravel()
+
+    @classmethod
+    def from_function(cls, fn: Callable[[int, bool, int, bool], Action]) -> TablePolicy:
+        """Build a table by evaluating fn(total, soft, upcard, first) for every state."""
+        table = np.empty(TABLE_SHAPE, dtype=np.uint8)
+        for idx in np.ndindex(*TABLE_SHAPE):
+            total, soft, upcard, first = idx
+            table[idx] = fn(total, bool(soft), upcard, bool(first)).code
+        return cls(table)
+
+    @property
+    def table(self) -> np.ndarray:
+        """The underlying table of action codes"""
+        return self._table
+
+    def __call__(self, total, soft, upcard, first, is_player, rng) -> np.ndarray:
+        index = state_index(total, soft, upcard) * 2 + first
+        return self._flat[index]
+
+
+class RandomPolicy(Policy):
+    """Picks uniformly among the legal actions (see `GameState.actions`)."""
+
+    def __init__(self, rules: Rules = DEFAULT_RULES):
+        """
+        :param rules: The game's rules, which decide the legal actions
+        """
+        legal = legal_actions(rules).reshape(2, -1, len(Action))
+        # Number of legal actions in each state, and their codes first (in code order, as in GameState.actions)
+        self._counts = legal.sum(axis=2)
+        self._codes = np.argsort(~legal, axis=2, kind="stable").astype(np.uint8)
+
+    def __call__(self, total, soft, upcard, first, is_player, rng) -> np.ndarray:
+        index = state_index(total, soft, upcard) * 2 + first
+        pick = (rng.random(len(total)) * self._counts[int(is_player), index]).astype(np.intp)
+        return self._codes[int(is_player), index, pick]
+
+
+class QPolicy(Policy):
+    """Epsilon-greedy over a Q-value array indexed by [state index (see state_index), action code]."""
+
+    def __init__(self, q: np.ndarray, epsilon: float = 0.0, rules: Rules = DEFAULT_RULES):
+        """
+        :param q: Q-values. Not copied, so the policy follows updates to the array.
+        :param epsilon: Chance of picking a random legal action instead of the greedy one
+        :param rules: The game's rules, which decide the legal actions
+        """
+        self._q = q
+        self._epsilon = epsilon
+        # Legal actions, indexed by [is_player, state index, first decision, action code]
+        self._legal = legal_actions(rules).reshape(2, STATES, 2, len(Action))
+        self._random = RandomPolicy(rules)
+
+    @property
+    def q(self) -> np.ndarray:
+        return self._q
+
+    def values(self, states: np.ndarray, first: np.ndarray, is_player: bool) -> np.ndarray:
+        """Q-values of each state's actions, with illegal actions set to -inf"""
+        return np.where(self._legal[int(is_player), states, first.astype(np.intp)], self._q[states], -np.inf)
+
+    def __call__(self, total, soft, upcard, first, is_player, rng) -> np.ndarray:
+        actions = self.values(state_index(total, soft, upcard), first, is_player).argmax(axis=1).astype(np.uint8)
+        if self._epsilon:
+            explore = rng.random(len(total)) < self._epsilon
+            if explore.any():
+                actions[explore] = self._random(
+                    total[explore], soft[explore], upcard[explore], first[explore], is_player, rng
+                )
+        return actions
@@ -0,0 +1,153 @@
+"""
+Exact probabilities for the dealer's hand.
+
+The casino dealer (see agents.Dealer) hits until its hand is worth 17 or more, so the distribution of its final
+total only depends on the upcard and the cards remaining in the shoe. Shoe compositions are tuples holding the
+number of remaining cards of each blackjack value (index 0 = Twos ... index 8 = 10-value cards, index 9 = Aces).
+"""
+from __future__ import annotations
+
+from functools import cache, lru_cache
+from typing import Iterable
+
+from blackjack.core import Card, card_codes
+from blackjack.utils import BLACKJACK
+
+VALUES = tuple(range(2, 12))
+DEALER_STANDS = 17
+
+# Dealer outcomes: final totals 17-21, then bust
+OUTCOMES = (17, 18, 19, 20, 21, "bust")
+BUST = len(OUTCOMES) - 1
+# Distributions where one outcome is certain
+_POINT = tuple(tuple(1.0 if i == j else 0.0 for j in range(len(OUTCOMES))) for i in range(len(OUTCOMES)))
+
+CACHE_SIZE = 1 << 16
+
+# Chance of drawing each value from an infinite shoe
+INFINITE_DECK = tuple((16 if v == 10 else 4) / 52 for v in VALUES)
+
+
+def shoe_composition(decks: int = 1, removed: Iterable[Card | int] = ()) -> tuple[int, ...]:
+    """Composition of a shoe of N decks, without the given Cards (or card codes)"""
+    counts = [(16 if v == 10 else 4) * decks for v in VALUES]
+    for card in removed:
+        code = card if isinstance(card, int) else card.code
+        counts[card_codes.VALUES[code] - 2] -= 1
+    return tuple(counts)
+
+
+def draw_probabilities(composition: tuple[int, ...] | None) -> tuple[float, ...]:
+    """Chance of drawing each value from a shoe. None means an infinite shoe."""
+    if composition is None:
+        return INFINITE_DECK
+    remaining = sum(composition)
+    if remaining == 0:  # The shoe is reshuffled when it runs out
+        return INFINITE_DECK
+    return tuple(n / remaining for n in composition)
+
+
+def add_card(total: int, soft: bool, value: int) -> tuple[int, bool]:
+    """Value & softness of a hand after drawing a card of the given value.
+
+    A hard hand can never turn soft again, so (total, soft) is all that's needed to track a hand.
+    """
+    ace = value == 11
+    hard = (total - 10 if soft else total) + (1 if ace else value)
+    soft = (soft or ace) and hard + 10 <= BLACKJACK
+    return (hard + 10 if soft else hard), soft
+
+
+def remove(composition: tuple[int, ...], value: int) -> tuple[int, ...]:
+    """Composition of a shoe after drawing a card of the given value"""
+    i = value - 2
+    return composition[:i] + (composition[i] - 1,) + composition[i + 1:]
+
+
+def _dealer_stands(hard: int, aces: bool, hit_soft_17: bool) -> int | None:
+    """The dealer's final total if it stands on this hand, otherwise None"""
+    soft = aces and hard + 10 <= BLACKJACK
+    total = hard + 10 if soft else hard
+    if total < DEALER_STANDS or (hit_soft_17 and soft and total == DEALER_STANDS):
+        return None
+    return total
+
+
+@cache
+def _infinite(hard: int, aces: bool, hit_soft_17: bool) -> tuple[float, ...]:
+    dist = [0.0] * len(OUTCOMES)
+    for value, p in zip(VALUES, INFINITE_DECK):
+        ace = value == 11
+        for i, q in enumerate(_dealer_outcome(hard + (1 if ace else value), aces or ace, hit_soft_17)):
+            dist[i] += p * q
+    return tuple(dist)
+
+
+def _dealer_outcome(hard: int, aces: bool, hit_soft_17: bool) -> tuple[float, ...]:
+    """Outcome distribution of a dealer hand drawing from an infinite shoe"""
+    if hard > BLACKJACK:
+        return _POINT[BUST]
+    total = _dealer_stands(hard, aces, hit_soft_17)
+    if total is not None:
+        return _POINT[total - DEALER_STANDS]
+    return _infinite(hard, aces, hit_soft_17)
+
+
+def _finite(hard: int, aces: bool, composition: tuple[int, ...], hit_soft_17: bool) -> tuple[float, ...]:
+    @cache
+    def outcome(hard: int, aces: bool, composition: tuple[int, ...]) -> tuple[float, ...]:
+        if hard > BLACKJACK:
+            return _POINT[BUST]
+        total = _dealer_stands(hard, aces, hit_soft_17)
+        if total is not None:
+            return _POINT[total - DEALER_STANDS]
+        if sum(composition) == 0:
+            return _infinite(hard, aces, hit_soft_17)
+
+        dist = [0.0] * len(OUTCOMES)
+        for i, p in enumerate(draw_probabilities(composition)):
+            if p == 0:
+                continue
+            ace = VALUES[i] == 11
+            rest = remove(composition, VALUES[i])
+            for j, q in enumerate(outcome(hard + (1 if ace else VALUES[i]), aces or ace, rest)):
+                dist[j] += p * q
+        return tuple(dist)
+
+    return outcome(hard, aces, composition)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def dealer_distribution(
+    upcard: int,
+    composition: tuple[int, ...] | None = None,
+    *,
+    hit_soft_17: bool = False,
+) -> tuple[float, ...]:
+    """Probability of each dealer outcome (see OUTCOMES) for a given upcard.
+
+    The face-down card is drawn from the shoe like any other card. Results are cached.
+
+    :param upcard: Value of the dealer's face-up card (2-11)
+    :param composition: Cards remaining in the shoe, excluding the upcard (see shoe_composition).
+                        None for an infinite shoe.
+    :param hit_soft_17: True if the dealer hits a soft 17
+    """
+    hard, aces = (1, True) if upcard == 11 else (upcard, False)
+    if composition is None:
+        return _infinite(hard, aces, hit_soft_17)
+    return _finite(hard, aces, tuple(composition), hit_soft_17)
+
+
+def stand_ev(total: int, distribution: tuple[float, ...]) -> float:
+    """Expected score for standing on a total (see Blackjack._score_hands), given a dealer outcome distribution"""
+    if total > BLACKJACK:
+        return -1.0
+    ev = distribution[BUST]
+    for outcome, p in zip(OUTCOMES[:BUST], distribution):
+        if outcome < total:
+            ev += p
+        elif outcome > total:
+            ev -= p
+    return ev
+
@@ -0,0 +1,117 @@
+"""
+Opt-in per-phase profiling of the game loop.
+
+A Profiler wraps the phases of a game (dealing, agent decisions, state construction, actions, dealer play,
+scoring, learning) with monotonic-clock timers and call counters. Phases are wrapped per instance, so games
+which aren't profiled run the exact same code as before, at no cost.
+
+    profiler = Profiler()
+    game = Blackjack(player="basic", profiler=profiler)
+    game.play(1_000)
+    print(profiler.report())
+"""
+from __future__ import annotations
+
+import cProfile
+from collections import defaultdict
+from functools import partialmethod, wraps
+from os import PathLike
+from time import perf_counter_ns
+from typing import Callable
+
+# Game methods timed by Profiler.attach, and their phase names
+_GAME_PHASES = {
+    "_next_round": "round",
+    "_reset_hand": "reset",
+    "_init_hands": "deal",
+    "state": "state",
+    "_pick_action": "decide",
+    "_act_or_stand": "act",
+    "_dealer_turn": "dealer turn",
+    "_score_hands": "score",
+    "_end_round": "end round",
+    "_train": "train",
+    "_compile": "compile",
+}
+# Game methods timed as a whole: the calls they make aren't timed as phases, e.g. the compiler's probes of an agent
+# aren't decisions of the game
+_OPAQUE_PHASES = {"_compile"}
+
+
+class Profiler:
+    """
+    Timers & counters for the phases of a game. Both the total time of each phase, and its self time
+    (excluding the phases it calls, e.g. decisions made during the dealer's turn) are recorded.
+    """
+
+    def __init__(self):
+        self._phases: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0])  # [calls, total ns, self ns]
+        self._children = []  # Time spent in the nested phases of each running phase
+        self._opaque = 0  # Number of running opaque phases (see Profiler.wrap)
+
+    def wrap(self, phase: str, fn: Callable, *, opaque: bool = False) -> Callable:
+        """Time every call of fn as the given phase
+
+        :param opaque: Don't time the phases fn calls, they are part of this phase
+        """
+        stats = self._phases[phase]
+        children = self._children
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            if self._opaque:
+                return fn(*args, **kwargs)
+            self._opaque += opaque
+            children.append(0)
+            start = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                self._opaque -= opaque
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += elapsed - children.pop()
+                if children:
+                    children[-1] += elapsed
+
+        return timed
+
+    def attach(self, game, player=None, dealer=None):
+        """Time the phases of a game (see Blackjack) and the decisions of its agents"""
+        for method, phase in _GAME_PHASES.items():
+            setattr(game, method, self.wrap(phase, getattr(game, method), opaque=method in _OPAQUE_PHASES))
+        if player is not None:
+            player.pick_action = self.wrap("player decision", player.pick_action)
+            if hasattr(player, "observe_transition"):
+                player.observe_transition = self.wrap("learn", player.observe_transition)
+        if dealer is not None:
+            dealer.pick_action = self.wrap("dealer decision", dealer.pick_action)
+
+    @property
+    def phases(self) -> dict[str, tuple[int, int, int]]:
+        """(calls, total ns, self ns) of each phase"""
+        return {phase: tuple(stats) for phase, stats in self._phases.items() if stats[0]}
+
+    def report(self) -> str:
+        """Per-phase breakdown, sorted by self time"""
+        phases = sorted(self.phases.items(), key=lambda item: item[1][2], reverse=True)
+        total = sum(stats[2] for _, stats in phases) or 1
+        lines = [f"{'Phase':<16} {'Calls':>10} {'Total ms':>10} {'Self ms':>10} {'Self %':>7} {'ns/call':>9}"]
+        for phase, (calls, elapsed, own) in phases:
+            lines.append(
+                f"{phase:<16} {calls:>10} {elapsed / 1e6:>10.1f} {own / 1e6:>10.1f} {own / total:>7.1%} "
+                f"{own / calls:>9.0f}"
+            )
+        return "\n".join(lines)
+
+    __str__ = partialmethod(report)
+
+
+def profile(fn: Callable, path: str | PathLike):
+    """Run fn under cProfile and dump the stats to a file (readable by pstats, snakeviz, flameprof, ...)"""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        profiler.dump_stats(path)
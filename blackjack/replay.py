@@ -0,0 +1,233 @@
+"""
+Deterministic replays. Re-runs a game on recorded cards instead of a shuffled shoe, so engine changes can be
+regression-tested and other agents evaluated on exactly the same cards (counterfactual "what-if" analysis).
+
+Cards are read straight from the recorded buffer, nothing is shuffled. A ReplayShoe deals a raw sequence of card
+codes in order, and a LogShoe deals the hands of a hand history (see blackjack.history): every round starts with
+the cards of the next recorded hand, and a round which needs more cards than were recorded carries on with the
+cards the shoe dealt next (wrapping around after the last hand).
+
+Run `python -m blackjack.replay -h` to replay a hand history from the command line.
+"""
+from __future__ import annotations
+
+import argparse
+from array import array
+from os import PathLike
+
+import numpy as np
+
+from blackjack.blackjack import Blackjack
+from blackjack.core import Rules, card_codes
+from blackjack.core.shoe import _VALUE_INDEX
+from blackjack.history import HandLog
+from blackjack.stats import HandStats
+
+
+class ReplayShoe:
+    """
+    Deals a recorded sequence of card codes in order, with the same interface as Shoe.
+    The shoe is never reshuffled: drawing past the end of the recording raises EOFError.
+    """
+
+    def __init__(self, cards: np.ndarray | bytes | memoryview, *, decks: int = 1):
+        """
+        :param cards: Card codes, in the order they are dealt (e.g. np.memmap of a file of codes)
+        :param decks: Number of decks in the recorded shoe, for the composition counts
+        """
+        self._cards = cards
+        self._decks = decks
+        self._pos = 0
+        self._full = array("i", [0] * (max(_VALUE_INDEX) + 1))
+        for code in range(card_codes.DECK_SIZE):
+            self._full[_VALUE_INDEX[code]] += decks
+        self._counts = array("i", self._full)
+        self._shuffles = 0
+
+    @property
+    def decks(self) -> int:
+        return self._decks
+
+    @property
+    def needs_shuffle(self) -> bool:
+        return False
+
+    @property
+    def shuffles(self) -> int:
+        return self._shuffles
+
+    @property
+    def remaining(self) -> memoryview:
+        """Read-only, live view of the number of unseen cards of each value (see Shoe.remaining)"""
+        return memoryview(self._counts).toreadonly()
+
+    @property
+    def composition(self) -> tuple[int, ...]:
+        return tuple(self._counts)
+
+    def shuffle(self):
+        """Recorded shoes are never reshuffled"""
+
+    def _next(self) -> int:
+        if self._pos >= len(self._cards):
+            raise EOFError("The replay ran out of recorded cards")
+        code = int(self._cards[self._pos])
+        self._pos += 1
+        return code
+
+    def draw(self, face_up: bool = True) -> int:
+        """Deal the next recorded card code. Face-down cards are not counted until ReplayShoe.reveal is called."""
+        code = self._next()
+        if face_up:
+            self._counts[_VALUE_INDEX[code]] -= 1
+        return code
+
+    def reveal(self, code: int):
+        self._counts[_VALUE_INDEX[code]] -= 1
+
+
+class LogShoe(ReplayShoe):
+    """
+    Deals the hands of a hand history, one recorded hand per round. Reads the cards straight from the
+    memory-mapped records. The composition counts & shuffle counter follow the recorded shoe.
+    """
+
+    def __init__(self, log: HandLog | str | PathLike, *, decks: int = 1):
+        """
+        :param log: Hand history, or the path of a hand history file
+        :param decks: Number of decks in the recorded shoe, for the composition counts
+        """
+        log = log if isinstance(log, HandLog) else HandLog(log)
+        super(LogShoe, self).__init__(b"", decks=decks)
+        self._log = log
+        self._player = log["player_cards"]
+        self._dealer = log["dealer_cards"]
+        self._n_player = log["n_player_cards"]
+        self._n_cards = log["n_player_cards"].astype(np.intp) + log["n_dealer_cards"]
+        self._shoes = log["shoe"]
+        self._base = array("i", self._full)  # Composition before the current hand was dealt
+        self._hand = -1  # Recorded hand being dealt from
+        self._round = -1  # Recorded hand the current round started at
+
+    def __len__(self) -> int:
+        """Number of recorded hands"""
+        return len(self._log)
+
+    @property
+    def needs_shuffle(self) -> bool:
+        """Always True, so the game moves to the next recorded hand between rounds (see LogShoe.shuffle)"""
+        return True
+
+    def shuffle(self):
+        """Move to the next recorded hand. The composition is reset to what it was when that hand was dealt."""
+        previous, self._round = self._round, self._round + 1
+        if self._round >= len(self._log):
+            raise EOFError("The replay ran out of recorded hands")
+        if previous < 0 or self._shoes[self._round] != self._shoes[previous]:
+            self._base[:] = self._full
+        else:
+            for code in self._draws(previous):
+                self._base[_VALUE_INDEX[code]] -= 1
+        self._counts[:] = self._base
+        self._shuffles = int(self._shoes[self._round])
+        self._hand = self._round
+        self._pos = 0
+
+    def _draws(self, hand: int) -> bytes:
+        return self._log.draws(hand)
+
+    def _card(self, hand: int, k: int) -> int:
+        """The k-th card dealt in a recorded hand: dealer, player, dealer, player, player's draws, dealer's draws"""
+        if k < 4:
+            return int((self._player if k % 2 else self._dealer)[hand, k // 2])
+        k -= 2
+        n_player = self._n_player[hand]
+        if k < n_player:
+            return int(self._player[hand, k])
+        return int(self._dealer[hand, k - n_player + 2])
+
+    def _next(self) -> int:
+        if self._hand < 0:
+            self.shuffle()
+        while self._pos >= self._n_cards[self._hand]:
+            # Carry on with the cards dealt after this hand, wrapping around after the last one
+            self._hand = (self._hand + 1) % len(self._log)
+            self._pos = 0
+        code = self._card(self._hand, self._pos)
+        self._pos += 1
+        return code
+
+
+def replay(
+    log: HandLog | str | PathLike,
+    *,
+    player: str = "basic",
+    dealer: str = "casino",
+    decks: int = 1,
+    rules: Rules | None = None,
+    **kwargs,
+) -> tuple[np.ndarray, HandStats]:
+    """Replay every hand of a hand history with the given agents.
+
+    :param log: Hand history, or the path of a hand history file
+    :param player: Agent type for the player (see Blackjack.agent_types)
+    :param dealer: Agent type for the dealer (see Blackjack.agent_types)
+    :param decks: Number of decks in the recorded shoe, if no rules are given
+    :param rules: The rules to replay under. Defaults to the standard rules with the given number of decks.
+    :param kwargs: Other game settings (see Blackjack). Trainable players aren't trained by default, as training
+                   would deal from the recording: pass a pretrained table instead.
+    :return: the score of every replayed hand, and their statistics
+    """
+    rules = rules if rules is not None else Rules(decks=decks)
+    shoe = LogShoe(log, decks=rules.decks)
+    kwargs.setdefault("train_rounds", 0)
+    game = Blackjack(player=player, dealer=dealer, verbose=False, rules=rules, shoe=shoe, **kwargs)
+    scores = np.empty(len(shoe), dtype=np.float32)
+    stats = HandStats()
+    for i in range(len(shoe)):
+        scores[i] = game.play(rounds=1, stats=stats)
+    return scores, stats
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.replay",
+        description="Replay a hand history, with the recorded or different agents.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("log", type=str, help="Hand history file (see --record)")
+    parser.add_argument("--player", type=str, default="basic", help="Agent type for the player")
+    parser.add_argument("--dealer", type=str, default="casino", help="Agent type for the dealer")
+    parser.add_argument("--decks", type=int, default=1, help="Number of decks in the recorded shoe")
+    Rules.add_arguments(parser, shoe=False)
+    parser.add_argument("--table", type=str, default=None, help="Pretrained table file for the player")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the agents' random number generators")
+    parser.add_argument(
+        "--verify", action="store_true", help="Exit with an error if any hand scores differently from the recording"
+    )
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    args = _parse()
+    recorded = HandLog(args["log"])
+    rules = Rules.from_args(args)
+    scores, stats = replay(
+        recorded,
+        player=args["player"],
+        dealer=args["dealer"],
+        rules=rules,
+        table=args["table"],
+        seed=args["seed"],
+    )
+    paired = HandStats()
+    diff = scores - recorded["score"]
+    paired.add_batch(diff.astype(np.float64), np.zeros(len(diff), dtype=bool), np.zeros(len(diff), dtype=bool))
+
+    print(f"Recorded EV per hand: {recorded['score'].mean(dtype=np.float64): .5f}")
+    print(stats)
+    print(f"Replay - recorded EV per hand: {paired.mean: .5f} +/- {paired.ci():.5f} (95% CI)")
+    changed = np.flatnonzero(diff)
+    print(f"Hands scored differently: {len(changed)}")
+    if args["verify"] and len(changed):
+        raise SystemExit(f"Replay differs from the recording, first at hand {changed[0]}")
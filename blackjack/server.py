@@ -0,0 +1,396 @@
+"""
+Asyncio table server. Hosts one table (an AsyncBlackjack game against the house dealer) per connected client,
+all multiplexed on a single event loop, over TCP or a Unix socket.
+
+The protocol is line-based JSON, so a table can be played by hand with `nc localhost 8765`. The server sends:
+
+    {"type": "hello", "rounds": null, "decks": 1, "rules": {..}}
+    {"type": "state", "hand": [..], "dealer": [..], "total": 15, "soft": false, "upcard": 10, "legal": [..]}
+    {"type": "result", "hand": [..], "dealer": [..], "total": 19, "dealer_total": 20, "score": -1, "bankroll": -1}
+    {"type": "error", "message": ".."}
+
+Cards are card codes (see blackjack.core.card_codes), and the upcard is the value of the dealer's face-up card.
+The rules are the table's Rules, as a dict (see Rules.to_dict).
+The client answers every "state" with one line naming a legal action (e.g. `hit`, `double-down`, or its code).
+
+Slow clients are throttled rather than buffered: every write waits for the client to drain its socket, and
+connections beyond `max_tables` wait for a free table. Clients which take longer than `timeout` to answer
+(or to read) are disconnected.
+
+Run `python -m blackjack.server -h` to start a server, or to connect bots to one.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import json
+import time
+from contextlib import suppress
+from os import PathLike
+
+import numpy as np
+
+from blackjack.agents import Agent, AsyncAgent
+from blackjack.blackjack import Blackjack
+from blackjack.core import Action, GameState, Hand, Rules, card_codes
+from blackjack.core.rules import DEFAULT_RULES
+from blackjack.stats import HandStats
+
+# Longest line accepted from a client
+LINE_LIMIT = 1 << 10
+
+# Accepted spellings of each action: its value (e.g. "double-down"), name and code
+_ACTIONS = {
+    spelling: action
+    for action in Action
+    for spelling in (action.value, action.name.lower(), str(action.code))
+}
+
+
+class LineTooLong(Exception):
+    """A client sent a line longer than LINE_LIMIT"""
+
+
+def _encode(message: dict) -> bytes:
+    """One protocol line"""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+async def _resolve(result):
+    """Await the result of an agent call if the agent is asynchronous"""
+    return await result if inspect.isawaitable(result) else result
+
+
+class AsyncBlackjack(Blackjack):
+    """
+    A game of blackjack whose player may be an AsyncAgent. The player's decisions are awaited, so many games
+    can run concurrently on one event loop. The dealer must decide synchronously (e.g. the casino dealer).
+    """
+
+    def __init__(self, *, player: str | Agent, verbose: bool = False, **kwargs):
+        """
+        :param player: Agent type for the player (see Blackjack.agent_types), or an (async) agent
+        :param verbose: Print the game state after every round
+        :param kwargs: Other game settings (see Blackjack)
+        """
+        super(AsyncBlackjack, self).__init__(player=player, verbose=verbose, **kwargs)
+
+    async def play(self, rounds: int = 10, endless: bool = False, stats: HandStats | None = None) -> int:
+        """Play N hands of blackjack against a dealer (see Blackjack.play)"""
+        self._score = 0
+        played = 0
+        while endless or played < rounds:
+            self._reset_hand()
+            self._score += await self._next_round_async(stats)
+            played += 1
+
+            if self._verbose:
+                print(self.state())
+
+        return self._score
+
+    async def _next_round_async(self, stats: HandStats | None = None) -> int:
+        """Blackjack._next_round, awaiting the player's decisions"""
+        steps = self._round(stats)
+        step = next(steps)
+        while inspect.isawaitable(step):
+            step = steps.send(await step)
+        return step
+
+
+class RemoteAgent(AsyncAgent):
+    """
+    A player connected over a stream (see TableServer). Sends it the game state, and waits for its decision.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        *args,
+        timeout: float | None = 60.0,
+        **kwargs,
+    ):
+        """
+        :param reader: Stream the client's decisions are read from
+        :param writer: Stream the game states are written to
+        :param timeout: Seconds the client is given to answer, or to read what was sent to it
+        """
+        super(RemoteAgent, self).__init__(True, *args, **kwargs)
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+
+    async def send(self, message: dict):
+        """Write one message, waiting for the client to read it if its socket buffer is full"""
+        self._writer.write(_encode(message))
+        await asyncio.wait_for(self._writer.drain(), self._timeout)
+
+    async def pick_action(self, game_state: GameState, *args, **kwargs) -> Action:
+        legal = game_state.actions(is_player=True)
+        await self.send({
+            "type": "state",
+            "hand": list(game_state.hand.codes),
+            "dealer": list(game_state.dealer.codes),
+            "total": game_state.total,
+            "soft": game_state.soft,
+            "upcard": card_codes.VALUES[game_state.upcard.code],
+            "legal": [action.value for action in legal],
+        })
+
+        # Repeatedly prompt until a legal action is chosen
+        while True:
+            try:
+                line = await asyncio.wait_for(self._reader.readline(), self._timeout)
+            except ValueError as e:
+                # StreamReader.readline raises ValueError for lines longer than its limit
+                raise LineTooLong(f"Lines are limited to {LINE_LIMIT} bytes") from e
+            if not line:
+                raise ConnectionResetError("The player disconnected")
+            action = _ACTIONS.get(line.decode(errors="replace").strip().lower())
+            if action in legal:
+                return action
+            await self.send({"type": "error", "message": f"Choose one of: {', '.join(a.value for a in legal)}"})
+
+
+class TableServer:
+    """
+    Hosts one table per connected client on the running event loop.
+
+        server = TableServer(max_tables=10_000)
+        await server.start(port=8765)
+    """
+
+    def __init__(
+        self,
+        *,
+        dealer: str = "casino",
+        rounds: int | None = None,
+        max_tables: int = 1_000,
+        timeout: float | None = 60.0,
+        seed: int | np.random.SeedSequence | np.random.Generator | None = None,
+        **kwargs,
+    ):
+        """
+        :param dealer: Agent type for the dealer at every table (see Blackjack.agent_types)
+        :param rounds: Rounds played per connection, or None to play until the client disconnects
+        :param max_tables: Max # of tables played at once. Further clients wait for a table to free up.
+        :param timeout: Seconds a client is given to answer, or to read what was sent to it, before it is
+                        disconnected. None waits forever.
+        :param seed: Seed (or generator) the tables' random number generators are spawned from
+        :param kwargs: Other game settings for every table (e.g. rules, see Blackjack)
+        """
+        self._dealer = dealer
+        self._rounds = rounds
+        self._timeout = timeout
+        self._settings = kwargs
+        self._rng = np.random.default_rng(seed)
+        self._slots = asyncio.Semaphore(max_tables)
+        self._tables = 0
+        self._stats = HandStats()
+
+    @property
+    def tables(self) -> int:
+        """Number of tables being played"""
+        return self._tables
+
+    @property
+    def stats(self) -> HandStats:
+        """Per-hand statistics of every hand played at every table"""
+        return self._stats
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        path: str | PathLike | None = None,
+        backlog: int = 4096,
+    ) -> asyncio.AbstractServer:
+        """Start listening on a TCP port, or on a Unix socket if a path is given.
+
+        :param backlog: Max # of connections waiting to be accepted. Bursts of clients beyond this (capped by
+                        the OS, e.g. net.core.somaxconn) stall until their connection is retried.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self._serve, path=path, limit=LINE_LIMIT, backlog=backlog)
+        return await asyncio.start_server(self._serve, host, port, limit=LINE_LIMIT, backlog=backlog)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Play one table with a connected client, until it disconnects or the rounds are played"""
+        try:
+            async with self._slots:
+                self._tables += 1
+                try:
+                    await self._play(reader, writer)
+                finally:
+                    self._tables -= 1
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            pass
+        except LineTooLong as e:
+            with suppress(ConnectionError, asyncio.TimeoutError):
+                writer.write(_encode({"type": "error", "message": str(e)}))
+                await asyncio.wait_for(writer.drain(), self._timeout)
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _play(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        agent = RemoteAgent(reader, writer, timeout=self._timeout)
+        game = AsyncBlackjack(player=agent, dealer=self._dealer, seed=self._rng.spawn(1)[0], **self._settings)
+        await agent.send(
+            {"type": "hello", "rounds": self._rounds, "decks": game.shoe.decks, "rules": game.rules.to_dict()}
+        )
+
+        bankroll = 0
+        played = 0
+        while self._rounds is None or played < self._rounds:
+            score = await game.play(rounds=1, stats=self._stats)
+            bankroll += score
+            played += 1
+            state = game.state()
+            await agent.send({
+                "type": "result",
+                "hand": list(state.hand.codes),
+                "dealer": list(state.dealer.codes),
+                "total": state.hand.value,
+                "dealer_total": state.dealer.value,
+                "score": score,
+                "bankroll": bankroll,
+            })
+
+
+async def play_remote(
+    agent: Agent,
+    rounds: int | None = None,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    path: str | PathLike | None = None,
+) -> float:
+    """Play at a TableServer table with a local agent (e.g. a bot).
+
+    :param agent: The player. Decides from the visible state only: the shoe's composition isn't sent.
+    :param rounds: Rounds to play, or None to play until the server ends the game
+    :param host: Server host
+    :param port: Server port
+    :param path: Server Unix socket, instead of the host & port
+    :return: player's total score
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+
+    rules = DEFAULT_RULES
+    bankroll = 0
+    played = 0
+    try:
+        while rounds is None or played < rounds:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if message["type"] == "hello":
+                rules = Rules.from_dict(message["rules"])
+            elif message["type"] == "state":
+                # The dealer's face-down card is never sent: the state only holds its face-up cards
+                dealer = Hand(message["dealer"])
+                state = GameState(dealer, Hand(message["hand"]), bankroll, rules=rules, hole_card=False)
+                action = await _resolve(agent.pick_action(state))
+                writer.write(action.value.encode() + b"\n")
+                await writer.drain()
+            elif message["type"] == "result":
+                bankroll = message["bankroll"]
+                played += 1
+    finally:
+        writer.close()
+        with suppress(ConnectionError):
+            await writer.wait_closed()
+    return bankroll
+
+
+async def _serve_forever(args: dict):
+    server = TableServer(
+        dealer=args["dealer"],
+        rounds=args["rounds"],
+        max_tables=args["max_tables"],
+        timeout=args["timeout"],
+        seed=args["seed"],
+        rules=Rules.from_args(args),
+    )
+    listener = await server.start(args["host"], args["port"], args["unix"])
+    where = args["unix"] or f"{args['host']}:{args['port']}"
+    print(f"Serving tables on {where}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        print(server.stats)
+
+
+async def _run_bots(args: dict) -> list[float]:
+    rng = np.random.default_rng(args["seed"])
+    rules = Rules.from_args(args)
+    bots = [
+        play_remote(
+            Blackjack.create_agent(args["player"], is_player=True, rng=child, rules=rules),
+            args["rounds"],
+            host=args["host"],
+            port=args["port"],
+            path=args["unix"],
+        )
+        for child in rng.spawn(args["clients"])
+    ]
+    return await asyncio.gather(*bots)
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.server",
+        description="Host many tables on one event loop, or connect bots to a table server.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Start a table server")
+    serve_parser.add_argument("--dealer", type=str, default="casino", help="Agent type for the dealer")
+    serve_parser.add_argument("--max-tables", type=int, default=1_000, help="Max # of tables played at once")
+    serve_parser.add_argument(
+        "--timeout", type=float, default=60.0, help="Seconds a client has to answer before it is disconnected"
+    )
+
+    bots_parser = commands.add_parser("bots", help="Connect bots to a table server")
+    bots_parser.add_argument("--player", type=str, default="basic", help="Agent type for the bots")
+    bots_parser.add_argument("--clients", type=int, default=100, help="Number of bots connected at once")
+
+    for sub in (serve_parser, bots_parser):
+        sub.add_argument("--host", type=str, default="127.0.0.1", help="Host to listen on / connect to")
+        sub.add_argument("--port", type=int, default=8765, help="Port to listen on / connect to")
+        sub.add_argument("--unix", type=str, default=None, help="Unix socket to use instead of a TCP port")
+        sub.add_argument("--rounds", type=int, default=None, help="Rounds per connection (default: unlimited)")
+        sub.add_argument("--seed", type=int, default=None, help="Seed for the random number generators")
+        Rules.add_arguments(sub)
+
+    args = vars(parser.parse_args())
+    try:
+        Rules.from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+if __name__ == "__main__":
+    args = _parse()
+    if args["command"] == "serve":
+        with suppress(KeyboardInterrupt):
+            asyncio.run(_serve_forever(args))
+    else:
+        start = time.perf_counter()
+        bankrolls = asyncio.run(_run_bots(args))
+        elapsed = time.perf_counter() - start
+        hands = args["clients"] * args["rounds"] if args["rounds"] is not None else None
+        print(f"Bots: {len(bankrolls)}, total score: {sum(bankrolls)}")
+        if hands:
+            print(f"EV per hand: {sum(bankrolls) / hands:.5f}, hands per second: {hands / elapsed:,.0f}")
@@ -0,0 +1,143 @@
+"""
+Streaming statistics of per-hand scores, in O(1) memory.
+"""
+from __future__ import annotations
+
+import math
+from functools import partialmethod
+
+import numpy as np
+
+# z-score of a two-sided 95% confidence interval
+Z_95 = 1.959963984540054
+
+
+class HandStats:
+    """
+    Running mean & variance (Welford's algorithm) of per-hand scores, and counts of each hand outcome.
+
+    Wins, pushes and losses split hands by the sign of their score. Blackjacks (player dealt a natural)
+    and surrenders are counted on top of that. Accumulators from separate runs can be merged.
+    """
+
+    __slots__ = ("_hands", "_mean", "_m2", "_wins", "_pushes", "_losses", "_blackjacks", "_surrenders")
+
+    def __init__(self):
+        self._hands = 0
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared differences from the mean
+        self._wins = 0
+        self._pushes = 0
+        self._losses = 0
+        self._blackjacks = 0
+        self._surrenders = 0
+
+    def add(self, score: float, *, blackjack: bool = False, surrender: bool = False):
+        """Record one hand"""
+        self._hands += 1
+        delta = score - self._mean
+        self._mean += delta / self._hands
+        self._m2 += delta * (score - self._mean)
+
+        if score > 0:
+            self._wins += 1
+        elif score < 0:
+            self._losses += 1
+        else:
+            self._pushes += 1
+        self._blackjacks += blackjack
+        self._surrenders += surrender
+
+    def add_batch(self, scores: np.ndarray, blackjack: np.ndarray, surrender: np.ndarray):
+        """Record many hands at once (see HandStats.add)"""
+        n = len(scores)
+        if n == 0:
+            return
+        mean = float(scores.mean())
+        self._combine(n, mean, float(((scores - mean) ** 2).sum()))
+
+        wins = int((scores > 0).sum())
+        losses = int((scores < 0).sum())
+        self._wins += wins
+        self._losses += losses
+        self._pushes += n - wins - losses
+        self._blackjacks += int(blackjack.sum())
+        self._surrenders += int(surrender.sum())
+
+    def merge(self, other: HandStats) -> HandStats:
+        """Add the hands recorded by another accumulator to this one"""
+        self._combine(other._hands, other._mean, other._m2)
+        self._wins += other._wins
+        self._pushes += other._pushes
+        self._losses += other._losses
+        self._blackjacks += other._blackjacks
+        self._surrenders += other._surrenders
+        return self
+
+    def _combine(self, n: int, mean: float, m2: float):
+        """Chan et al.'s parallel update of the mean & squared differences"""
+        if n == 0:
+            return
+        total = self._hands + n
+        delta = mean - self._mean
+        self._mean += delta * n / total
+        self._m2 += m2 + delta * delta * self._hands * n / total
+        self._hands = total
+
+    @property
+    def hands(self) -> int:
+        return self._hands
+
+    @property
+    def mean(self) -> float:
+        """Expected score per hand"""
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the per-hand score"""
+        return self._m2 / (self._hands - 1) if self._hands > 1 else math.inf
+
+    @property
+    def stderr(self) -> float:
+        """Standard error of the mean"""
+        return math.sqrt(self.variance / self._hands) if self._hands > 1 else math.inf
+
+    def ci(self, z: float = Z_95) -> float:
+        """Half-width of the confidence interval of the mean (95% by default)"""
+        return z * self.stderr
+
+    @property
+    def wins(self) -> int:
+        return self._wins
+
+    @property
+    def pushes(self) -> int:
+        return self._pushes
+
+    @property
+    def losses(self) -> int:
+        return self._losses
+
+    @property
+    def blackjacks(self) -> int:
+        return self._blackjacks
+
+    @property
+    def surrenders(self) -> int:
+        return self._surrenders
+
+    def _display(self) -> str:
+        hands = max(self._hands, 1)
+        return "\n".join((
+            f"Hands played: {self._hands}",
+            f"EV per hand: {self._mean: .5f} +/- {self.ci():.5f} (95% CI)",
+            f"Std dev per hand: {math.sqrt(self.variance) if self._hands > 1 else math.inf:.5f}",
+            f"Wins / Pushes / Losses: "
+            f"{self._wins / hands:.2%} / {self._pushes / hands:.2%} / {self._losses / hands:.2%}",
+            f"Blackjacks: {self._blackjacks} ({self._blackjacks / hands:.2%})",
+            f"Surrenders: {self._surrenders} ({self._surrenders / hands:.2%})",
+        ))
+
+    __str__ = partialmethod(_display)
+    __repr__ = partialmethod(_display)
@@ -0,0 +1,202 @@
+"""
+Strategy tables. Computes the expected score of every action in every player state, using exact dealer
+probabilities (see blackjack.probability), and the action which maximizes it.
+
+Strategy tables are policy tables (see blackjack.policy) indexed by
+[player total, soft, dealer upcard, first decision], and follow the game's rules:
+-- The player acts until they stand, surrender or reach 21
+-- Double down is only allowed on the first decision, on the hands the rules allow (see Rules.double).
+   The player keeps acting after doubling down.
+-- Surrender is allowed if the rules allow it, for a fixed score of -0.5
+-- Splitting is not supported, so a pair is played as its total
+Tables are cached per shoe composition & rules (see Rules), so games playing the same rules share them.
+
+Run `python -m blackjack.strategy -h` to generate a table file.
+"""
+from __future__ import annotations
+
+import argparse
+from functools import cache, lru_cache
+from os import PathLike
+
+import numpy as np
+
+from blackjack import probability
+from blackjack.core import Action, Rules
+from blackjack.core.rules import DEFAULT_RULES, SURRENDER_SCORE
+from blackjack.policy import TABLE_SHAPE, UPCARDS, load_table, save_table
+from blackjack.utils import BLACKJACK
+
+Composition = tuple[int, ...] | None
+
+class _Model:
+    """Expected scores of a player facing a given shoe. Follows `table` if given, otherwise plays optimally."""
+
+    def __init__(self, composition: Composition, rules: Rules, table: np.ndarray | None = None):
+        self._draws = probability.draw_probabilities(composition)
+        self._rules = rules
+        self._dealer = [None] * UPCARDS
+        for upcard in probability.VALUES:
+            shoe = composition
+            if shoe is not None and shoe[upcard - 2] > 0:
+                shoe = probability.remove(shoe, upcard)
+            self._dealer[upcard] = probability.dealer_distribution(upcard, shoe, hit_soft_17=rules.hit_soft_17)
+        self._table = table
+
+        self.value = cache(self.value)
+        self.action_values = cache(self.action_values)
+
+    def dealer(self, upcard: int) -> tuple[float, ...]:
+        return self._dealer[upcard]
+
+    def _draw(self, total: int, soft: bool, upcard: int, multiplier: int) -> float:
+        """Expected score after drawing a card (and continuing to play)"""
+        expected = 0.0
+        for value, p in zip(probability.VALUES, self._draws):
+            if p:
+                new_total, new_soft = probability.add_card(total, soft, value)
+                expected += p * self.value(new_total, new_soft, upcard, False, multiplier)
+        return expected
+
+    def action_values(self, total: int, soft: bool, upcard: int, first: bool, multiplier: int = 1) -> dict:
+        """Expected score of each legal action"""
+        values = {
+            Action.STAND: multiplier * probability.stand_ev(total, self._dealer[upcard]),
+            Action.HIT: self._draw(total, soft, upcard, multiplier),
+        }
+        if self._rules.surrender:
+            values[Action.SURRENDER] = SURRENDER_SCORE
+        if first and self._rules.can_double(total, soft):
+            values[Action.DOUBLE_DOWN] = self._draw(total, soft, upcard, 2)
+        return values
+
+    def value(self, total: int, soft: bool, upcard: int, first: bool, multiplier: int = 1) -> float:
+        """Expected score of a hand before the player acts"""
+        if total > BLACKJACK:
+            return -multiplier
+        if total == BLACKJACK:
+            return multiplier * probability.stand_ev(total, self._dealer[upcard])
+        if self._table is None:
+            return max(self.action_values(total, soft, upcard, first, multiplier).values())
+
+        action = Action.from_code(self._table[total, int(soft), upcard, int(first)])
+        match action:
+            case Action.DOUBLE_DOWN:  # The game doubles even if it's not the first decision
+                return self._draw(total, soft, upcard, 2)
+            case Action.SPLIT:
+                raise ValueError("Invalid action: ", action)
+        values = self.action_values(total, soft, upcard, first, multiplier)
+        return values.get(action, values[Action.STAND])  # Surrender isn't allowed: played as Stand
+
+
+def _states(first: bool):
+    """Every (total, soft, upcard) state where the player can act, on their first decision or a later one"""
+    for upcard in probability.VALUES:
+        for total in range(4, BLACKJACK):
+            yield total, False, upcard
+        for total in range(12, BLACKJACK):
+            yield total, True, upcard
+
+
+@lru_cache(maxsize=64)
+def solve(composition: Composition = None, *, rules: Rules = DEFAULT_RULES) -> np.ndarray:
+    """The strategy table maximizing expected score. The table is cached per composition & rules, and read-only.
+
+    Later decisions share one table entry whether the hand was doubled or not. They maximize the score of the
+    undoubled hand, which also maximizes the doubled one unless surrendering (for a fixed score) is allowed.
+
+    :param composition: Cards remaining in the shoe (see probability.shoe_composition). None for an infinite shoe.
+    :param rules: The game's rules. Only the playing rules matter: the shoe is given by the composition.
+    """
+    model = _Model(composition, rules)
+    table = np.full(TABLE_SHAPE, Action.STAND.code, dtype=np.uint8)
+    for first in (False, True):
+        for total, soft, upcard in _states(first):
+            values = model.action_values(total, soft, upcard, first)
+            table[total, int(soft), upcard, int(first)] = max(values, key=values.get).code
+        # A table plays later decisions alike at any stake, so first decisions (e.g. doubling down) are valued by
+        # following the table afterwards, rather than by playing each stake optimally
+        model = _Model(composition, rules, table)
+
+    table.flags.writeable = False
+    return table
+
+
+def expected_score(
+    table: np.ndarray | None = None,
+    composition: Composition = None,
+    *,
+    rules: Rules = DEFAULT_RULES,
+) -> float:
+    """Exact expected score per hand of playing a strategy table (the optimal table if None, see solve).
+
+    The initial deal is drawn from the composition, which is then treated as fixed for the rest of the hand.
+    """
+    if table is None:
+        table = solve(composition, rules=rules)
+    model = _Model(composition, rules, table)
+    draws = list(zip(probability.VALUES, model._draws))
+
+    expected = 0.0
+    for upcard, p_up in draws:
+        dealer = model.dealer(upcard)
+        for first, p_first in draws:
+            for second, p_second in draws:
+                p = p_up * p_first * p_second
+                total, soft = probability.add_card(*probability.add_card(0, False, first), second)
+                if total == BLACKJACK:  # The blackjack bonus is only paid if neither hand busts
+                    expected += p * (rules.blackjack_payout * sum(dealer[:-2]) + dealer[probability.BUST])
+                else:
+                    expected += p * model.value(total, soft, upcard, True)
+    return expected
+
+
+def save(table: np.ndarray, path: str | PathLike):
+    """Save a strategy table to disk"""
+    save_table(path, np.asarray(table, dtype=np.uint8))
+
+
+def load(path: str | PathLike, *, mmap: bool = True) -> np.ndarray:
+    """Load a strategy table saved with strategy.save. Memory-mapped read-only by default (see policy.load_table)"""
+    return load_table(path, TABLE_SHAPE, np.uint8, mmap=mmap)
+
+
+def format_table(table: np.ndarray, first: bool = True) -> str:
+    """Human-readable chart of a strategy table"""
+    symbols = {Action.HIT: "H", Action.STAND: "S", Action.DOUBLE_DOWN: "D", Action.SURRENDER: "R", Action.SPLIT: "P"}
+    upcards = probability.VALUES
+    lines = ["     " + " ".join(f"{'A' if u == 11 else u:>2}" for u in upcards)]
+    for soft, totals in ((False, range(5, BLACKJACK)), (True, range(13, BLACKJACK))):
+        for total in totals:
+            row = (symbols[Action.from_code(table[total, int(soft), u, int(first)])] for u in upcards)
+            lines.append(f"{'S' if soft else 'H'}{total:<3} " + " ".join(f"{a:>2}" for a in row))
+    return "\n".join(lines)
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.strategy",
+        description="Generate an EV-maximizing strategy table for the table-lookup agent.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--output", "-o", type=str, default=None, help="File to save the table to (.npy)")
+    parser.add_argument(
+        "--decks",
+        type=int,
+        default=0,
+        help="Number of decks in the shoe for a composition-dependent table. 0 = infinite shoe",
+    )
+    Rules.add_arguments(parser, shoe=False)
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    args = _parse()
+    shoe = probability.shoe_composition(args["decks"]) if args["decks"] > 0 else None
+    rules = Rules.from_args(args, decks=max(args["decks"], 1))
+    strategy = solve(shoe, rules=rules)
+
+    print(format_table(strategy))
+    print(f"Expected score per hand: {expected_score(strategy, shoe, rules=rules): .4f}")
+    if args["output"]:
+        save(strategy, args["output"])
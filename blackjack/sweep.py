@@ -0,0 +1,371 @@
+"""
+Parameter sweeps. Plays every cell of a grid of agent hyperparameters & rule settings (e.g. QLearningAgent's alpha,
+epsilon, gamma and train_rounds, or Rules.hit_soft_17) for one or more seeds, across a pool of worker processes.
+
+Every result is stored in an on-disk cache (see ResultCache), keyed by a hash of the cell's full config plus its
+seed, as soon as it is computed. A sweep skips the cells already in its cache, so an interrupted sweep resumes
+where it stopped, and a sweep overlapping an earlier one only plays the new cells. Seeded cells are reproducible,
+so a cached result is exactly what replaying the cell would give.
+
+A cell's config holds the game settings (see GAME_DEFAULTS), the rules (see Rules) and the player's hyperparameters
+(every other setting, passed to the player agent). Settings left out get their defaults, so configs which only
+differ by spelling out a default share their results.
+
+Run `python -m blackjack.sweep -h` to run a sweep from the command line, e.g.
+
+    python -m blackjack.sweep --player q --grid alpha=0.05,0.1,0.2 --grid epsilon=0.05,0.1 --seeds 0 1 2
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from functools import partial
+from os import PathLike
+from typing import Iterable, Iterator
+
+import numpy as np
+from tqdm import tqdm
+
+from blackjack.agents import Agent
+from blackjack.blackjack import Blackjack
+from blackjack.core import Rules
+from blackjack.core.rules import DEFAULT_RULES
+from blackjack.stats import Z_95, HandStats
+
+# Version of the cached results. Bumped whenever the engine changes what a cell scores, so stale results are ignored.
+CACHE_VERSION = 4
+
+# Game settings of a cell, and their defaults
+GAME_DEFAULTS = {"player": "q", "dealer": "casino", "hands": 100_000, "train_rounds": 10_000, "train_tables": 0}
+# Rule settings of a cell (see Rules)
+RULE_FIELDS = tuple(f.name for f in fields(Rules))
+# Agent arguments run_cell sets itself, which a cell can't set
+_RUN_SETTINGS = {"self", "is_player", "trainable", "rng", "decks", "rules"}
+# Spellings of boolean rule settings
+_BOOLEANS = {"true": True, "false": False, "yes": True, "no": False, "1": True, "0": False}
+
+
+def grid(**axes: Iterable) -> list[dict]:
+    """Every combination of the given settings, e.g. grid(alpha=[0.1, 0.2], hit_soft_17=[False, True])"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(list(v) for v in axes.values()))]
+
+
+def normalize(cell: dict) -> dict:
+    """The full config of a cell: {game settings..., "rules": {...}, "agent": {...}}, with defaults filled in
+
+    :raises ValueError: for rule settings of the wrong type, or agent settings the player's agent does not take
+    """
+    config = {name: cell.get(name, default) for name, default in GAME_DEFAULTS.items()}
+    rules = {name: _rule_value(name, cell[name]) for name in RULE_FIELDS if name in cell}
+    config["rules"] = Rules(**rules).to_dict()
+    config["agent"] = {name: value for name, value in cell.items() if name not in GAME_DEFAULTS and name not in rules}
+    settings = agent_settings(config["player"])
+    unknown = sorted(set(config["agent"]) - settings)
+    if unknown:
+        raise ValueError(
+            f"Unknown settings for the {config['player']} agent: {', '.join(unknown)}. "
+            f"Expected rule settings ({', '.join(RULE_FIELDS)}) "
+            f"or agent settings ({', '.join(sorted(settings)) or 'none'})"
+        )
+    return config
+
+
+def _rule_value(name: str, value):
+    """A rule setting cast to its type, so e.g. a penetration of 1 and 1.0 are the same rules"""
+    kind = type(getattr(DEFAULT_RULES, name))
+    if kind is bool and isinstance(value, str):
+        if value.strip().lower() not in _BOOLEANS:
+            raise ValueError(f"Expected true or false for {name}, got {value!r}")
+        return _BOOLEANS[value.strip().lower()]
+    cast = kind(value)
+    # Refuse lossy casts, e.g. 1.5 decks or a surrender of 2
+    if not isinstance(value, str) and cast != value:
+        raise ValueError(f"Expected {name} to be {kind.__name__}, got {value!r}")
+    return cast
+
+
+def agent_settings(player: str) -> set[str]:
+    """Names of the settings a sweep can give an agent type: the keyword arguments of its constructors
+
+    :param player: CLI name of the agent (see Blackjack.agent_types)
+    """
+    factory = Blackjack.agent_type(player)
+    fixed = set()
+    if isinstance(factory, partial):
+        fixed, factory = set(factory.keywords), factory.func
+    names = set()
+    for kind in factory.__mro__:
+        if issubclass(kind, Agent) and "__init__" in vars(kind):
+            parameters = inspect.signature(kind.__init__).parameters.values()
+            names.update(p.name for p in parameters if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY))
+    return names - fixed - _RUN_SETTINGS
+
+
+def config_hash(config: dict) -> str:
+    """Stable hash of a normalized config (see normalize)"""
+    canonical = json.dumps({"version": CACHE_VERSION, **config}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Sweep results on disk, one small JSON file per (config, seed) in a directory.
+
+    Files are written atomically (to a temporary file, then renamed), so an interrupted sweep never leaves a
+    partial result behind, and several sweeps can share a cache directory.
+    """
+
+    def __init__(self, path: str | PathLike):
+        self._path = os.fspath(path)
+        os.makedirs(self._path, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @staticmethod
+    def key(config: dict, seed: int) -> str:
+        return f"{config_hash(config)}-{seed}"
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self._path, f"{key}.json")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._file(key))
+
+    def get(self, key: str) -> dict | None:
+        """The cached result, or None if the cell hasn't been computed"""
+        try:
+            with open(self._file(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, result: dict):
+        """Store a result (see run_cell)"""
+        path = self._file(result["key"])
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f, sort_keys=True)
+        os.replace(tmp, path)
+
+    def __iter__(self) -> Iterator[dict]:
+        """Every cached result"""
+        for name in sorted(os.listdir(self._path)):
+            if name.endswith(".json"):
+                result = self.get(name[:-len(".json")])
+                if result is not None:
+                    yield result
+
+
+def run_cell(config: dict, seed: int) -> dict:
+    """Train & play a player with one config (see normalize). Runs in a worker process.
+
+    :return: the result: the config, seed, EV per hand with its 95% CI, hand outcome counts and run time
+    """
+    start = time.perf_counter()
+    rules = Rules(**config["rules"])
+    agent_seed, game_seed = np.random.SeedSequence(seed).spawn(2)
+    player = Blackjack.create_agent(
+        config["player"],
+        is_player=True,
+        rng=np.random.default_rng(agent_seed),
+        decks=rules.decks,
+        rules=rules,
+        **config["agent"],
+    )
+    game = Blackjack(
+        player=player,
+        dealer=config["dealer"],
+        verbose=False,
+        train_rounds=config["train_rounds"],
+        train_tables=config["train_tables"],
+        rules=rules,
+        seed=game_seed,
+    )
+    stats = HandStats()
+    game.play(rounds=config["hands"], stats=stats)
+    return {
+        "key": ResultCache.key(config, seed),
+        "config": config,
+        "seed": seed,
+        "ev": stats.mean,
+        "ci": stats.ci(),
+        "hands": stats.hands,
+        "wins": stats.wins,
+        "pushes": stats.pushes,
+        "losses": stats.losses,
+        "blackjacks": stats.blackjacks,
+        "surrenders": stats.surrenders,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def sweep(
+    cells: Iterable[dict],
+    seeds: Iterable[int] = (0,),
+    *,
+    cache: ResultCache | str | PathLike,
+    workers: int = 1,
+    progress: bool = True,
+) -> list[dict]:
+    """Run every cell for every seed, skipping the ones already cached.
+
+    :param cells: Settings of each cell (see grid & normalize)
+    :param seeds: Seeds each cell is played with
+    :param cache: Cache (or cache directory) results are read from & stored to, as soon as they are computed
+    :param workers: Number of worker processes. Cells are run in this process if 1.
+    :param progress: Show a progress bar
+    :return: the results of every (cell, seed), in order
+    """
+    cache = cache if isinstance(cache, ResultCache) else ResultCache(cache)
+    seeds = list(seeds)
+    jobs = {}
+    for config in map(normalize, cells):
+        for seed in seeds:
+            jobs.setdefault(ResultCache.key(config, seed), (config, seed))
+    todo = [(key, job) for key, job in jobs.items() if key not in cache]
+    if progress:
+        print(f"Cells: {len(jobs)}, cached: {len(jobs) - len(todo)}, to run: {len(todo)}")
+
+    if workers <= 1:
+        for key, (config, seed) in tqdm(todo, disable=not progress):
+            cache.put(run_cell(config, seed))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(run_cell, config, seed) for key, (config, seed) in todo]
+            for future in tqdm(as_completed(futures), total=len(futures), disable=not progress):
+                cache.put(future.result())
+        finally:
+            # Cells which haven't started are dropped on interruption, the finished ones are already cached
+            pool.shutdown(cancel_futures=True)
+    return [cache.get(key) for key in jobs]
+
+
+def summarize(results: Iterable[dict]) -> list[dict]:
+    """Merge the results of each config across seeds.
+
+    :return: one row per config, best EV first: the config, its seeds, EV per hand and 95% CI of the merged hands
+    """
+    merged: dict[str, dict] = {}
+    for result in results:
+        key = config_hash(result["config"])
+        row = merged.setdefault(key, {"config": result["config"], "seeds": [], "hands": 0, "_sum": 0.0, "_var": 0.0})
+        row["seeds"].append(result["seed"])
+        row["hands"] += result["hands"]
+        row["_sum"] += result["ev"] * result["hands"]
+        row["_var"] += (result["ci"] / Z_95 * result["hands"]) ** 2
+    rows = []
+    for row in merged.values():
+        hands = max(row["hands"], 1)
+        rows.append({
+            "config": row["config"],
+            "seeds": sorted(row["seeds"]),
+            "hands": row["hands"],
+            "ev": row.pop("_sum") / hands,
+            "ci": Z_95 * math.sqrt(row.pop("_var")) / hands,
+        })
+    return sorted(rows, key=lambda row: row["ev"], reverse=True)
+
+
+def _flatten(config: dict) -> dict:
+    return {
+        **{name: config[name] for name in GAME_DEFAULTS},
+        **config["rules"],
+        **config["agent"],
+    }
+
+
+def format_summary(rows: list[dict]) -> str:
+    """Table of summarized results (see summarize), showing only the settings which vary between configs.
+    The hands played per config, across its seeds, are shown as "played", apart from the hands setting of a cell."""
+    if not rows:
+        return "No results"
+    flat = [_flatten(row["config"]) for row in rows]
+    names = [name for name in dict.fromkeys(k for f in flat for k in f) if len({str(f.get(name)) for f in flat}) > 1]
+    columns = [*names, "seeds", "played", "ev", "ci"]
+    cells = [
+        [*(str(f.get(name, "")) for name in names), str(len(row["seeds"])), str(row["hands"]),
+         f"{row['ev']: .5f}", f"{row['ci']:.5f}"]
+        for f, row in zip(flat, rows)
+    ]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells]
+    return "\n".join(lines)
+
+
+def _axis(text: str) -> tuple[str, list]:
+    """Parse a NAME=V1,V2,... grid axis. Values are JSON (numbers, true/false, ...) or plain strings."""
+    name, sep, values = text.partition("=")
+    if not sep or not name or not values:
+        raise argparse.ArgumentTypeError(f"Expected NAME=VALUE[,VALUE...], got {text!r}")
+
+    def value(v: str):
+        try:
+            return json.loads(v)
+        except json.JSONDecodeError:
+            return v
+
+    return name.strip().replace("-", "_"), [value(v.strip()) for v in values.split(",")]
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.sweep",
+        description="Sweep a grid of agent hyperparameters & rule settings, caching every result on disk.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--grid", type=_axis, action="append", default=[], metavar="NAME=V1,V2,...",
+        help=f"Values of one setting: a player hyperparameter (e.g. alpha), a rule ({', '.join(RULE_FIELDS)}) "
+             f"or a game setting ({', '.join(GAME_DEFAULTS)}). Repeat for every swept setting.",
+    )
+    parser.add_argument("--player", type=str, default=GAME_DEFAULTS["player"], help="Agent type for the player")
+    parser.add_argument("--dealer", type=str, default=GAME_DEFAULTS["dealer"], help="Agent type for the dealer")
+    parser.add_argument("--hands", type=int, default=GAME_DEFAULTS["hands"], help="Hands played per cell & seed")
+    parser.add_argument(
+        "--train-rounds", type=int, default=GAME_DEFAULTS["train_rounds"], help="Hands trainable players train for"
+    )
+    parser.add_argument(
+        "--train-tables", type=int, default=GAME_DEFAULTS["train_tables"],
+        help="Train on this many tables in lockstep. 0 = train one hand at a time.",
+    )
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="Seeds every cell is played with")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--cache", type=str, default="sweep-cache", help="Directory of cached results")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Also save the summary to this file (.json)")
+    Rules.add_arguments(parser)
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    args = _parse()
+    axes = dict(args["grid"])
+    try:
+        base = {**{name: args[name] for name in GAME_DEFAULTS}, **Rules.from_args(args).to_dict()}
+        results = sweep(
+            [{**base, **cell} for cell in grid(**axes)],
+            args["seeds"],
+            cache=args["cache"],
+            workers=args["workers"],
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    except KeyboardInterrupt:
+        raise SystemExit(f"Interrupted. Finished cells are cached in {args['cache']}: rerun the sweep to resume.")
+    summary = summarize(results)
+    print(format_summary(summary))
+    if args["output"]:
+        with open(args["output"], "w") as f:
+            json.dump(summary, f, indent=2)
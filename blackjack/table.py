@@ -0,0 +1,257 @@
+"""
+Multi-seat tables. Up to MAX_SEATS players share one shoe and one dealer, like a casino table.
+
+Cards are dealt in casino order: one card to every seat, the dealer's face-down card, a second card to every
+seat, then the dealer's face-up card. Seats then act in lockstep: at every step, each agent decides for all of
+its seats still in play with a single `Agent.pick_actions` call, and the hits are dealt in seat order.
+The dealer plays once for the whole table, unless every seat bust, and each seat is scored against the
+dealer's hand exactly like `Blackjack._score_hands`. Bust seats always lose, as the dealer never plays against a
+bust hand in a single-player game.
+
+Run `python -m blackjack.table -h` to play a table from the command line.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Sequence
+
+import numpy as np
+
+from blackjack import compiler, utils
+from blackjack.agents import Agent
+from blackjack.blackjack import Blackjack
+from blackjack.core import Action, GameState, Hand, Rules, card_codes
+from blackjack.stats import HandStats
+
+MAX_SEATS = 7
+
+
+class _Seat:
+    """A player's seat: its agent, hand, and the state of its current round"""
+
+    __slots__ = ("agent", "hand", "multiplier", "surrender", "score")
+
+    def __init__(self, agent: Agent):
+        self.agent = agent
+        self.hand = Hand()
+        self.multiplier = 1.0
+        self.surrender = False
+        self.score = 0
+
+    def reset(self):
+        self.hand = Hand()
+        self.multiplier = 1.0
+        self.surrender = False
+
+
+class Table(Blackjack):
+    """
+    A game of blackjack with several players sharing the shoe & dealer.
+
+    Seats given by agent type get an agent of their own. An agent given for several seats (e.g.
+    `Table(seats=[agent] * 7)`) decides for all of them with one batched call per step. Agents which follow
+    their own hand between decisions (e.g. card counters) need one agent per seat.
+    Trainable agents aren't trained at a table: give them a pretrained table (see Blackjack).
+    """
+
+    def __init__(self, *, seats: Sequence[str | Agent] = ("basic",), verbose: bool = False, **kwargs):
+        """
+        :param seats: Agent type (see Blackjack.agent_types) or agent for each seat, from the dealer's left
+        :param verbose: Print the game state after every round
+        :param kwargs: Other game settings (see Blackjack)
+        """
+        if not 1 <= len(seats) <= MAX_SEATS:
+            raise ValueError(f"A table seats 1 to {MAX_SEATS} players, got {len(seats)}")
+        if kwargs.get("recorder") is not None:
+            raise ValueError("Hand histories record single-player games only")
+        kwargs["train_rounds"] = 0
+        kwargs["train_tables"] = 0
+        super(Table, self).__init__(player=seats[0], verbose=verbose, **kwargs)
+
+        # The first seat's agent is created by Blackjack, the other seats get child streams of the game's rng
+        agents = [self._player]
+        table = kwargs.get("table")
+        for seat, rng in zip(seats[1:], self._rng.spawn(len(seats) - 1)):
+            if not isinstance(seat, Agent):
+                seat = self.create_agent(
+                    seat,
+                    is_player=True,
+                    rng=rng,
+                    decks=self._rules.decks,
+                    rules=self._rules,
+                    **({"table": table} if table else {}),
+                )
+            agents.append(seat)
+        self._seats = [_Seat(agent) for agent in agents]
+        # Seats grouped by agent, in seat order, so every agent gets one decision call per step.
+        # Compiled agents (see blackjack.compiler) decide by table lookup instead.
+        self._agents: dict[int, tuple[Agent, list[int], np.ndarray | None]] = {}
+        for i, agent in enumerate(agents):
+            if id(agent) not in self._agents:
+                if agent is self._player:  # Already compiled by Blackjack, if compiling
+                    flat = self._player_table
+                else:
+                    flat = self._compile(agent) if kwargs.get("compiled", True) else None
+                self._agents[id(agent)] = (agent, [], flat)
+            self._agents[id(agent)][1].append(i)
+
+    @property
+    def seats(self) -> int:
+        return len(self._seats)
+
+    @property
+    def agents(self) -> list[Agent]:
+        """Agent of each seat"""
+        return [seat.agent for seat in self._seats]
+
+    @property
+    def scores(self) -> list[float]:
+        """Per-seat score of the most recently completed/running game"""
+        return [seat.score for seat in self._seats]
+
+    def _select(self, seat: _Seat):
+        """Point the game's single-player state (see Blackjack) at a seat, to act for or score it"""
+        self._player, self._player_hand = seat.agent, seat.hand
+        self._multiplier, self._surrender = seat.multiplier, seat.surrender
+
+    def _reset_hand(self):
+        super(Table, self)._reset_hand()
+        for seat in self._seats:
+            seat.reset()
+
+    def _init_hands(self) -> None:
+        for seat in self._seats:
+            seat.hand.append(self._shoe.draw())
+        # The dealer's first card is dealt face down
+        self._dealer_hand.append(self._shoe.draw(face_up=False))
+        for seat in self._seats:
+            seat.hand.append(self._shoe.draw())
+        self._dealer_hand.append(self._shoe.draw())
+
+    def seat_state(self, seat: int) -> GameState:
+        """External representation of the current game, as seen from a seat"""
+        seat = self._seats[seat]
+        return GameState(
+            self._dealer_hand,
+            seat.hand,
+            seat.score,
+            hide_dealer=self._hide_dealer,
+            remaining=self._remaining,
+            shuffles=self._shoe.shuffles,
+            rules=self._rules,
+        )
+
+    def _decide(self, acting: list[int]) -> dict[int, Action]:
+        """One batched decision per agent, for all of its seats which are still playing"""
+        upcard = card_codes.VALUES[self._dealer_hand.codes[1]]
+        decisions = {}
+        for agent, seats, flat in self._agents.values():
+            seats = [i for i in seats if i in acting]
+            if not seats:
+                continue
+            if flat is not None:
+                actions = [compiler.action(flat, self._seats[i].hand, upcard) for i in seats]
+            else:
+                actions = agent.pick_actions([self.seat_state(i) for i in seats])
+            decisions.update(zip(seats, actions))
+        return decisions
+
+    def _players_turn(self):
+        """Let every seat act, in lockstep, until it stands or reaches 21"""
+        acting = [i for i, seat in enumerate(self._seats) if seat.hand.value < utils.BLACKJACK]
+        while acting:
+            decisions = self._decide(acting)
+            still = []
+            for i in acting:
+                seat = self._seats[i]
+                self._select(seat)
+                stand = self._act_or_stand(seat.hand, decisions[i])
+                seat.multiplier, seat.surrender = self._multiplier, self._surrender
+                if not stand and seat.hand.value < utils.BLACKJACK:
+                    still.append(i)
+            acting = still
+
+    def _dealer_turn(self) -> None:
+        """Reveal the dealer's hand. Unless every seat bust, the dealer plays once for the whole table."""
+        if all(seat.hand.bust for seat in self._seats):
+            self._reveal_dealer()
+            return
+        # The dealer's decisions only depend on its own hand, so any seat which didn't bust will do
+        self._select(next(seat for seat in self._seats if not seat.hand.bust))
+        super(Table, self)._dealer_turn()
+
+    def _end_round(self) -> None:
+        """Show every agent the final hands of its seats, and the dealer the final hands once"""
+        for seat in range(len(self._seats)):
+            self._seats[seat].agent.observe_round(self.seat_state(seat))
+        self._dealer.observe_round(self.state())
+
+    def _next_round(self, stats: HandStats | None = None) -> float:
+        """Play one round at every seat, returning the table's total score"""
+        self._init_hands()
+        self._players_turn()
+        self._dealer_turn()
+        self._end_round()
+
+        total = 0
+        for seat in self._seats:
+            self._select(seat)
+            # A bust seat loses even if the dealer busts too, as a bust player does in a single-player game
+            score = -seat.multiplier if seat.hand.bust else self._score_hands()
+            seat.score += score
+            total += score
+            if stats is not None:
+                stats.add(score, blackjack=seat.hand.blackjack, surrender=seat.surrender)
+        return total
+
+    def play(self, rounds: int = 10, endless: bool = False, stats: HandStats | None = None) -> float:
+        """Play N rounds at every seat (see Blackjack.play), returning the table's total score.
+        Per-seat scores are in Table.scores."""
+        for seat in self._seats:
+            seat.score = 0
+        return super(Table, self).play(rounds, endless, stats)
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.table",
+        description="Play a multi-seat table sharing one shoe & dealer.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--player", type=str, default="basic", help="Agent type for every seat")
+    parser.add_argument("--seats", type=int, default=MAX_SEATS, help="Number of seats")
+    parser.add_argument(
+        "--separate", action="store_true",
+        help="Give every seat its own agent, instead of one agent deciding for all seats in a batch",
+    )
+    parser.add_argument("--dealer", type=str, default="casino", help="Agent type for the dealer")
+    parser.add_argument("--rounds", type=int, default=10_000, help="Number of rounds to play")
+    parser.add_argument("--table", type=str, default=None, help="Pretrained table file for the players")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the random number generators")
+    Rules.add_arguments(parser, defaults=Rules(decks=6, penetration=0.75))
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    args = _parse()
+    rules = Rules.from_args(args)
+    rng = np.random.default_rng(args["seed"])
+    seats = [args["player"]] * args["seats"]
+    if not args["separate"]:
+        seats = [Blackjack.create_agent(
+            args["player"],
+            is_player=True,
+            rng=rng.spawn(1)[0],
+            decks=rules.decks,
+            rules=rules,
+            **({"table": args["table"]} if args["table"] else {}),
+        )] * args["seats"]
+    game = Table(seats=seats, dealer=args["dealer"], rules=rules, table=args["table"], seed=rng)
+    stats = HandStats()
+    start = time.perf_counter()
+    game.play(args["rounds"], stats=stats)
+    elapsed = time.perf_counter() - start
+    print(stats)
+    print("Score per seat:", game.scores)
+    print(f"Rounds per second: {args['rounds'] / elapsed:,.0f}, hands per second: {stats.hands / elapsed:,.0f}")
@@ -0,0 +1,191 @@
+"""
+Common-random-numbers tournaments. Plays several agents on exactly the same cards, so they can be compared
+with paired differences instead of independent samples.
+
+Every round, each table's shoe deals the same card sequence to every agent (and random policies get the same
+random numbers), then the shoe moves past the cards used by the longest round. Agents whose hands play out
+alike score alike, so the variance of their paired EV difference is far smaller than that of two independent
+runs, and far fewer hands are needed to tell them apart.
+
+Run `python -m blackjack.tournament -h` to compare agents from the command line.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+from os import PathLike
+from typing import Sequence
+
+import numpy as np
+
+from blackjack.agents import Agent
+from blackjack.batch import BatchBlackjack
+from blackjack.blackjack import Blackjack
+from blackjack.core import Rules
+from blackjack.policy import Policy
+from blackjack.stats import HandStats
+
+
+class Tournament(BatchBlackjack):
+    """
+    Plays several agents against the same dealer on identical shoes, at many tables at once.
+    Agents must provide a vectorized policy (see `Agent.policy`), so the user and counter agents can't play,
+    and trainable agents must be given a pretrained table.
+    """
+
+    def __init__(
+        self,
+        agents: Sequence[str | Agent | Policy],
+        *,
+        dealer: str | Agent | Policy = "casino",
+        table: str | PathLike | None = None,
+        **kwargs,
+    ):
+        """
+        :param agents: Agent types (see Blackjack.agent_types), agents or policies to compare.
+                       The first one is the baseline for paired differences.
+        :param dealer: Agent type, agent or policy for the dealer
+        :param table: Pretrained table file for the trainable agents given by type (q, see Blackjack).
+                      Untrained agents are rejected.
+        :param kwargs: Game settings (see BatchBlackjack)
+        """
+        if len(agents) < 2:
+            raise ValueError("A tournament needs at least 2 agents")
+        # The player is a placeholder: each agent's policy is swapped in for its turn (see Tournament._next_rounds)
+        super(Tournament, self).__init__(player="stand", dealer=dealer, **kwargs)
+        self._names = [a if isinstance(a, str) else type(a).__name__ for a in agents]
+        self._policies = [self._agent_policy(a, table) for a in agents]
+        self._stats = [HandStats() for _ in agents]
+        self._paired = [HandStats() for _ in agents[1:]]
+
+    def _agent_policy(self, agent: str | Agent | Policy, table: str | PathLike | None) -> Policy:
+        """The policy of a compared agent. Trainable agents given by type load the pretrained table, if any."""
+        if isinstance(agent, str):
+            rules = self._rules
+            created = Blackjack.create_agent(agent, is_player=True, decks=rules.decks, rules=rules)
+            if created.trainable and table is not None:
+                created = Blackjack.create_agent(agent, is_player=True, decks=rules.decks, rules=rules, table=table)
+            agent = created
+        return self._policy(agent, is_player=True)
+
+    @property
+    def names(self) -> list[str]:
+        return self._names
+
+    @property
+    def stats(self) -> list[HandStats]:
+        """Per-hand statistics of each agent"""
+        return self._stats
+
+    @property
+    def paired(self) -> list[HandStats]:
+        """Statistics of each agent's per-hand score minus the baseline's, on the same cards (from the 2nd agent)"""
+        return self._paired
+
+    def _draw(self, lanes: np.ndarray | slice) -> np.ndarray:
+        """Deal the next card at each of the given tables. A shoe which runs out mid-round wraps around,
+        so every agent sees the same cards, and is reshuffled before the next round."""
+        rows = self._lanes[lanes]
+        pos = self._pos[rows]
+        cards = self._decks.ravel().take(rows * self._shoe_size + pos % self._shoe_size)
+        self._pos[rows] = pos + 1
+        return cards
+
+    def play(self, rounds: int = 10, stats: HandStats | None = None) -> np.ndarray:
+        """Play N rounds with every agent at every table.
+
+        :param rounds: Fixed # of rounds to play
+        :param stats: Ignored, see Tournament.stats
+        :return: each agent's total score at each table, with shape (agents, tables)
+        """
+        totals = np.zeros((len(self._policies), self._tables))
+        for _ in range(rounds):
+            totals += self._next_rounds()
+        return totals
+
+    def _next_rounds(self) -> np.ndarray:
+        """Play one round with every agent from the same shoe positions & random state"""
+        cut = np.flatnonzero(self._pos >= self._cut)
+        if len(cut):
+            self._reshuffle(cut)
+
+        start = self._pos.copy()
+        end = start.copy()
+        rng = self._rng.bit_generator.state
+        scores = np.empty((len(self._policies), self._tables))
+        for i, (policy, stats) in enumerate(zip(self._policies, self._stats)):
+            self._pos[:] = start
+            self._rng.bit_generator.state = rng
+            self._player = policy
+            scores[i] = self._next_round(stats)
+            np.maximum(end, self._pos, out=end)
+        self._pos[:] = end
+
+        no_flags = np.zeros(self._tables, dtype=bool)
+        for i, paired in enumerate(self._paired, start=1):
+            paired.add_batch(scores[i] - scores[0], no_flags, no_flags)
+        return scores
+
+    def report(self) -> str:
+        """Table of each agent's EV per hand, and its paired difference from the baseline"""
+        width = max(len(name) for name in self._names)
+        lines = [
+            f"{'Agent':<{width}}  {'EV/hand':>9}  {'95% CI':>8}  {'vs ' + self._names[0]:>{width + 3}}  "
+            f"{'95% CI':>8}  {'Variance reduction':>18}"
+        ]
+        base = self._stats[0]
+        for i, (name, stats) in enumerate(zip(self._names, self._stats)):
+            line = f"{name:<{width}}  {stats.mean:>9.5f}  {stats.ci():>8.5f}"
+            if i > 0:
+                paired = self._paired[i - 1]
+                # Variance of an unpaired difference over the variance of the paired one
+                unpaired = base.variance + stats.variance
+                ratio = unpaired / paired.variance if paired.variance > 0 else math.inf
+                line += f"  {paired.mean:>{width + 3}.5f}  {paired.ci():>8.5f}  {ratio:>17.1f}x"
+            lines.append(line)
+        lines.append(f"Hands per agent: {base.hands}")
+        return "\n".join(lines)
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.tournament",
+        description="Compare agents on identical shoes, with paired EV differences.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "agents",
+        nargs="+",
+        help="Agent types to compare. The first one is the baseline. "
+        "user and counter can't play, they have no vectorized policy.",
+    )
+    parser.add_argument("--dealer", type=str, default="casino", help="Agent type for the dealer")
+    parser.add_argument("--rounds", type=int, default=100, help="Number of rounds to play at every table")
+    parser.add_argument("--tables", type=int, default=10_000, help="Number of tables played at once")
+    Rules.add_arguments(parser)
+    parser.add_argument(
+        "--table",
+        type=str,
+        default=None,
+        help="Pretrained Q-table file for the q agents (see python -m blackjack.training), which can't play untrained",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the random number generators")
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    args = _parse()
+    try:
+        rules = Rules.from_args(args)
+        tournament = Tournament(
+            args["agents"],
+            dealer=args["dealer"],
+            table=args["table"],
+            tables=args["tables"],
+            rules=rules,
+            seed=args["seed"],
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    tournament.play(args["rounds"])
+    print(tournament.report())
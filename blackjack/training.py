@@ -0,0 +1,129 @@
+"""
+Vectorized Q-learning. Trains a QLearningAgent on many independent tables in lockstep (see batch.BatchBlackjack).
+
+Every round, the player's decisions at all tables are recorded, then the Q-table gets one batched
+temporal-difference update: each decision's target is the discounted best Q-value of the next decision,
+or the round's score if it was the last decision of the hand. Updates hitting the same (state, action)
+in one batch are averaged.
+
+Run `python -m blackjack.training -h` to train a Q-table and save it to a file.
+"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+
+from blackjack.agents.qlearning_agent import QLearningAgent
+from blackjack.batch import BatchBlackjack
+from blackjack.core import Rules
+from blackjack.policy import QPolicy, state_index
+
+
+class _TrainingTables(BatchBlackjack):
+    """Batch engine which records the player's decisions of the current round"""
+
+    def __init__(self, policy: QPolicy, **kwargs):
+        super().__init__(player=policy, **kwargs)
+        self._steps: list[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+
+    def _decided(self, is_player, lanes, total, soft, upcard, first, actions):
+        if is_player:
+            self._steps.append((lanes, state_index(total, soft, upcard), first, actions))
+
+    def round(self) -> tuple[list, np.ndarray]:
+        """Play one round at every table. Returns the recorded decisions and the per-table scores."""
+        self._steps = []
+        score = self._next_round()
+        return self._steps, score
+
+
+def _update(policy: QPolicy, steps: list, score: np.ndarray, alpha: float, gamma: float):
+    """One batched TD update of the policy's Q-table from a round of decisions"""
+    q = policy.q
+    index, targets = [], []
+    for k, (lanes, states, first, actions) in enumerate(steps):
+        target = score[lanes]
+        if k + 1 < len(steps):
+            # Tables which acted again continue from their next decision
+            next_lanes, next_states, next_first, _ = steps[k + 1]
+            pos = np.minimum(np.searchsorted(next_lanes, lanes), len(next_lanes) - 1)
+            more = next_lanes[pos] == lanes
+            pos = pos[more]
+            target[more] = gamma * policy.values(next_states[pos], next_first[pos], True).max(axis=1)
+        index.append(states * q.shape[1] + actions)
+        targets.append(target)
+
+    if not index:
+        return
+    index = np.concatenate(index)
+    errors = np.concatenate(targets) - q.ravel()[index]
+    counts = np.bincount(index, minlength=q.size)
+    sums = np.bincount(index, weights=errors, minlength=q.size)
+    q += (alpha * sums / np.maximum(counts, 1)).reshape(q.shape).astype(q.dtype)
+
+
+def train(
+    agent: QLearningAgent,
+    episodes: int,
+    *,
+    tables: int = 10_000,
+    decks: int = 1,
+    penetration: float = 1.0,
+    rules: Rules | None = None,
+    seed: int | np.random.SeedSequence | np.random.Generator | None = None,
+    alpha: float | None = None,
+    epsilon: float | None = None,
+    gamma: float | None = None,
+) -> QLearningAgent:
+    """Train an agent's Q-table in place, playing against the casino dealer.
+
+    :param agent: Agent to train
+    :param episodes: Number of hands to train for (rounded up to a whole number of rounds at every table)
+    :param tables: Number of tables played at once
+    :param decks: Number of decks in each table's shoe, if no rules are given
+    :param penetration: Fraction of each shoe dealt before it is reshuffled, if no rules are given
+    :param rules: The tables' rules (see Rules). Defaults to the standard rules with the given decks & penetration.
+    :param seed: Seed (or generator) for the shuffles and exploration
+    :param alpha: Learning rate. Defaults to the agent's.
+    :param epsilon: Exploration rate. Defaults to the agent's.
+    :param gamma: Discount factor. Defaults to the agent's.
+    :return: the trained agent
+    """
+    alpha = agent.alpha if alpha is None else alpha
+    epsilon = agent.epsilon if epsilon is None else epsilon
+    gamma = agent.gamma if gamma is None else gamma
+
+    rules = rules if rules is not None else Rules(decks=decks, penetration=penetration)
+
+    tables = max(1, min(tables, episodes))
+    policy = QPolicy(agent.q_values, epsilon, rules)
+    game = _TrainingTables(policy, tables=tables, rules=rules, seed=seed)
+    for _ in range(-(-episodes // tables)):
+        _update(policy, *game.round(), alpha, gamma)
+    return agent
+
+
+def _parse():
+    parser = argparse.ArgumentParser(
+        prog="python3 -m blackjack.training",
+        description="Train a Q-table for the q agent on many tables at once.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--output", "-o", type=str, required=True, help="File to save the Q-table to (.npy)")
+    parser.add_argument("--episodes", type=int, default=2_000_000, help="Number of hands to train for")
+    parser.add_argument("--tables", type=int, default=10_000, help="Number of tables played at once")
+    parser.add_argument("--alpha", type=float, default=0.1, help="Learning rate")
+    parser.add_argument("--epsilon", type=float, default=0.1, help="Exploration rate")
+    parser.add_argument("--gamma", type=float, default=0.8, help="Discount factor")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the random number generators")
+    Rules.add_arguments(parser)
+    return vars(parser.parse_args())
+
+
+if __name__ == "__main__":
+    args = _parse()
+    rules = Rules.from_args(args)
+    agent = QLearningAgent(True, alpha=args["alpha"], epsilon=args["epsilon"], gamma=args["gamma"], rules=rules)
+    train(agent, args["episodes"], tables=args["tables"], rules=rules, seed=args["seed"])
+    agent.save(args["output"])
@@ -1,11 +1,24 @@
-from blackjack.core import Card, CardValue
+from typing import Sequence
 
-BLACKJACK = 21
+from blackjack.core import Card, Hand, card_codes
+from blackjack.core.hand import BLACKJACK
 
+_HARD_VALUES = card_codes.HARD_VALUES
+# Hard value of every byte, for bytes.translate. Only the first DECK_SIZE bytes are card codes.
+_HARD_TABLE = card_codes.HARD_VALUES.ljust(256, b"\0")
 
-def hand_value(hand: list[Card]) -> int:
+
+def hand_codes(hand: Sequence[Card] | bytes | bytearray) -> bytes | bytearray:
+    """Compact card codes of a hand (see blackjack.core.card_codes). Byte strings are returned as-is."""
+    if isinstance(hand, (bytes, bytearray)):
+        return hand
+    return bytes(card.code for card in hand)
+
+
+def hand_value(hand: Hand | Sequence[Card] | bytes | bytearray) -> int:
     """Computes the max value of a hand.
 
+    The hand may be a Hand (O(1), see Hand.value), a list of Cards, or a byte string of card codes.
     If the hand contains an Ace, this will return the maximum value of the hand
     which does not exceed 21.
 
@@ -17,31 +30,23 @@ def hand_value(hand: list[Card]) -> int:
     Hand value: 22 (Aces high) or 12 (2nd ace low)
     Returns: 12 (because 22 would bust)
     """
-    total = sum(hand)
-
-    # Compute Aces Low if necessary
-    bust = False
-    aces = filter(lambda c: c.value is CardValue.ACE, hand)
-    while total > BLACKJACK and not bust:
-        try:
-            next(aces)  # Subtract 10 if there's another Ace in the hand
-            # Aces high: 11
-            # Aces low: 1
-            total -= 10
-        except StopIteration:
-            # No more aces! This is the optimal hand value
-            bust = True
-
+    if isinstance(hand, Hand):
+        return hand.value
+    if isinstance(hand, (bytes, bytearray)):
+        values = hand.translate(_HARD_TABLE)
+    else:  # Cards carry their code, so they are looked up directly instead of being converted to bytes first
+        values = [_HARD_VALUES[card.code] for card in hand]
+    total = sum(values)
+
+    # At most one Ace (the only card with a hard value of 1) can count high without busting
+    if total + 10 <= BLACKJACK and 1 in values:
+        total += 10
     return total
 
 
-def blackjack_hand(hand: list[Card]) -> bool:
+def blackjack_hand(hand: Hand | Sequence[Card] | bytes | bytearray) -> bool:
     """Checks for a blackjack hand.
 
     A blackjack hand consists of 2 cards, which are an Ace and a 10-value card (Ten/Jack/Queen/King).
     """
-    return (
-        len(hand) == 2
-        and (hand[0].value == 10 or hand[1].value == 10)
-        and (hand[0].value is CardValue.ACE or hand[1].value is CardValue.ACE)
-    )
+    return len(hand) == 2 and hand_value(hand) == BLACKJACK
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from blackjack.batch import BatchBlackjack
+from blackjack.blackjack import Blackjack
+from blackjack.core import Rules
+from blackjack.replay import ReplayShoe
+from blackjack.stats import HandStats
+
+RESTRICTED = Rules(hit_soft_17=True, blackjack_payout=1.2, surrender=False, double="10-11")
+
+
+@pytest.mark.parametrize("player", ["basic", "casino", "hit", "stand"])
+@pytest.mark.parametrize("rules", [Rules(), RESTRICTED])
+def test_batch_scores_hands_like_the_loop_engine(player, rules):
+    batch = BatchBlackjack(player=player, tables=2000, rules=rules, seed=5)
+    decks = batch._decks.copy()
+    scores = batch.play(rounds=1)
+
+    # Deal each table's shoe to the loop engine, in the same order
+    for deck, score in zip(decks, scores):
+        game = Blackjack(player=player, verbose=False, rules=rules, shoe=ReplayShoe(deck.tobytes()))
+        assert game.play(rounds=1) == score
+
+
+def test_batch_and_loop_agree_on_the_ev():
+    rules = Rules(decks=6, penetration=0.75)
+    batch, loop = HandStats(), HandStats()
+    BatchBlackjack(player="basic", tables=1000, rules=rules, seed=0).play(rounds=100, stats=batch)
+    Blackjack(player="basic", verbose=False, rules=rules, seed=0).play(rounds=100_000, stats=loop)
+    assert batch.hands == loop.hands == 100_000
+    assert abs(batch.mean - loop.mean) < 3 * np.hypot(batch.stderr, loop.stderr)
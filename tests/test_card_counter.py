@@ -0,0 +1,62 @@
+from array import array
+
+from blackjack import probability
+from blackjack.agents import CardCounterAgent
+from blackjack.blackjack import Blackjack
+from blackjack.core import GameState, Hand, Rules
+
+# Card codes (rank << 2) of a Two, Three, Six, Eight and King: Hi-Lo +1, +1, +1, 0, -1
+TWO, THREE, SIX, EIGHT, KING = 0, 1 << 2, 4 << 2, 6 << 2, 11 << 2
+
+
+def _state(dealer: list[int], player: list[int], shuffles: int, *, hidden: bool = True, remaining=None) -> GameState:
+    return GameState(Hand(dealer), Hand(player), 0, hide_dealer=hidden, shuffles=shuffles, remaining=remaining)
+
+
+def _shoe_count(remaining, decks: int) -> int:
+    """Hi-Lo count of every card missing from a shoe"""
+    hi_lo = (1, 1, 1, 1, 1, 0, 0, 0, -1, -1)
+    return sum(h * (full - left) for h, full, left in zip(hi_lo, probability.shoe_composition(decks), remaining))
+
+
+def test_counts_every_card_in_view():
+    agent = CardCounterAgent(True)
+    agent.pick_action(_state([KING, SIX], [TWO, THREE], 0))
+    assert agent.running_count == 3
+    agent.observe_round(_state([KING, SIX, EIGHT], [TWO, THREE, KING], 0, hidden=False))
+    assert agent.running_count == 1
+    # The next round starts on a reshuffled shoe: every card in view is new
+    agent.pick_action(_state([KING, TWO], [SIX, SIX], 1))
+    assert agent.running_count == 3
+
+
+def test_mid_round_reshuffle_without_shoe_counts():
+    agent = CardCounterAgent(True)
+    agent.pick_action(_state([KING, SIX], [TWO, THREE], 0))
+    # The shoe ran out and was reshuffled before the Eight: only the cards dealt afterwards count, not the hole card
+    agent.pick_action(_state([KING, SIX], [TWO, THREE, EIGHT, KING], 1))
+    assert agent.running_count == 0
+    agent.observe_round(_state([KING, SIX, TWO], [TWO, THREE, EIGHT, KING, SIX], 1, hidden=False))
+    assert agent.running_count == 2
+
+
+def test_mid_round_reshuffle_with_shoe_counts():
+    agent = CardCounterAgent(True)
+    agent.pick_action(_state([KING, SIX], [TWO, THREE], 0))
+    remaining = array("i", probability.shoe_composition(1))
+    remaining[6] -= 1  # An Eight was dealt from the new shoe
+    agent.pick_action(_state([KING, SIX], [TWO, THREE, EIGHT], 1, remaining=memoryview(remaining)))
+    assert agent.running_count == 0 and agent.true_count == 0
+    remaining[0] -= 2  # Two Twos
+    final = _state([KING, SIX, TWO], [TWO, THREE, EIGHT, TWO], 1, hidden=False, remaining=memoryview(remaining))
+    agent.observe_round(final)
+    assert agent.running_count == 2
+
+
+def test_count_matches_the_shoe_across_reshuffles():
+    # A single deck dealt to the end runs out mid-round every few rounds
+    game = Blackjack(player="counter", verbose=False, rules=Rules(decks=1, penetration=1.0), seed=4)
+    for _ in range(3000):
+        game.play(1)
+        assert game.player.running_count == _shoe_count(game.shoe.remaining, 1)
+    assert game.shoe.shuffles > 200
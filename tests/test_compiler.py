@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from blackjack import compiler, training
+from blackjack.agents import Agent, Dealer, RandomAgent, SingleActionAgent, StrategyAgent
+from blackjack.agents.qlearning_agent import QLearningAgent
+from blackjack.blackjack import Blackjack
+from blackjack.core import Action, CardValue, GameState, Rules
+from blackjack.history import HandLog, HandRecorder
+from blackjack.profiling import Profiler
+
+RESTRICTED = Rules(decks=6, penetration=0.75, hit_soft_17=True, blackjack_payout=1.2, surrender=False, double="10-11")
+RULES = [Rules(decks=6, penetration=0.75), RESTRICTED]
+
+
+class _TenCounter(Agent):
+    """Claims to be deterministic, but hits 16 only when holding a King"""
+
+    @property
+    def deterministic(self) -> bool:
+        return True
+
+    def pick_action(self, game_state: GameState, *args, **kwargs):
+        hand = game_state.agent_hand(self._is_player)
+        if hand.value < 16 or (hand.value == 16 and any(card.value is CardValue.KING for card in hand)):
+            return Action.HIT
+        return Action.STAND
+
+
+def _records(path, player, rules: Rules, compiled: bool, **kwargs) -> np.ndarray:
+    with HandRecorder(path) as recorder:
+        game = Blackjack(
+            player=player, verbose=False, rules=rules, seed=2, compiled=compiled, recorder=recorder, **kwargs
+        )
+        game.play(3000)
+    records = np.array(HandLog(path).records)
+    path.unlink()
+    return records
+
+
+@pytest.fixture(scope="module")
+def q_table(tmp_path_factory):
+    agent = QLearningAgent(is_player=True, rng=np.random.default_rng(0))
+    training.train(agent, 2000, tables=100, seed=0)
+    path = tmp_path_factory.mktemp("q") / "q.npy"
+    agent.save(path)
+    return path
+
+
+@pytest.mark.parametrize("rules", RULES)
+@pytest.mark.parametrize("player", ["basic", "hit", "stand", "casino", "random", "counter", "double"])
+def test_compiled_games_play_alike(tmp_path, player, rules):
+    if player == "double":
+        player = SingleActionAgent(is_player=True, action=Action.DOUBLE_DOWN, rules=rules)
+    compiled = _records(tmp_path / "hands.bin", player, rules, compiled=True)
+    called = _records(tmp_path / "hands.bin", player, rules, compiled=False)
+    assert np.array_equal(compiled, called)
+
+
+@pytest.mark.parametrize("rules", RULES)
+def test_compiled_q_tables_play_alike(tmp_path, q_table, rules):
+    compiled = _records(tmp_path / "hands.bin", "q", rules, compiled=True, table=q_table)
+    called = _records(tmp_path / "hands.bin", "q", rules, compiled=False, table=q_table)
+    assert np.array_equal(compiled, called)
+
+
+@pytest.mark.parametrize("rules", RULES)
+@pytest.mark.parametrize("is_player", [True, False])
+def test_compiled_tables_verify(is_player, rules):
+    for agent in (
+        Dealer(is_player, rules=rules),
+        StrategyAgent(is_player, rules=rules),
+        SingleActionAgent(is_player, Action.HIT, rules=rules),
+        SingleActionAgent(is_player, Action.SURRENDER, rules=rules),
+    ):
+        policy = compiler.compile_agent(agent, rules)
+        assert policy is not None
+        assert compiler.verify(agent, policy, rules) == []
+        assert not policy.table.flags.writeable
+
+
+def test_only_consistent_agents_compile():
+    assert compiler.compile_agent(RandomAgent(True)) is None
+    assert compiler.compile_agent(_TenCounter(True)) is None
+    assert compiler.verify(_TenCounter(True), compiler.probe(_TenCounter(True)))
+
+
+def test_compiled_tables_are_shared_by_decisions_and_rules():
+    basic = compiler.compile_agent(StrategyAgent(True, rules=RESTRICTED), RESTRICTED)
+    assert compiler.compile_agent(StrategyAgent(True, rules=Rules(**RESTRICTED.to_dict())), RESTRICTED) is basic
+    assert compiler.compile_agent(StrategyAgent(True), Rules()) is not basic
+    assert compiler.compile_agent(SingleActionAgent(True, Action.HIT), RESTRICTED) is not basic
+
+
+def test_profiles_time_compilation_as_one_phase():
+    profiler = Profiler()
+    Blackjack(player="basic", verbose=False, seed=2, profiler=profiler).play(300)
+    phases = profiler.phases
+    # Compiled agents are never called: the compiler's probes aren't timed as decisions
+    assert phases["compile"][0] == 2
+    assert "player decision" not in phases and "dealer decision" not in phases
+    assert phases["round"][0] == 300
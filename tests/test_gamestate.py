@@ -0,0 +1,64 @@
+import pytest
+
+from blackjack.core import Action, GameState, Hand, Rules, card_codes
+
+ACE, TWO, FIVE, SIX, SEVEN, TEN = (rank << 2 for rank in (card_codes.ACE, 0, 3, 4, 5, 8))
+RESTRICTED = Rules(surrender=False, double="10-11")
+
+
+def _mask(*actions: Action) -> int:
+    return sum(action.bit for action in actions)
+
+
+def _state(player, dealer=(TEN, SIX), rules: Rules = Rules(), **kwargs) -> GameState:
+    return GameState(Hand(dealer), Hand(player), 0, rules=rules, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "player, rules, actions",
+    [
+        ([TEN, SIX], Rules(), (Action.HIT, Action.STAND, Action.DOUBLE_DOWN, Action.SURRENDER)),
+        ([TEN, SIX, TWO], Rules(), (Action.HIT, Action.STAND, Action.SURRENDER)),
+        ([TEN, SIX], RESTRICTED, (Action.HIT, Action.STAND)),
+        ([FIVE, FIVE], RESTRICTED, (Action.HIT, Action.STAND, Action.DOUBLE_DOWN)),
+        ([ACE, SEVEN], Rules(), (Action.HIT, Action.STAND, Action.DOUBLE_DOWN, Action.SURRENDER)),
+        ([ACE, SEVEN], Rules(double="9-11"), (Action.HIT, Action.STAND, Action.SURRENDER)),
+        ([FIVE, SIX], Rules(double="none"), (Action.HIT, Action.STAND, Action.SURRENDER)),
+    ],
+)
+def test_player_legal_actions(player, rules, actions):
+    state = _state(player, rules=rules)
+    assert state.actions(is_player=True) == actions
+    assert state.legal == state.legal_mask(True) == _mask(*actions)
+
+
+def test_dealer_never_surrenders():
+    state = _state([TEN, SIX], dealer=(FIVE, SIX), hide_dealer=False)
+    assert state.actions(is_player=False) == (Action.HIT, Action.STAND, Action.DOUBLE_DOWN)
+    assert state.legal_mask(False) == _mask(Action.HIT, Action.STAND, Action.DOUBLE_DOWN)
+
+
+def test_hides_the_dealers_face_down_card():
+    state = _state([TEN, SIX], dealer=(ACE, SEVEN))
+    assert state.dealer.codes == bytes([SEVEN])
+    assert state.upcard.code == SEVEN
+    assert state.agent_hand(False) is state.dealer
+
+    revealed = _state([TEN, SIX], dealer=(ACE, SEVEN, TWO), hide_dealer=False)
+    assert revealed.dealer.codes == bytes([ACE, SEVEN, TWO])
+    assert revealed.upcard.code == SEVEN
+
+
+def test_dealer_hand_without_the_hole_card():
+    state = _state([TEN, SIX], dealer=(SEVEN,), hole_card=False)
+    assert state.dealer.codes == bytes([SEVEN])
+    assert state.upcard.code == SEVEN
+    assert state.hide_dealer
+
+
+def test_snapshots_the_hands():
+    player = Hand([TEN, SIX])
+    state = GameState(Hand([ACE, SEVEN]), player, 0)
+    player.append(TWO)
+    assert (state.hand.codes, state.total, state.soft) == (bytes([TEN, SIX]), 16, False)
+    assert state.actions(is_player=True)[2] is Action.DOUBLE_DOWN
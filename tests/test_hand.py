@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from blackjack import utils
+from blackjack.core import Card, Hand, card_codes
+
+ACE, TWO, SIX, NINE, TEN, KING = (rank << 2 for rank in (card_codes.ACE, 0, 4, 7, 8, 11))
+
+
+@pytest.mark.parametrize(
+    "codes, value, soft, blackjack, bust",
+    [
+        ([], 0, False, False, False),
+        ([ACE], 11, True, False, False),
+        ([ACE, KING], 21, True, True, False),
+        ([TEN, KING], 20, False, False, False),
+        ([ACE, ACE], 12, True, False, False),
+        ([ACE, SIX, NINE], 16, False, False, False),
+        ([SIX, NINE, TWO, ACE, TWO], 20, False, False, False),
+        ([NINE, TWO, KING], 21, False, False, False),
+        ([TEN, SIX, KING], 26, False, False, True),
+        ([ACE, ACE, NINE, KING], 21, False, False, False),
+    ],
+)
+def test_value(codes, value, soft, blackjack, bust):
+    hand = Hand(codes)
+    assert (hand.value, hand.soft, hand.blackjack, hand.bust) == (value, soft, blackjack, bust)
+    assert hand.soft_aces == int(soft)
+
+
+def test_value_matches_a_full_recount():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        hand = Hand()
+        for code in rng.integers(card_codes.DECK_SIZE, size=rng.integers(1, 8)):
+            hand.append(int(code))
+            assert hand.value == utils.hand_value(hand.codes)
+            assert hand.bust == (hand.value > 21)
+
+
+def test_takes_cards_or_codes():
+    cards = [Card.from_code(ACE), Card.from_code(KING)]
+    assert Hand(cards).codes == Hand([ACE, KING]).codes == bytes([ACE, KING])
+    assert Hand(cards)[:] == cards
+
+
+def test_views_are_read_only_snapshots():
+    hand = Hand([TEN, SIX])
+    view = hand.view()
+    assert hand.view() is view
+    hand.append(ACE)
+    assert hand.view() is not view
+    assert (len(view), view.value, view.codes) == (2, 16, bytes([TEN, SIX]))
+    assert (len(hand), hand.value) == (3, 17)
+    with pytest.raises(IndexError):
+        view[2]
+    with pytest.raises(TypeError):
+        view.append(TWO)
+
+
+def test_copies_are_independent():
+    hand = Hand([NINE])
+    copy = hand.copy()
+    copy.append(ACE)
+    assert (hand.value, copy.value) == (9, 20)
+    assert hand.view().copy().codes == hand.codes
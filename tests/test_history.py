@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from blackjack.blackjack import Blackjack
+from blackjack.core import Action, Rules, card_codes
+from blackjack.history import HAND_DTYPE, MAX_CARDS, HandLog, HandRecorder
+from blackjack.utils import hand_value
+
+ACE, TWO, TEN = card_codes.ACE << 2, 0, 8 << 2
+RULES = Rules(decks=6, penetration=0.75)
+
+
+def _record(path, hands: int = 2000, **kwargs) -> float:
+    with HandRecorder(path, buffer=64) as recorder:
+        game = Blackjack(player="basic", verbose=False, rules=RULES, seed=3, recorder=recorder, **kwargs)
+        return game.play(hands)
+
+
+def test_records_every_hand(tmp_path):
+    score = _record(tmp_path / "hands.bin")
+    log = HandLog(tmp_path / "hands.bin")
+    assert len(log) == 2000
+    assert log["score"].sum(dtype=np.float64) == pytest.approx(score)
+    assert np.all(np.diff(log["shoe"].astype(np.int64)) >= 0) and log["shoe"][-1] > 0
+
+    for record in log[:200]:
+        player = bytes(record["player_cards"][:record["n_player_cards"]])
+        dealer = bytes(record["dealer_cards"][:record["n_dealer_cards"]])
+        assert (record["player_total"], record["dealer_total"]) == (hand_value(player), hand_value(dealer))
+        # The player's last action ends their turn, unless they reached 21 or were dealt a blackjack
+        if record["n_player_actions"]:
+            last = record["player_actions"][record["n_player_actions"] - 1]
+            assert last in (Action.STAND.code, Action.SURRENDER.code) or hand_value(player) >= 21
+
+
+def test_appends_to_existing_files(tmp_path):
+    _record(tmp_path / "hands.bin", hands=10)
+    _record(tmp_path / "hands.bin", hands=15)
+    assert len(HandLog(tmp_path / "hands.bin")) == 25
+
+
+def test_draw_order(tmp_path):
+    player, dealer = bytes([TEN, TWO, TWO, ACE]), bytes([TWO, ACE, TEN])
+    with HandRecorder(tmp_path / "hand.bin") as recorder:
+        recorder.record(player, dealer, bytes([0, 0, 1]), bytes([0, 1]), score=-1.0)
+    log = HandLog(tmp_path / "hand.bin")
+    assert log.draws(0) == bytes([TWO, TEN, ACE, TWO, TWO, ACE, TEN])
+    assert log["player_total"][0] == 15 and log["dealer_total"][0] == 13
+
+
+def test_longest_hand_fits(tmp_path):
+    # Every card drawn while the hard total is at most 20: ten Aces, a Two, eight Aces, then a Ten
+    longest = bytes([ACE] * 10 + [TWO] + [ACE] * 8 + [TEN])
+    assert hand_value(longest[:-1]) == 20 and len(longest) <= MAX_CARDS
+    with HandRecorder(tmp_path / "hand.bin") as recorder:
+        recorder.record(longest, bytes([TEN, TEN]), bytes([0] * len(longest)), bytes([1]), score=-1.0)
+        with pytest.raises(ValueError):
+            recorder.record(bytes([ACE] * (MAX_CARDS + 1)), bytes([TEN, TEN]), b"", b"", score=0.0)
+    assert HandLog(tmp_path / "hand.bin").draws(0)[4:] == longest[2:]
+    assert HAND_DTYPE.itemsize == 100
+
+
+def test_rejects_other_files(tmp_path):
+    (tmp_path / "other.bin").write_bytes(b"not a hand history")
+    with pytest.raises(ValueError):
+        HandLog(tmp_path / "other.bin")
+    with pytest.raises(ValueError):
+        HandRecorder(tmp_path / "other.bin")
+    (tmp_path / "empty.bin").write_bytes(b"")
+    with pytest.raises(ValueError):
+        HandLog(tmp_path / "empty.bin")
@@ -0,0 +1,89 @@
+from fractions import Fraction
+
+import pytest
+
+from blackjack import probability
+from blackjack.core import card_codes
+
+# Infinite-shoe dealer bust chances by upcard (2-A), S17, the hole card drawn like any other card
+BUST_S17 = (0.3536, 0.3739, 0.3945, 0.4164, 0.4232, 0.2623, 0.2447, 0.2284, 0.2121, 0.1153)
+
+
+def _brute_force(cards: list[int], composition: list[int], hit_soft_17: bool) -> dict:
+    """Exact outcome distribution of a dealer hand, by enumerating every draw sequence"""
+    hard = sum(1 if v == 11 else v for v in cards)
+    soft = 11 in cards and hard + 10 <= 21
+    total = hard + 10 if soft else hard
+    if total > 21:
+        return {"bust": Fraction(1)}
+    if total > 17 or (total == 17 and not (hit_soft_17 and soft)):
+        return {total: Fraction(1)}
+
+    dist = {}
+    remaining = sum(composition)
+    for i, count in enumerate(composition):
+        if count:
+            rest = composition[:i] + [count - 1] + composition[i + 1:]
+            for outcome, p in _brute_force(cards + [i + 2], rest, hit_soft_17).items():
+                dist[outcome] = dist.get(outcome, 0) + Fraction(count, remaining) * p
+    return dist
+
+
+@pytest.mark.parametrize("hit_soft_17", [False, True])
+@pytest.mark.parametrize("composition", [None, probability.shoe_composition(1), probability.shoe_composition(6)])
+def test_distributions_sum_to_one(composition, hit_soft_17):
+    for upcard in probability.VALUES:
+        shoe = composition and probability.remove(composition, upcard)
+        dist = probability.dealer_distribution(upcard, shoe, hit_soft_17=hit_soft_17)
+        assert len(dist) == len(probability.OUTCOMES)
+        assert sum(dist) == pytest.approx(1.0, abs=1e-12)
+
+
+def test_infinite_shoe_bust_chances():
+    busts = [probability.dealer_distribution(upcard)[probability.BUST] for upcard in probability.VALUES]
+    assert busts == pytest.approx(BUST_S17, abs=5e-5)
+
+
+@pytest.mark.parametrize("hit_soft_17", [False, True])
+@pytest.mark.parametrize("upcard", [2, 6, 10, 11])
+def test_finite_shoe_matches_enumeration(upcard, hit_soft_17):
+    composition = (1, 1, 2, 1, 1, 1, 2, 1, 4, 2)
+    dist = probability.dealer_distribution(upcard, composition, hit_soft_17=hit_soft_17)
+    exact = _brute_force([upcard], list(composition), hit_soft_17)
+    assert dist == pytest.approx([float(exact.get(outcome, 0)) for outcome in probability.OUTCOMES], abs=1e-12)
+
+
+def test_hit_soft_17_only_changes_soft_17s():
+    s17 = probability.dealer_distribution(6)
+    h17 = probability.dealer_distribution(6, hit_soft_17=True)
+    assert h17[0] < s17[0]
+    assert h17[probability.BUST] > s17[probability.BUST]
+
+
+def test_shoe_composition_removes_cards():
+    ace, ten = card_codes.ACE << 2, 8 << 2
+    composition = probability.shoe_composition(2, [ace, ten, ten])
+    assert composition == (8, 8, 8, 8, 8, 8, 8, 8, 30, 7)
+    assert sum(probability.draw_probabilities(composition)) == pytest.approx(1.0)
+    assert probability.draw_probabilities((0,) * 10) == probability.INFINITE_DECK
+
+
+@pytest.mark.parametrize(
+    "total, soft, value, expected",
+    [
+        (10, False, 11, (21, True)),
+        (16, True, 10, (16, False)),
+        (21, True, 11, (12, False)),
+        (12, False, 11, (13, False)),
+    ],
+)
+def test_add_card(total, soft, value, expected):
+    assert probability.add_card(total, soft, value) == expected
+
+
+def test_stand_ev():
+    certain_20 = probability._POINT[20 - probability.DEALER_STANDS]
+    assert probability.stand_ev(21, certain_20) == 1.0
+    assert probability.stand_ev(20, certain_20) == 0.0
+    assert probability.stand_ev(19, certain_20) == -1.0
+    assert probability.stand_ev(22, probability._POINT[probability.BUST]) == -1.0
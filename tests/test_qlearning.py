@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from blackjack.agents.qlearning_agent import QLearningAgent
+from blackjack.batch import BatchBlackjack
+from blackjack.blackjack import Blackjack
+from blackjack.policy import load_table, save_table
+from blackjack.training import train
+
+
+@pytest.fixture(scope="module")
+def trained() -> QLearningAgent:
+    return train(QLearningAgent(True), 20_000, tables=1000, seed=0)
+
+
+def test_saved_tables_load_memory_mapped(tmp_path, trained):
+    trained.save(tmp_path / "q.npy")
+    agent = QLearningAgent(True, table=tmp_path / "q.npy")
+
+    assert isinstance(agent.q_values, np.memmap)
+    assert not agent.q_values.flags.writeable
+    assert np.array_equal(agent.q_values, trained.q_values)
+    assert not agent.trainable and agent.epsilon == 0
+
+
+def test_loaded_tables_play_like_the_trained_agent(tmp_path, trained):
+    trained.save(tmp_path / "q.npy")
+    greedy = QLearningAgent(True, table=trained.q_values.copy())
+    scores = BatchBlackjack(player=greedy, tables=1000, seed=3).play(rounds=10)
+
+    assert np.array_equal(BatchBlackjack(player="q", table=tmp_path / "q.npy", tables=1000, seed=3).play(10), scores)
+    game = Blackjack(player="q", table=tmp_path / "q.npy", verbose=False, seed=3)
+    assert not game.player.trainable
+
+
+def test_tables_can_be_read_into_memory(tmp_path, trained):
+    save_table(tmp_path / "q.npy", trained.q_values)
+    table = load_table(tmp_path / "q.npy", QLearningAgent.SHAPE, QLearningAgent.DTYPE, mmap=False)
+    assert not isinstance(table, np.memmap)
+    assert np.array_equal(table, trained.q_values)
+
+
+def test_rejects_tables_of_another_shape(tmp_path):
+    save_table(tmp_path / "q.npy", np.zeros((3, 4), dtype=QLearningAgent.DTYPE))
+    with pytest.raises(ValueError):
+        QLearningAgent(True, table=tmp_path / "q.npy")
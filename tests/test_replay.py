@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from blackjack.blackjack import Blackjack
+from blackjack.core import Rules
+from blackjack.history import HandLog, HandRecorder
+from blackjack.replay import LogShoe, ReplayShoe, replay
+
+RESTRICTED = Rules(decks=6, penetration=0.75, hit_soft_17=True, blackjack_payout=1.2, surrender=False, double="10-11")
+
+
+def _record(path, rules: Rules, hands: int = 3000, **kwargs) -> HandLog:
+    with HandRecorder(path) as recorder:
+        Blackjack(verbose=False, rules=rules, seed=11, recorder=recorder, **kwargs).play(hands)
+    return HandLog(path)
+
+
+@pytest.mark.parametrize("player", ["basic", "counter", "hit"])
+@pytest.mark.parametrize("rules", [Rules(decks=6, penetration=0.75), RESTRICTED])
+def test_replay_reproduces_the_recording(tmp_path, player, rules):
+    log = _record(tmp_path / "hands.bin", rules, player=player)
+    scores, stats = replay(log, player=player, rules=rules)
+    assert np.array_equal(scores, log["score"])
+    assert stats.hands == len(log)
+    assert stats.mean == pytest.approx(log["score"].mean(dtype=np.float64))
+
+
+def test_other_agents_get_the_recorded_deals(tmp_path):
+    log = _record(tmp_path / "hands.bin", RESTRICTED, player="basic", hands=500)
+    with HandRecorder(tmp_path / "replay.bin") as recorder:
+        game = Blackjack(player="stand", verbose=False, rules=RESTRICTED, shoe=LogShoe(log, decks=6), recorder=recorder)
+        game.play(len(log))
+    replayed = HandLog(tmp_path / "replay.bin")
+    assert not np.array_equal(replayed["score"], log["score"])
+    assert np.array_equal(replayed["shoe"], log["shoe"])
+    assert all(replayed.draws(hand)[:4] == log.draws(hand)[:4] for hand in range(len(log)))
+
+
+def test_replay_shoe_deals_in_order():
+    shoe = ReplayShoe(bytes([0, 4, 8]), decks=1)
+    assert [shoe.draw(), shoe.draw(), shoe.draw()] == [0, 4, 8]
+    with pytest.raises(EOFError):
+        shoe.draw()
@@ -0,0 +1,41 @@
+import argparse
+
+import pytest
+
+from blackjack.core import Rules
+
+
+def _parser(**kwargs) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    Rules.add_arguments(parser, **kwargs)
+    return parser
+
+
+def test_flags_default_to_the_standard_rules():
+    assert Rules.from_args(_parser().parse_args([])) == Rules()
+
+
+def test_flags_set_every_rule():
+    args = _parser().parse_args(
+        "--decks 6 --penetration 0.75 --h17 --blackjack-payout 1.2 --no-surrender --double 10-11".split()
+    )
+    assert Rules.from_args(args) == Rules(
+        decks=6, penetration=0.75, hit_soft_17=True, blackjack_payout=1.2, surrender=False, double="10-11"
+    )
+
+
+def test_flags_take_the_given_defaults():
+    defaults = Rules(decks=6, penetration=0.75, hit_soft_17=True)
+    assert Rules.from_args(_parser(defaults=defaults).parse_args([])) == defaults
+
+
+def test_shoe_flags_can_be_left_out():
+    parser = _parser(shoe=False)
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--decks", "6"])
+    assert Rules.from_args(vars(parser.parse_args(["--h17"])), decks=2) == Rules(decks=2, hit_soft_17=True)
+
+
+def test_invalid_flags_raise():
+    with pytest.raises(ValueError):
+        Rules.from_args(_parser().parse_args(["--penetration", "2"]))
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from blackjack.agents import Agent
+from blackjack.core import Action, GameState
+from blackjack.server import LINE_LIMIT, TableServer, play_remote
+
+
+async def _client(path, *lines: bytes) -> list[dict]:
+    """Connect to a server, answer its states with the given lines, and read everything it sends until it hangs up"""
+    reader, writer = await asyncio.open_unix_connection(path)
+    answers = iter(lines)
+    messages = []
+    async for line in reader:
+        messages.append(json.loads(line))
+        if messages[-1]["type"] == "state":
+            writer.write(next(answers, b"stand\n"))
+    writer.close()
+    return messages
+
+
+def _play(tmp_path, *lines: bytes, **kwargs) -> list[dict]:
+    async def run():
+        server = TableServer(seed=0, **kwargs)
+        async with await server.start(path=tmp_path / "table.sock"):
+            return await asyncio.wait_for(_client(tmp_path / "table.sock", *lines), 10)
+
+    return asyncio.run(run())
+
+
+def test_plays_the_rounds(tmp_path):
+    messages = _play(tmp_path, rounds=3)
+    assert messages[0]["type"] == "hello"
+    assert [m["type"] for m in messages].count("result") == 3
+
+
+def test_rejects_long_lines(tmp_path):
+    messages = _play(tmp_path, b"x" * (2 * LINE_LIMIT) + b"\n", rounds=1)
+    assert messages[-1] == {"type": "error", "message": f"Lines are limited to {LINE_LIMIT} bytes"}
+
+
+class _Recorder(Agent):
+    """Stands on every hand, keeping the states it was shown"""
+
+    def __init__(self):
+        super(_Recorder, self).__init__(True)
+        self.states = []
+
+    def pick_action(self, game_state: GameState, *args, **kwargs) -> Action:
+        self.states.append(game_state)
+        return Action.STAND
+
+
+def test_bots_only_see_the_upcard(tmp_path):
+    async def run(agent):
+        server = TableServer(seed=0, rounds=20)
+        async with await server.start(path=tmp_path / "table.sock"):
+            return await asyncio.wait_for(play_remote(agent, 20, path=tmp_path / "table.sock"), 10)
+
+    agent = _Recorder()
+    asyncio.run(run(agent))
+    assert agent.states
+    for state in agent.states:
+        assert len(state.dealer) == 1
+        assert state.upcard == state.dealer[0]
+        assert state.hide_dealer
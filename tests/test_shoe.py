@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from blackjack import probability
+from blackjack.blackjack import Blackjack
+from blackjack.core import Rules, Shoe
+
+
+def _shoe(**kwargs) -> Shoe:
+    return Shoe(rng=np.random.default_rng(0), **kwargs)
+
+
+def test_counts_face_up_cards():
+    shoe = _shoe(decks=2)
+    dealt = [shoe.draw() for _ in range(30)]
+    assert shoe.composition == probability.shoe_composition(2, dealt)
+    assert sum(shoe.remaining) == len(shoe) == 2 * 52 - 30
+
+
+def test_counts_face_down_cards_once_revealed():
+    shoe = _shoe()
+    hidden = shoe.draw(face_up=False)
+    assert shoe.composition == probability.shoe_composition(1)
+    shoe.reveal(hidden)
+    assert shoe.composition == probability.shoe_composition(1, [hidden])
+
+
+def test_reshuffle_between_deal_and_reveal():
+    shoe = _shoe()
+    while len(shoe) > 1:
+        shoe.draw()
+    hidden = shoe.draw(face_up=False)
+    # The shoe runs out mid-round: the face-down card is back in the reshuffled shoe, so revealing it counts nothing
+    after = [shoe.draw() for _ in range(3)]
+    shoe.reveal(hidden)
+    assert shoe.shuffles == 1
+    assert shoe.composition == probability.shoe_composition(1, after)
+
+
+def test_counts_stay_exact_across_mid_round_reshuffles():
+    game = Blackjack(player="hit", verbose=False, rules=Rules(decks=1, penetration=1.0), seed=1)
+    for _ in range(3000):
+        game.play(1)
+        remaining = list(game.shoe.remaining)
+        assert min(remaining) >= 0 and sum(remaining) == len(game.shoe)
+    assert game.shoe.shuffles > 100
+
+
+def test_cut_card():
+    shoe = _shoe(decks=6, penetration=0.75)
+    for _ in range(233):
+        shoe.draw()
+    assert not shoe.needs_shuffle
+    shoe.draw()
+    assert shoe.needs_shuffle
+    shoe.shuffle()
+    assert not shoe.needs_shuffle and shoe.shuffles == 1
+    assert shoe.composition == probability.shoe_composition(6)
+
+
+def test_seeded_shoes_deal_alike():
+    first, second = _shoe(decks=2), _shoe(decks=2)
+    assert [first.draw() for _ in range(104)] == [second.draw() for _ in range(104)]
+
+
+def test_remaining_is_a_live_read_only_view():
+    shoe = _shoe()
+    remaining = shoe.remaining
+    shoe.draw()
+    assert sum(remaining) == 51
+    with pytest.raises(TypeError):
+        remaining[0] = 0
+
+
+@pytest.mark.parametrize("penetration", [0, -0.5, 1.5])
+def test_rejects_bad_penetration(penetration):
+    with pytest.raises(ValueError):
+        Shoe(penetration=penetration)
@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+from blackjack.stats import HandStats
+
+# Per-hand scores, including doubled, surrendered and blackjack hands
+SCORES = np.random.default_rng(0).choice([-2.0, -1.0, -0.5, 0.0, 1.0, 1.5, 2.0], size=1001)
+
+
+def _added(scores: np.ndarray) -> HandStats:
+    stats = HandStats()
+    for score in scores:
+        stats.add(float(score), blackjack=score == 1.5, surrender=score == -0.5)
+    return stats
+
+
+def _assert_matches(stats: HandStats, scores: np.ndarray):
+    assert stats.hands == len(scores)
+    assert stats.mean == pytest.approx(scores.mean(), abs=1e-12)
+    assert stats.variance == pytest.approx(scores.var(ddof=1), rel=1e-12)
+    assert stats.stderr == pytest.approx(math.sqrt(scores.var(ddof=1) / len(scores)), rel=1e-12)
+    assert (stats.wins, stats.pushes, stats.losses) == ((scores > 0).sum(), (scores == 0).sum(), (scores < 0).sum())
+    assert (stats.blackjacks, stats.surrenders) == ((scores == 1.5).sum(), (scores == -0.5).sum())
+
+
+def test_add_matches_numpy():
+    _assert_matches(_added(SCORES), SCORES)
+
+
+def test_add_batch_matches_add():
+    stats = HandStats()
+    for chunk in np.array_split(SCORES, 7):
+        stats.add_batch(chunk, chunk == 1.5, chunk == -0.5)
+    stats.add_batch(SCORES[:0], SCORES[:0] == 1.5, SCORES[:0] == -0.5)
+    _assert_matches(stats, SCORES)
+
+
+@pytest.mark.parametrize("split", [0, 1, 2, 500, 1000, 1001])
+def test_merge_matches_one_pass(split):
+    merged = _added(SCORES[:split]).merge(_added(SCORES[split:]))
+    _assert_matches(merged, SCORES)
+
+
+def test_merge_many_uneven_parts():
+    parts = np.split(SCORES, [3, 10, 11, 400, 999])
+    merged = HandStats()
+    for part in parts:
+        merged.merge(_added(part))
+    _assert_matches(merged, SCORES)
+
+
+def test_merge_is_stable_far_from_zero():
+    # Welford & Chan's updates don't lose the variance to cancellation when the mean is large
+    scores = 1e9 + SCORES
+    stats = HandStats()
+    stats.add_batch(scores[:500], scores[:500] == 0, scores[:500] == 0)
+    stats.merge(_added(scores[500:]))
+    assert stats.variance == pytest.approx(SCORES.var(ddof=1), rel=1e-6)
+
+
+def test_empty():
+    stats = HandStats()
+    assert stats.hands == 0
+    assert stats.variance == math.inf
+    assert stats.ci() == math.inf
+    assert stats.merge(HandStats()).hands == 0
@@ -0,0 +1,84 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from blackjack import probability, strategy
+from blackjack.core import Action, Rules
+
+RESTRICTED = Rules(hit_soft_17=True, blackjack_payout=1.2, surrender=False, double="10-11")
+
+H, S, D, R = Action.HIT.code, Action.STAND.code, Action.DOUBLE_DOWN.code, Action.SURRENDER.code
+
+
+def _alternatives(table: np.ndarray, rules: Rules, first: bool):
+    """Every table differing from the given one by one legal action, in a state where the player acts"""
+    for total, soft, upcard in itertools.product(range(4, 21), (False, True), range(2, 12)):
+        if soft and total < 12:
+            continue
+        index = total, int(soft), upcard, int(first)
+        actions = [H, S]
+        if rules.surrender:
+            actions.append(R)
+        if first and rules.can_double(total, soft):
+            actions.append(D)
+        for code in actions:
+            if code != table[index]:
+                alternative = table.copy()
+                alternative[index] = code
+                yield index, alternative
+
+
+@pytest.mark.parametrize(
+    "total, soft, upcard, first, action",
+    [
+        (16, False, 10, True, R),
+        (17, False, 7, True, S),
+        (12, False, 2, True, H),
+        (12, False, 4, True, S),
+        (11, False, 6, True, D),
+        (11, False, 6, False, H),
+        (18, True, 9, True, H),
+        (19, True, 6, True, S),
+        (20, False, 11, True, S),
+    ],
+)
+def test_basic_strategy(total, soft, upcard, first, action):
+    assert strategy.solve()[total, int(soft), upcard, int(first)] == action
+
+
+def test_follows_the_rules():
+    table = strategy.solve(rules=RESTRICTED)
+    assert not (table == R).any()
+    doubled = np.argwhere(table == D)
+    assert len(doubled)
+    assert all(first and not soft and total in (10, 11) for total, soft, _, first in doubled)
+
+
+def test_tables_are_cached_and_read_only():
+    table = strategy.solve(rules=RESTRICTED)
+    assert strategy.solve(rules=Rules(**RESTRICTED.to_dict())) is table
+    with pytest.raises(ValueError):
+        table[10, 0, 6, 1] = H
+
+
+def test_expected_score_defaults_to_the_solved_table():
+    for rules in (Rules(), RESTRICTED):
+        assert strategy.expected_score(rules=rules) == strategy.expected_score(strategy.solve(rules=rules), rules=rules)
+    assert strategy.expected_score(rules=RESTRICTED) < strategy.expected_score()
+
+
+@pytest.mark.parametrize("rules, first", [(Rules(), True), (RESTRICTED, True), (RESTRICTED, False)])
+def test_no_single_change_improves_the_table(rules, first):
+    # Later decisions are only checked without surrender, which is only optimal for undoubled hands (see strategy.solve)
+    table = strategy.solve(rules=rules)
+    best = strategy.expected_score(table, rules=rules)
+    for index, alternative in _alternatives(table, rules, first):
+        assert strategy.expected_score(alternative, rules=rules) <= best + 1e-12, index
+
+
+def test_finite_shoe_table_round_trip(tmp_path):
+    table = strategy.solve(probability.shoe_composition(1))
+    strategy.save(table, tmp_path / "table.npy")
+    assert np.array_equal(strategy.load(tmp_path / "table.npy"), table)
+    assert "H16" in strategy.format_table(table)
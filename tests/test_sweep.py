@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from blackjack import sweep
+
+
+def test_grid():
+    assert sweep.grid(alpha=[0.1, 0.2], hit_soft_17=[False, True]) == [
+        {"alpha": 0.1, "hit_soft_17": False},
+        {"alpha": 0.1, "hit_soft_17": True},
+        {"alpha": 0.2, "hit_soft_17": False},
+        {"alpha": 0.2, "hit_soft_17": True},
+    ]
+
+
+@pytest.mark.parametrize(
+    "cell",
+    [
+        {"hit_soft_17": True, "penetration": 1.0, "alpha": 0.2, "decks": 6},
+        {"decks": 6, "alpha": 0.2, "hit_soft_17": True},
+        {"decks": "6", "alpha": 0.2, "hit_soft_17": "true", "penetration": 1},
+        {"decks": 6.0, "alpha": 0.2, "hit_soft_17": " Yes", "player": "q", "hands": 100_000, "surrender": "1"},
+    ],
+)
+def test_equivalent_cells_share_a_key(cell):
+    expected = sweep.config_hash(sweep.normalize({"decks": 6, "alpha": 0.2, "hit_soft_17": True}))
+    assert sweep.config_hash(sweep.normalize(cell)) == expected
+
+
+@pytest.mark.parametrize(
+    "cell",
+    [
+        {"alpha": 0.3},
+        {"alpha": 0.2, "decks": 2},
+        {"alpha": 0.2, "hit_soft_17": "true"},
+        {"alpha": 0.2, "hands": 1000},
+        {"player": "basic"},
+    ],
+)
+def test_different_cells_get_different_keys(cell):
+    assert sweep.config_hash(sweep.normalize(cell)) != sweep.config_hash(sweep.normalize({"alpha": 0.2}))
+
+
+def test_keys_change_with_the_cache_version(monkeypatch):
+    config = sweep.normalize({"alpha": 0.2})
+    key = sweep.config_hash(config)
+    monkeypatch.setattr(sweep, "CACHE_VERSION", sweep.CACHE_VERSION + 1)
+    assert sweep.config_hash(config) != key
+
+
+def test_boolean_rules_are_parsed():
+    assert sweep.normalize({"hit_soft_17": "false"})["rules"]["hit_soft_17"] is False
+    assert sweep.normalize({"surrender": "No"})["rules"]["surrender"] is False
+    assert sweep.normalize({"surrender": 1})["rules"]["surrender"] is True
+
+
+@pytest.mark.parametrize(
+    "cell",
+    [
+        {"alfa": 0.2},
+        {"player": "basic", "alpha": 0.2},
+        {"player": "hit", "table": "q.npy"},
+        {"rng": 1},
+        {"player": "nobody"},
+        {"hit_soft_17": "maybe"},
+        {"surrender": 2},
+        {"decks": 1.5},
+    ],
+)
+def test_invalid_cells_are_rejected(cell):
+    with pytest.raises(ValueError):
+        sweep.normalize(cell)
+
+
+def test_agent_settings():
+    assert sweep.agent_settings("q") == {"alpha", "epsilon", "gamma", "num_training", "table"}
+    assert sweep.agent_settings("basic") == {"table"}
+    assert sweep.agent_settings("hit") == set()
+
+
+def test_results_are_cached(tmp_path):
+    cells = [{"player": "basic", "hands": 200, "decks": decks} for decks in (1, 6)]
+    results = sweep.sweep(cells, [0, 1], cache=tmp_path, progress=False)
+    assert [(r["config"]["rules"]["decks"], r["seed"]) for r in results] == [(1, 0), (1, 1), (6, 0), (6, 1)]
+    assert all(r["hands"] == 200 for r in results)
+    assert len(os.listdir(tmp_path)) == 4
+
+    # Equivalent cells are read back from the cache, not played again
+    modified = {name: os.stat(tmp_path / name).st_mtime_ns for name in os.listdir(tmp_path)}
+    cached = sweep.sweep([{"player": "basic", "hands": 200, "decks": "6"}], [1], cache=tmp_path, progress=False)
+    assert cached == results[3:]
+    assert {name: os.stat(tmp_path / name).st_mtime_ns for name in os.listdir(tmp_path)} == modified
+
+    summary = sweep.summarize(results)
+    assert [row["hands"] for row in summary] == [400, 400]
+
+
+def test_summary_shows_swept_hands_apart_from_played_hands():
+    config = sweep.normalize({"player": "basic"})
+    results = [
+        {"config": {**config, "hands": hands}, "seed": seed, "hands": hands, "ev": 0.0, "ci": 0.1}
+        for hands in (100, 200)
+        for seed in (0, 1)
+    ]
+    header, *lines = sweep.format_summary(sweep.summarize(results)).splitlines()
+    assert header.split() == ["hands", "seeds", "played", "ev", "ci"]
+    assert sorted(line.split()[:3] for line in lines) == [["100", "2", "200"], ["200", "2", "400"]]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from blackjack import training
+from blackjack.agents.qlearning_agent import QLearningAgent
+from blackjack.core import Rules
+from blackjack.tournament import Tournament
+
+RULES = Rules(decks=2, penetration=0.75)
+
+
+def _play(agents: list, rounds: int = 20, **kwargs) -> tuple[Tournament, np.ndarray]:
+    tournament = Tournament(agents, rules=RULES, tables=500, seed=5, **kwargs)
+    return tournament, tournament.play(rounds)
+
+
+def test_same_agents_see_the_same_cards():
+    # Stand uses fewer cards than basic, so the shoe must move past the longest round to keep the others in sync
+    tournament, totals = _play(["basic", "stand", "basic"])
+    assert np.array_equal(totals[0], totals[2])
+    assert totals[0].any() and not np.array_equal(totals[0], totals[1])
+    assert tournament.stats[0].mean == tournament.stats[2].mean
+    assert tournament.paired[1].hands == 500 * 20
+    assert tournament.paired[1].mean == 0 and tournament.paired[1].variance == 0
+
+
+def test_random_agents_share_random_numbers():
+    _, totals = _play(["random", "hit", "random"])
+    assert np.array_equal(totals[0], totals[2])
+
+
+def test_paired_differences():
+    tournament, totals = _play(["stand", "basic", "hit"])
+    for i, paired in enumerate(tournament.paired, start=1):
+        assert paired.mean == pytest.approx(tournament.stats[i].mean - tournament.stats[0].mean, abs=1e-12)
+        assert paired.mean * paired.hands == pytest.approx((totals[i] - totals[0]).sum())
+    # Common cards make the paired difference far less noisy than independent runs
+    assert tournament.paired[0].variance < tournament.stats[0].variance + tournament.stats[1].variance
+    assert "Variance reduction" in tournament.report()
+
+
+def test_reproducible():
+    assert np.array_equal(_play(["basic", "random"])[1], _play(["basic", "random"])[1])
+
+
+def test_trainable_agents_need_a_table(tmp_path):
+    with pytest.raises(ValueError, match="untrained"):
+        _play(["basic", "q"])
+
+    agent = QLearningAgent(is_player=True, rules=RULES, rng=np.random.default_rng(0))
+    training.train(agent, 2000, tables=100, rules=RULES, seed=0)
+    agent.save(tmp_path / "q.npy")
+    tournament, totals = _play(["basic", "q"], table=tmp_path / "q.npy")
+    assert tournament.names == ["basic", "q"]
+    assert totals.shape == (2, 500)
+
+
+def test_needs_two_agents():
+    with pytest.raises(ValueError):
+        Tournament(["basic"])